@@ -0,0 +1,37 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from accounts.services import MembershipSnapshotService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily membership snapshot table for a date range'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to process (YYYY-MM-DD), defaults to a year ago')
+        parser.add_argument('--end', help='Last day to process (YYYY-MM-DD), defaults to yesterday')
+        parser.add_argument('--church', type=int, help='Only process this church ID')
+    
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        start_date = self._parse(options['start'], yesterday - timedelta(days=365))
+        end_date = self._parse(options['end'], yesterday)
+        
+        if start_date > end_date:
+            raise CommandError('--start must not be after --end')
+        
+        count = MembershipSnapshotService.rebuild(start_date, end_date, options['church'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} snapshots from {start_date} to {end_date}'
+        ))
+    
+    def _parse(self, value, default):
+        if not value:
+            return default
+        
+        parsed = parse_date(value)
+        if not parsed:
+            raise CommandError(f'Invalid date: {value}')
+        return parsed
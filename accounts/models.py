@@ -130,6 +130,26 @@ class Member(models.Model):
         church_name = self.church.name if self.church else "No Church"
         return f"{self.user.get_full_name()} - {church_name}"
 
+class MembershipDailySnapshot(models.Model):
+    """Membership figures of a church as of the end of a day"""
+    church = models.ForeignKey('churches.Church', on_delete=models.CASCADE, related_name='membership_snapshots')
+    date = models.DateField()
+    total_members = models.PositiveIntegerField(default=0)
+    active_members = models.PositiveIntegerField(default=0)
+    # Members whose membership date (or sign-up date) is this day
+    new_members = models.PositiveIntegerField(default=0)
+    tithe_payers = models.PositiveIntegerField(default=0)
+    status_counts = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'membership_daily_snapshots'
+        unique_together = ['church', 'date']
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.church_id} - {self.date}: {self.total_members} members"
+
 class UserSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     session_key = models.CharField(max_length=40)
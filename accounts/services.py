@@ -1,6 +1,10 @@
 import logging
+from collections import Counter, defaultdict
+from datetime import timedelta
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
 from django.utils import timezone
 from common.services import NotificationService
 from common.exceptions import AltarFundsException
@@ -322,3 +326,131 @@ class MemberService:
                 'end_date': end_date
             }
         }
+
+
+class MembershipSnapshotService:
+    """Service for the per-church daily membership snapshot table"""
+    
+    @staticmethod
+    def compute(start_date, end_date, church_id=None):
+        """
+        Build the snapshots of every church for each day in the range.
+        
+        One grouped query counts members by church, join day, status and
+        tithe flag; running totals over the join days give each day's
+        figures. A member joins on their membership date, or on the day
+        their account was created when it is missing. Status and tithe
+        flags are the current ones, so rebuilt history is approximate.
+        Churches without members get zero rows, so a church that lost its
+        last member does not keep reporting its previous snapshot.
+        """
+        from churches.models import Church
+        from .models import Member, MembershipDailySnapshot
+        
+        churches = Church.objects.all()
+        members = Member.objects.filter(church__isnull=False)
+        if church_id:
+            churches = churches.filter(id=church_id)
+            members = members.filter(church_id=church_id)
+        
+        rows = members.annotate(
+            joined=Coalesce(
+                'membership_date',
+                TruncDate('user__date_joined', tzinfo=timezone.get_current_timezone())
+            )
+        ).filter(joined__lte=end_date).values(
+            'church_id', 'joined', 'membership_status', 'is_tithe_payer'
+        ).annotate(count=Count('id')).order_by('joined')
+        
+        joins = defaultdict(list)
+        for row in rows:
+            joins[row['church_id']].append(row)
+        
+        snapshots = []
+        for church_pk in churches.order_by('id').values_list('id', flat=True):
+            church_rows = joins.get(church_pk, [])
+            status_counts = Counter()
+            tithe_payers = 0
+            position = 0
+            day = start_date
+            while day <= end_date:
+                new_members = 0
+                while position < len(church_rows) and church_rows[position]['joined'] <= day:
+                    row = church_rows[position]
+                    status_counts[row['membership_status']] += row['count']
+                    if row['is_tithe_payer']:
+                        tithe_payers += row['count']
+                    if row['joined'] == day:
+                        new_members += row['count']
+                    position += 1
+                
+                snapshots.append(MembershipDailySnapshot(
+                    church_id=church_pk,
+                    date=day,
+                    total_members=sum(status_counts.values()),
+                    active_members=status_counts['member'],
+                    new_members=new_members,
+                    tithe_payers=tithe_payers,
+                    status_counts=dict(status_counts)
+                ))
+                day += timedelta(days=1)
+        
+        return snapshots
+    
+    @staticmethod
+    def rebuild(start_date, end_date, church_id=None):
+        """Write (or overwrite) the snapshots for the range"""
+        from .models import MembershipDailySnapshot
+        
+        snapshots = MembershipSnapshotService.compute(start_date, end_date, church_id)
+        MembershipDailySnapshot.objects.bulk_create(
+            snapshots,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['church', 'date'],
+            update_fields=['total_members', 'active_members', 'new_members', 'tithe_payers', 'status_counts']
+        )
+        
+        logger.info(f"Wrote {len(snapshots)} membership snapshots from {start_date} to {end_date}")
+        return len(snapshots)
+    
+    @staticmethod
+    def take_snapshot(day=None):
+        """Snapshot every church as of the end of a day, yesterday by default"""
+        day = day or timezone.localdate() - timedelta(days=1)
+        return MembershipSnapshotService.rebuild(day, day)
+    
+    @staticmethod
+    def growth_rate(church, days, default=0):
+        """Percentage change in total members over the last number of days"""
+        from .models import MembershipDailySnapshot
+        
+        snapshots = MembershipDailySnapshot.objects.filter(church=church)
+        latest = snapshots.values('date', 'total_members').first()
+        if latest is None:
+            return default
+        
+        baseline = snapshots.filter(
+            date__lte=latest['date'] - timedelta(days=days)
+        ).values_list('total_members', flat=True).first()
+        if not baseline:
+            return default
+        
+        return round((latest['total_members'] - baseline) / baseline * 100, 2)
+    
+    @staticmethod
+    def monthly_growth(church):
+        """New members per month and the month's highest total"""
+        from .models import MembershipDailySnapshot
+        
+        rows = MembershipDailySnapshot.objects.filter(church=church).annotate(
+            month=TruncMonth('date')
+        ).values('month').annotate(
+            count=Sum('new_members'),
+            total=Max('total_members')
+        ).order_by('month')
+        
+        return [
+            {'month': row['month'].strftime('%Y-%m'), 'count': row['count'], 'total': row['total']}
+            for row in rows
+        ]
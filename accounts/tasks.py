@@ -0,0 +1,9 @@
+from celery import shared_task
+
+
+@shared_task
+def take_membership_snapshots():
+    """Record yesterday's membership figures for every church"""
+    from .services import MembershipSnapshotService
+    
+    return MembershipSnapshotService.take_snapshot()
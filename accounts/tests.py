@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+from giving.tests import GivingTestCase
+from .models import MembershipDailySnapshot
+from .services import MembershipSnapshotService
+
+
+class MembershipSnapshotTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.empty_church = self.create_church()
+    
+    def snapshot(self, day, church=None):
+        return MembershipDailySnapshot.objects.get(church=church or self.church, date=day)
+    
+    def test_compute_counts_members_as_they_join(self):
+        self.create_member(self.church, membership_date=date(2026, 3, 1), membership_status='member', is_tithe_payer=True)
+        self.create_member(self.church, membership_date=date(2026, 3, 3), membership_status='visitor')
+        self.create_member(self.church, membership_date=date(2026, 3, 3), membership_status='member')
+        
+        snapshots = {
+            (snapshot.church_id, snapshot.date): snapshot
+            for snapshot in MembershipSnapshotService.compute(date(2026, 2, 28), date(2026, 3, 3))
+        }
+        
+        self.assertEqual(len(snapshots), 8)
+        figures = [
+            (snapshot.total_members, snapshot.new_members, snapshot.active_members, snapshot.tithe_payers)
+            for snapshot in (snapshots[(self.church.id, date(2026, 2, 28) + timedelta(days=n))] for n in range(4))
+        ]
+        self.assertEqual(figures, [(0, 0, 0, 0), (1, 1, 1, 1), (1, 0, 1, 1), (3, 2, 2, 1)])
+        self.assertEqual(snapshots[(self.church.id, date(2026, 3, 3))].status_counts, {'member': 2, 'visitor': 1})
+        self.assertEqual(snapshots[(self.empty_church.id, date(2026, 3, 3))].total_members, 0)
+    
+    def test_rebuild_overwrites_existing_rows(self):
+        member = self.create_member(self.church, membership_date=date(2026, 3, 1))
+        MembershipSnapshotService.rebuild(date(2026, 3, 1), date(2026, 3, 2))
+        
+        member.membership_date = date(2026, 3, 2)
+        member.save()
+        written = MembershipSnapshotService.rebuild(date(2026, 3, 1), date(2026, 3, 2), church_id=self.church.id)
+        
+        self.assertEqual(written, 2)
+        self.assertEqual(MembershipDailySnapshot.objects.filter(church=self.church).count(), 2)
+        self.assertEqual(self.snapshot(date(2026, 3, 1)).total_members, 0)
+        self.assertEqual(self.snapshot(date(2026, 3, 2)).new_members, 1)
+    
+    def test_church_that_loses_its_last_member_reports_zero(self):
+        member = self.create_member(self.church, membership_date=date(2026, 1, 1))
+        MembershipSnapshotService.take_snapshot(date(2026, 3, 1))
+        
+        member.delete()
+        MembershipSnapshotService.take_snapshot(date(2026, 3, 2))
+        
+        self.assertEqual(self.snapshot(date(2026, 3, 2)).total_members, 0)
+        self.assertEqual(MembershipSnapshotService.growth_rate(self.church, days=1), -100)
+    
+    def test_growth_rate_compares_with_the_baseline(self):
+        for day in range(1, 11):
+            self.create_member(self.church, membership_date=date(2026, 3, day))
+        MembershipSnapshotService.rebuild(date(2026, 3, 1), date(2026, 3, 10))
+        
+        # 10 members on the 10th against 5 on the 5th
+        self.assertEqual(MembershipSnapshotService.growth_rate(self.church, days=5), 100)
+        self.assertEqual(MembershipSnapshotService.growth_rate(self.church, days=30, default=7), 7)
+        self.assertEqual(MembershipSnapshotService.growth_rate(self.create_church(), days=5, default=7), 7)
@@ -14,6 +14,8 @@ class SuperAdminStatsSerializer(serializers.Serializer):
     monthly_revenue = serializers.DecimalField(max_digits=15, decimal_places=2)
     total_transactions = serializers.IntegerField()
     monthly_transactions = serializers.IntegerField()
+    snapshot_taken_at = serializers.DateTimeField()
+    delta = serializers.DictField()
 
 class ChurchAdminSerializer(serializers.ModelSerializer):
     subscription_plan = serializers.StringRelatedField(read_only=True)
@@ -1,6 +1,7 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.db.models import Count, Sum, Avg, Q
+from django.db.models.functions import TruncMonth
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
@@ -13,9 +14,11 @@ from datetime import timedelta, datetime
 import uuid
 
 from accounts.models import User
+from accounts.services import MembershipSnapshotService
 from churches.models import Church
 from giving.models import GivingTransaction, GivingCategory
 from payments.models import Payment
+from reports.services import PlatformKPIService
 
 # Import admin models
 from .models import SystemNotification, ChurchActivity, SubscriptionPlan
@@ -33,22 +36,19 @@ class SuperAdminDashboardViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated, IsAdminUser]
     
     def list(self, request):
-        """Get super admin dashboard statistics"""
+        """Get super admin dashboard statistics from the latest platform KPI snapshot"""
+        snapshot = PlatformKPIService.latest()
         stats = {
-            'total_churches': Church.objects.count(),
-            'active_churches': Church.objects.filter(is_active=True).count(),
-            'total_users': User.objects.count(),
-            'active_users': User.objects.filter(is_active=True).count(),
-            'total_revenue': Payment.objects.aggregate(
-                total=Sum('amount')
-            )['total'] or 0,
-            'monthly_revenue': Payment.objects.filter(
-                created_at__gte=timezone.now() - timedelta(days=30)
-            ).aggregate(total=Sum('amount'))['total'] or 0,
-            'total_transactions': GivingTransaction.objects.count(),
-            'monthly_transactions': GivingTransaction.objects.filter(
-                created_at__gte=timezone.now() - timedelta(days=30)
-            ).count(),
+            'total_churches': snapshot.church_count,
+            'active_churches': snapshot.active_church_count,
+            'total_users': snapshot.user_count,
+            'active_users': snapshot.active_user_count,
+            'total_revenue': snapshot.payment_volume,
+            'monthly_revenue': snapshot.recent_payment_volume,
+            'total_transactions': snapshot.transaction_count,
+            'monthly_transactions': snapshot.recent_transaction_count,
+            'snapshot_taken_at': snapshot.taken_at,
+            'delta': PlatformKPIService.delta(snapshot),
         }
         
         serializer = SuperAdminStatsSerializer(stats)
@@ -176,24 +176,21 @@ class ChurchAnalyticsViewSet(viewsets.ViewSet):
         try:
             church = Church.objects.get(pk=pk)
             
-            # Member growth data
-            member_growth = User.objects.filter(
-                church=church
-            ).extra({
-                'month': "strftime('%Y-%m', created_at)"
-            }).values('month').annotate(
-                count=Count('id')
-            ).order_by('month')
+            # Member growth data, from the nightly membership snapshots
+            member_growth = MembershipSnapshotService.monthly_growth(church)
             
             # Donation trends
-            donation_trends = GivingTransaction.objects.filter(
-                church=church
-            ).extra({
-                'month': "strftime('%Y-%m', created_at)"
-            }).values('month').annotate(
-                total=Sum('amount'),
-                count=Count('id')
-            ).order_by('month')
+            donation_trends = [
+                {'month': row['month'].strftime('%Y-%m'), 'total': row['total'], 'count': row['count']}
+                for row in GivingTransaction.objects.filter(
+                    church=church
+                ).annotate(
+                    month=TruncMonth('created_at', tzinfo=timezone.get_current_timezone())
+                ).values('month').annotate(
+                    total=Sum('amount'),
+                    count=Count('id')
+                ).order_by('month')
+            ]
             
             # Engagement metrics
             engagement_metrics = {
@@ -211,8 +208,8 @@ class ChurchAnalyticsViewSet(viewsets.ViewSet):
             }
             
             return Response({
-                'memberGrowth': list(member_growth),
-                'donationTrends': list(donation_trends),
+                'memberGrowth': member_growth,
+                'donationTrends': donation_trends,
                 'engagementMetrics': engagement_metrics
             })
             
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from budgets.services import BudgetSpendingService
+
+
+class Command(BaseCommand):
+    help = 'Compare budget spent amounts with approved expenses and repair any drift'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only process budgets for this year')
+        parser.add_argument('--church', type=int, help='Only process this church ID')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Report drift without writing anything'
+        )
+    
+    def handle(self, *args, **options):
+        if options['check']:
+            drift = BudgetSpendingService.find_drift(options['church'], options['year'])
+        else:
+            drift = BudgetSpendingService.reconcile(options['church'], options['year'])
+        
+        for item in drift:
+            budget = item['budget']
+            self.stdout.write(
+                f"Budget {budget.id} ({budget.department} {budget.period} {budget.year}): "
+                f"stored {item['stored']}, expected {item['expected']}"
+            )
+        
+        verb = 'Found' if options['check'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(drift)} drifted budgets'))
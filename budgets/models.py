@@ -5,6 +5,14 @@ from common.models import TimeStampedModel
 class Budget(TimeStampedModel):
     """Budget model"""
     user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='budgets')
+    # Copied from the owning user so church aggregates need no join
+    church = models.ForeignKey(
+        'churches.Church',
+        on_delete=models.CASCADE,
+        related_name='budgets',
+        null=True,
+        blank=True
+    )
     name = models.CharField(max_length=200)
     department = models.CharField(max_length=100)
     allocated_amount = models.DecimalField(max_digits=15, decimal_places=2)
@@ -15,17 +23,25 @@ class Budget(TimeStampedModel):
         ('annual', 'Annual')
     ], default='monthly')
     year = models.IntegerField()
-    month = models.IntegerField(null=True, blank=True)  # null for annual/quarterly
+    month = models.IntegerField(null=True, blank=True)  # null for annual, first month for quarterly
     
     class Meta:
         db_table = 'budgets'
         verbose_name = 'Budget'
         verbose_name_plural = 'Budgets'
         ordering = ['-year', '-month']
+        indexes = [
+            models.Index(fields=['church', 'year', 'month']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.allocated_amount}"
     
+    def save(self, *args, **kwargs):
+        if self.church_id is None and self.user_id:
+            self.church_id = self.user.church_id
+        super().save(*args, **kwargs)
+    
     @property
     def remaining_amount(self):
         return self.allocated_amount - self.spent_amount
@@ -0,0 +1,157 @@
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from common.cache import ChurchDataCache
+from expenses.models import Expense
+from .models import Budget
+
+logger = logging.getLogger('altar_funds')
+
+
+class BudgetSpendingService:
+    """Service for keeping budget spent amounts in step with approved expenses
+
+    An expense counts against every budget of its church and department whose
+    period covers the expense date: the monthly budget for its month, the
+    quarterly budget for its quarter and the annual budget for its year. A
+    quarterly budget covers the quarter its month falls in, whichever month
+    of the quarter was saved. Budgets saved without a month (quarterly
+    budgets used to be) cover their whole year.
+    """
+    
+    @staticmethod
+    def quarter_start(month):
+        return (month - 1) // 3 * 3 + 1
+    
+    @staticmethod
+    def quarter_months(month):
+        start = BudgetSpendingService.quarter_start(month)
+        return range(start, start + 3)
+    
+    @staticmethod
+    def period_filter(year, month):
+        """Budgets whose period covers the given month"""
+        return Q(year=year) & (
+            Q(period='monthly', month=month)
+            | Q(period='quarterly', month__in=BudgetSpendingService.quarter_months(month))
+            | Q(period='annual')
+            | Q(month__isnull=True)
+        )
+    
+    @staticmethod
+    def apply(expenses, sign=1):
+        """Add (or with sign=-1 remove) expenses to their budgets, one UPDATE per group"""
+        totals = defaultdict(Decimal)
+        for expense in expenses:
+            if expense.church_id is None:
+                continue
+            key = (
+                expense.church_id,
+                expense.budget_department.lower(),
+                expense.date.year,
+                expense.date.month
+            )
+            totals[key] += expense.amount
+        
+        # Callers invalidate the church caches along with the expense change
+        updated = 0
+        for (church_id, department, year, month), amount in totals.items():
+            updated += Budget.objects.filter(
+                BudgetSpendingService.period_filter(year, month),
+                church_id=church_id,
+                department__iexact=department
+            ).update(spent_amount=F('spent_amount') + sign * amount)
+        return updated
+    
+    @staticmethod
+    def expected_spending(church_id=None, year=None):
+        """Approved expense totals keyed by (church, department, year, month)"""
+        expenses = Expense.objects.filter(status='approved', church__isnull=False)
+        if church_id:
+            expenses = expenses.filter(church_id=church_id)
+        if year:
+            expenses = expenses.filter(date__year=year)
+        
+        rows = expenses.values(
+            'church_id',
+            'department',
+            'category__name',
+            year_number=ExtractYear('date'),
+            month_number=ExtractMonth('date')
+        ).annotate(total=Sum('amount')).order_by()
+        
+        totals = defaultdict(Decimal)
+        for row in rows:
+            department = (row['department'] or row['category__name']).lower()
+            key = (row['church_id'], department, row['year_number'], row['month_number'])
+            totals[key] += row['total']
+        return totals
+    
+    @staticmethod
+    def find_drift(church_id=None, year=None):
+        """List budgets whose stored spent amount differs from their approved expenses"""
+        budgets = Budget.objects.filter(church__isnull=False)
+        if church_id:
+            budgets = budgets.filter(church_id=church_id)
+        if year:
+            budgets = budgets.filter(year=year)
+        return BudgetSpendingService._drift(budgets, BudgetSpendingService.expected_spending(church_id, year))
+    
+    @staticmethod
+    def _drift(budgets, totals):
+        drift = []
+        for budget in budgets.only('id', 'church_id', 'department', 'period', 'year', 'month', 'spent_amount'):
+            if budget.period == 'annual' or budget.month is None:
+                months = range(1, 13)
+            elif budget.period == 'quarterly':
+                months = BudgetSpendingService.quarter_months(budget.month)
+            else:
+                months = [budget.month]
+            
+            department = budget.department.lower()
+            expected = sum(
+                (totals.get((budget.church_id, department, budget.year, month), Decimal('0.00'))
+                 for month in months),
+                Decimal('0.00')
+            )
+            if expected != budget.spent_amount:
+                drift.append({'budget': budget, 'stored': budget.spent_amount, 'expected': expected})
+        return drift
+    
+    @staticmethod
+    def reconcile(church_id=None, year=None):
+        """Reset every drifted budget's spent amount from its approved expenses"""
+        candidates = BudgetSpendingService.find_drift(church_id, year)
+        if not candidates:
+            return candidates
+        
+        with transaction.atomic():
+            # Hold the rows so approvals cannot add spending meanwhile, then
+            # check again under the lock
+            drift = BudgetSpendingService._drift(
+                Budget.objects.select_for_update().filter(
+                    id__in=[item['budget'].id for item in candidates]
+                ).order_by('id'),
+                BudgetSpendingService.expected_spending(church_id, year)
+            )
+            
+            # Each write only applies if the stored amount is still the one checked
+            reconciled = []
+            for item in drift:
+                budget = item['budget']
+                if Budget.objects.filter(pk=budget.pk, spent_amount=item['stored']).update(
+                    spent_amount=item['expected']
+                ):
+                    budget.spent_amount = item['expected']
+                    reconciled.append(item)
+            
+            for church_id in {item['budget'].church_id for item in reconciled}:
+                transaction.on_commit(lambda church_id=church_id: ChurchDataCache.bump_version(church_id))
+        
+        if reconciled:
+            logger.warning(f"Reconciled spent amount of {len(reconciled)} budgets")
+        return reconciled
@@ -0,0 +1,243 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from expenses.models import Expense, ExpenseCategory
+from expenses.services import ExpenseApprovalService
+from expenses.views import BULK_APPROVE_LIMIT, ExpenseSerializer
+from giving.tests import GivingTestCase
+from .models import Budget
+from .services import BudgetSpendingService
+
+
+class BudgetSpendingTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.pastor = self.create_user(self.church, role='pastor')
+        self.category = ExpenseCategory.objects.create(name='Youth')
+        self.client = APIClient()
+        self.client.force_authenticate(self.pastor)
+        self.monthly = self.create_budget(month=3)
+        self.quarterly = self.create_budget(period='quarterly', month=1)
+        self.annual = self.create_budget(period='annual')
+    
+    def create_budget(self, period='monthly', month=None, department='Youth'):
+        return Budget.objects.create(
+            user=self.pastor,
+            name=f'{department} {period}',
+            department=department,
+            allocated_amount=Decimal('1000.00'),
+            period=period,
+            year=2026,
+            month=month
+        )
+    
+    def create_expense(self, amount='10.00', day=date(2026, 3, 5), **kwargs):
+        kwargs.setdefault('user', self.pastor)
+        return Expense.objects.create(
+            title='Youth camp',
+            amount=Decimal(amount),
+            category=self.category,
+            date=day,
+            **kwargs
+        )
+    
+    def spent(self, *budgets):
+        return [Budget.objects.get(pk=budget.pk).spent_amount for budget in budgets]
+    
+    def test_approve_then_reject_moves_spending_once(self):
+        expense = self.create_expense()
+        expenses = Expense.objects.filter(pk=expense.pk)
+        
+        ExpenseApprovalService.set_status(expenses, 'approved')
+        self.assertEqual(self.spent(self.monthly, self.quarterly, self.annual), [Decimal('10.00')] * 3)
+        
+        self.assertEqual(ExpenseApprovalService.set_status(expenses, 'approved'), [])
+        self.assertEqual(self.spent(self.monthly), [Decimal('10.00')])
+        
+        ExpenseApprovalService.set_status(expenses, 'rejected')
+        ExpenseApprovalService.set_status(expenses, 'rejected')
+        self.assertEqual(self.spent(self.monthly, self.quarterly, self.annual), [Decimal('0.00')] * 3)
+    
+    def test_quarterly_budget_without_a_month_covers_its_year(self):
+        legacy = self.create_budget(period='quarterly')
+        expense = self.create_expense(day=date(2026, 11, 2))
+        
+        ExpenseApprovalService.set_status(Expense.objects.filter(pk=expense.pk), 'approved')
+        
+        self.assertEqual(self.spent(legacy, self.quarterly), [Decimal('10.00'), Decimal('0.00')])
+        self.assertEqual(BudgetSpendingService.find_drift(), [])
+    
+    def test_quarterly_budget_covers_the_quarter_its_month_falls_in(self):
+        mid_quarter = self.create_budget(period='quarterly', month=2, department='Music')
+        expenses = [
+            self.create_expense(department='Music', day=date(2026, 1, 10)),
+            self.create_expense(department='Music', day=date(2026, 3, 31)),
+            self.create_expense(department='Music', day=date(2026, 4, 1)),
+        ]
+        
+        ExpenseApprovalService.set_status(Expense.objects.filter(pk__in=[e.pk for e in expenses]), 'approved')
+        
+        self.assertEqual(self.spent(mid_quarter), [Decimal('20.00')])
+        self.assertEqual(BudgetSpendingService.find_drift(), [])
+    
+    def test_bulk_approve_updates_each_budget_group_once(self):
+        expenses = [self.create_expense(), self.create_expense(), self.create_expense(day=date(2026, 3, 20))]
+        other = self.create_expense(department='Music')
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/expenses/bulk-approve/',
+                {'ids': [expense.pk for expense in expenses + [other]] + [999999]},
+                format='json'
+            )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['skipped'], [999999])
+        budget_updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "budgets"')]
+        # One UPDATE for the Youth expenses of March 2026 and one for Music
+        self.assertEqual(len(budget_updates), 2)
+        self.assertEqual(self.spent(self.monthly, self.annual), [Decimal('30.00')] * 2)
+    
+    def test_bulk_approve_limit(self):
+        response = self.client.post(
+            '/api/expenses/bulk-approve/',
+            {'ids': list(range(1, BULK_APPROVE_LIMIT + 2))},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    def test_only_approvers_of_the_church_can_approve_or_reject(self):
+        expense = self.create_expense(user=self.create_user(self.church, role='treasurer'))
+        submitter = APIClient()
+        submitter.force_authenticate(expense.user)
+        outsider = APIClient()
+        outsider.force_authenticate(self.create_user(self.create_church(), role='pastor'))
+        
+        for action in ('approve', 'reject'):
+            response = submitter.post(f'/api/expenses/{expense.pk}/{action}/')
+            self.assertEqual(response.status_code, 403)
+            response = outsider.post(f'/api/expenses/{expense.pk}/{action}/')
+            self.assertEqual(response.status_code, 404)
+        
+        expense.refresh_from_db()
+        self.assertEqual(expense.status, 'pending')
+        self.assertEqual(self.spent(self.monthly, self.annual), [Decimal('0.00')] * 2)
+        
+        response = self.client.post(f'/api/expenses/{expense.pk}/approve/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.spent(self.monthly, self.annual), [Decimal('10.00')] * 2)
+    
+    def test_deleting_an_approved_expense_removes_its_spending(self):
+        expense = self.create_expense()
+        ExpenseApprovalService.set_status(Expense.objects.filter(pk=expense.pk), 'approved')
+        
+        response = self.client.delete(f'/api/expenses/{expense.pk}/')
+        
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.spent(self.monthly, self.annual), [Decimal('0.00')] * 2)
+    
+    def test_editing_an_approved_expense_moves_its_spending(self):
+        expense = self.create_expense()
+        ExpenseApprovalService.set_status(Expense.objects.filter(pk=expense.pk), 'approved')
+        april = self.create_budget(month=4)
+        
+        response = self.client.patch(
+            f'/api/expenses/{expense.pk}/',
+            {'date': '2026-04-01', 'status': 'pending'},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        expense.refresh_from_db()
+        self.assertEqual(expense.status, 'approved')
+        self.assertEqual(self.spent(self.monthly, april, self.quarterly), [Decimal('0.00'), Decimal('10.00'), Decimal('0.00')])
+        self.assertEqual(BudgetSpendingService.find_drift(), [])
+    
+    def test_amount_is_fixed_once_approved(self):
+        expense = self.create_expense()
+        ExpenseApprovalService.set_status(Expense.objects.filter(pk=expense.pk), 'approved')
+        
+        response = self.client.patch(f'/api/expenses/{expense.pk}/', {'amount': '25.00'}, format='json')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('amount', response.data)
+        expense.refresh_from_db()
+        self.assertEqual(expense.amount, Decimal('10.00'))
+        self.assertEqual(self.spent(self.monthly, self.quarterly, self.annual), [Decimal('10.00')] * 3)
+        
+        # Resending the same amount alongside other edits is fine
+        response = self.client.patch(
+            f'/api/expenses/{expense.pk}/',
+            {'amount': '10.00', 'title': 'Youth camp deposit'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+    
+    def test_amount_approved_while_editing_is_not_changed(self):
+        expense = self.create_expense()
+        serializer = ExpenseSerializer(expense, data={'amount': '25.00'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        ExpenseApprovalService.set_status(Expense.objects.filter(pk=expense.pk), 'approved')
+        
+        with self.assertRaises(ValidationError):
+            ExpenseApprovalService.update(serializer)
+        
+        expense.refresh_from_db()
+        self.assertEqual(expense.amount, Decimal('10.00'))
+        self.assertEqual(self.spent(self.monthly), [Decimal('10.00')])
+    
+    def test_pending_expense_amount_can_be_corrected(self):
+        expense = self.create_expense()
+        
+        response = self.client.patch(f'/api/expenses/{expense.pk}/', {'amount': '12.50'}, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        expense.refresh_from_db()
+        self.assertEqual(expense.amount, Decimal('12.50'))
+        self.assertEqual(self.spent(self.monthly, self.annual), [Decimal('0.00')] * 2)
+    
+    def test_reconcile_repairs_drift(self):
+        expense = self.create_expense()
+        ExpenseApprovalService.set_status(Expense.objects.filter(pk=expense.pk), 'approved')
+        Budget.objects.filter(pk=self.annual.pk).update(spent_amount=Decimal('55.00'))
+        
+        out = StringIO()
+        call_command('reconcile_budget_spending', '--check', stdout=out)
+        self.assertIn('Found 1 drifted budgets', out.getvalue())
+        self.assertEqual(self.spent(self.annual), [Decimal('55.00')])
+        
+        call_command('reconcile_budget_spending', stdout=StringIO())
+        self.assertEqual(self.spent(self.annual), [Decimal('10.00')])
+        self.assertEqual(BudgetSpendingService.find_drift(), [])
+    
+    def test_reconcile_does_not_overwrite_a_concurrent_increment(self):
+        expense = self.create_expense()
+        ExpenseApprovalService.set_status(Expense.objects.filter(pk=expense.pk), 'approved')
+        Budget.objects.filter(pk=self.annual.pk).update(spent_amount=Decimal('55.00'))
+        
+        # Spending added between the locked drift check and the write wins
+        drift = BudgetSpendingService._drift
+        calls = []
+        
+        def drift_then_increment(*args, **kwargs):
+            result = drift(*args, **kwargs)
+            calls.append(result)
+            if len(calls) == 2:
+                Budget.objects.filter(pk=self.annual.pk).update(spent_amount=F('spent_amount') + Decimal('5.00'))
+            return result
+        
+        with mock.patch.object(BudgetSpendingService, '_drift', side_effect=drift_then_increment):
+            reconciled = BudgetSpendingService.reconcile()
+        
+        self.assertEqual(reconciled, [])
+        self.assertEqual(self.spent(self.annual), [Decimal('60.00')])
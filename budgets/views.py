@@ -15,6 +15,7 @@ class BudgetSerializer(serializers.ModelSerializer):
     class Meta:
         model = Budget
         fields = '__all__'
+        read_only_fields = ['church']
 
 
 class BudgetListCreateView(generics.ListCreateAPIView):
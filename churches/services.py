@@ -453,36 +453,10 @@ class MpesaAccountService:
 
 # Helper functions
 def calculate_growth_rate(church):
-    """Calculate church membership growth rate"""
-    from accounts.models import Member
-    from datetime import timedelta
+    """Calculate church membership growth rate over the last 90 days"""
+    from accounts.services import MembershipSnapshotService
     
-    now = timezone.now()
-    last_month = now - timedelta(days=30)
-    three_months_ago = now - timedelta(days=90)
-    
-    current_members = Member.objects.filter(
-        user__church=church,
-        user__is_active=True
-    ).count()
-    
-    last_month_members = Member.objects.filter(
-        user__church=church,
-        user__is_active=True,
-        created_at__lte=last_month
-    ).count()
-    
-    three_months_members = Member.objects.filter(
-        user__church=church,
-        user__is_active=True,
-        created_at__lte=three_months_ago
-    ).count()
-    
-    if three_months_members == 0:
-        return 0
-    
-    growth_rate = ((current_members - three_months_members) / three_months_members) * 100
-    return round(growth_rate, 2)
+    return MembershipSnapshotService.growth_rate(church, days=90, default=0)
 
 
 def get_year_to_date_giving(church):
@@ -0,0 +1,142 @@
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger('altar_funds')
+
+
+class ChurchDataCache:
+    """
+    Versioned cache for per-church dashboard data.
+    
+    Keys embed a per-church version counter, so bumping the version when a
+    church's financial data changes makes every cached entry for that church
+    unreachable without having to find and delete them.
+    
+    A version that is missing (never read, or evicted) starts again from the
+    current time in nanoseconds rather than a fixed number, so it can never
+    repeat a version that keys were written under before.
+    """
+    
+    STATS_KEY = 'church_cache:stats:{}'
+    
+    @staticmethod
+    def _version_key(church_id):
+        return f'church_cache:{church_id}:version'
+    
+    @staticmethod
+    def get_version(church_id):
+        """Get the current data version of a church"""
+        return cache.get_or_set(ChurchDataCache._version_key(church_id), time.time_ns, timeout=None)
+    
+    @staticmethod
+    def bump_version(church_id):
+        """Invalidate everything cached for a church"""
+        if not church_id:
+            return
+        
+        key = ChurchDataCache._version_key(church_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The version was never read or has been evicted
+            cache.set(key, time.time_ns(), timeout=None)
+    
+    @staticmethod
+    def get_versions(church_ids):
+        """Get the current data versions of many churches in one round trip"""
+        keys = {ChurchDataCache._version_key(church_id): church_id for church_id in church_ids}
+        found = cache.get_many(list(keys))
+        
+        versions = {}
+        for key, church_id in keys.items():
+            if key in found:
+                versions[church_id] = found[key]
+            else:
+                versions[church_id] = cache.get_or_set(key, time.time_ns, timeout=None)
+        return versions
+    
+    @staticmethod
+    def _key(church_id, version, endpoint, period, role):
+        return f'church_cache:{church_id}:v{version}:{endpoint}:{period}:{role}'
+    
+    @staticmethod
+    def make_key(church_id, endpoint, period='all', role=''):
+        """Build the cache key for a church endpoint"""
+        version = ChurchDataCache.get_version(church_id)
+        return ChurchDataCache._key(church_id, version, endpoint, period, role)
+    
+    @staticmethod
+    def get_many(church_ids, endpoint, period='all', role=''):
+        """
+        Look up one endpoint for many churches at once.
+        
+        Returns the cached data by church ID and the cache key of every
+        church, so the caller can compute the misses and store them with
+        set_many.
+        """
+        versions = ChurchDataCache.get_versions(church_ids)
+        keys = {
+            church_id: ChurchDataCache._key(church_id, versions[church_id], endpoint, period, role)
+            for church_id in church_ids
+        }
+        found = cache.get_many(list(keys.values()))
+        
+        hits = {church_id: found[key] for church_id, key in keys.items() if key in found}
+        if hits:
+            ChurchDataCache._count('hits', len(hits))
+        if len(keys) > len(hits):
+            ChurchDataCache._count('misses', len(keys) - len(hits))
+        return hits, keys
+    
+    @staticmethod
+    def set_many(data_by_key, timeout=None):
+        """Store entries keyed by the keys returned from get_many"""
+        if data_by_key:
+            cache.set_many(data_by_key, timeout or settings.DASHBOARD_CACHE_TIMEOUT)
+    
+    @staticmethod
+    def get_or_compute(church_id, endpoint, compute, period='all', role='', timeout=None):
+        """Serve a church endpoint from cache, computing it on a miss"""
+        key = ChurchDataCache.make_key(church_id, endpoint, period, role)
+        data = cache.get(key)
+        
+        if data is not None:
+            ChurchDataCache._count('hits')
+            return data
+        
+        ChurchDataCache._count('misses')
+        data = compute()
+        cache.set(key, data, timeout or settings.DASHBOARD_CACHE_TIMEOUT)
+        return data
+    
+    @staticmethod
+    def _count(name, amount=1):
+        key = ChurchDataCache.STATS_KEY.format(name)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key, amount)
+    
+    @staticmethod
+    def get_stats():
+        """Get cache hit and miss counters"""
+        hits = cache.get(ChurchDataCache.STATS_KEY.format('hits'), 0)
+        misses = cache.get(ChurchDataCache.STATS_KEY.format('misses'), 0)
+        lookups = hits + misses
+        
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups * 100, 2) if lookups else 0,
+        }
+    
+    @staticmethod
+    def reset_stats():
+        """Reset the hit and miss counters"""
+        cache.delete_many([
+            ChurchDataCache.STATS_KEY.format('hits'),
+            ChurchDataCache.STATS_KEY.format('misses'),
+        ])
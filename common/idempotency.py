@@ -0,0 +1,150 @@
+import functools
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+logger = logging.getLogger('altar_funds')
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f'{request.method}:{request.path}:{body}'.encode()).hexdigest()
+
+
+def _take_over(record, fingerprint, expires_at):
+    """Re-claim an in-progress record whose lease ran out, unless another retry got there first"""
+    now = timezone.now()
+    if (
+        record.status != 'in_progress'
+        or record.request_fingerprint != fingerprint
+        or record.created_at > now - timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE)
+    ):
+        return False
+    
+    # created_at doubles as the lease start
+    return bool(IdempotencyKey.objects.filter(
+        pk=record.pk,
+        status='in_progress',
+        created_at=record.created_at
+    ).update(created_at=now, expires_at=expires_at))
+
+
+def _claim(request, key, fingerprint):
+    """
+    Create the key record, or return the live one that already exists.
+    
+    A record left in progress past IDEMPOTENCY_KEY_LEASE belongs to a request
+    whose worker died, so a retry of the same request claims it instead.
+    """
+    expires_at = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    
+    for _attempt in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key,
+                    endpoint=request.path,
+                    request_fingerprint=fingerprint,
+                    expires_at=expires_at
+                ), True
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+            if existing is None:
+                continue
+            if existing.expires_at > timezone.now():
+                if _take_over(existing, fingerprint, expires_at):
+                    existing.refresh_from_db()
+                    return existing, True
+                return existing, False
+            # Expired records are treated as absent
+            existing.delete()
+    
+    return IdempotencyKey.objects.get(user=request.user, key=key), False
+
+
+def _release(record):
+    """Delete a claimed key so the client can retry, without masking the view's error"""
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(pk=record.pk, status='in_progress').delete()
+    except DatabaseError:
+        # The view broke the surrounding transaction; its rollback drops the
+        # key, and otherwise the lease frees it
+        logger.exception(f"Could not release {IDEMPOTENCY_HEADER} {record.key}")
+
+
+def idempotent(view_func):
+    """
+    Make a POST view replay its stored response when an authenticated client
+    repeats a request with the same Idempotency-Key header.
+    
+    Works on function views under @api_view and on viewset methods. Requests
+    without the header behave as before. Every response the view returns is
+    stored, errors included, because the view may already have called a
+    payment gateway; only an unhandled exception releases the key for a retry.
+    A key whose request never finished is freed once its lease runs out.
+    """
+    @functools.wraps(view_func)
+    def wrapper(*args, **kwargs):
+        request = next(arg for arg in args if isinstance(arg, Request))
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_func(*args, **kwargs)
+        
+        if len(key) > 255:
+            return Response({
+                'success': False,
+                'message': f'{IDEMPOTENCY_HEADER} must be at most 255 characters'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        fingerprint = _fingerprint(request)
+        record, created = _claim(request, key, fingerprint)
+        
+        if not created:
+            if record.request_fingerprint != fingerprint:
+                return Response({
+                    'success': False,
+                    'message': f'{IDEMPOTENCY_HEADER} was already used for a different request'
+                }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if record.status != 'completed':
+                return Response({
+                    'success': False,
+                    'message': f'A request with this {IDEMPOTENCY_HEADER} is still being processed'
+                }, status=status.HTTP_409_CONFLICT)
+            
+            response = Response(record.response_body, status=record.response_status)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        
+        try:
+            response = view_func(*args, **kwargs)
+        except BaseException:
+            _release(record)
+            raise
+        
+        record.status = 'completed'
+        record.response_status = response.status_code
+        record.response_body = response.data
+        record.save(update_fields=['status', 'response_status', 'response_body'])
+        return response
+    
+    return wrapper
+
+
+def purge_expired_idempotency_keys():
+    """Delete stored responses whose TTL has passed"""
+    deleted, _details = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
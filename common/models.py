@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
 
 
 class TimeStampedModel(models.Model):
@@ -54,3 +55,71 @@ class FinancialModel(TimeStampedModel):
     
     class Meta:
         abstract = True
+
+
+class OutboxEvent(TimeStampedModel):
+    """
+    Side effect recorded in the same database transaction as the change that
+    caused it, and run later by the outbox worker (common.services.OutboxService)
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        db_table = 'outbox_events'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at', 'id']),
+            models.Index(fields=['topic']),
+        ]
+    
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.status})"
+    
+    @classmethod
+    def publish(cls, topic, payload):
+        """Record an event; call inside the transaction that makes the change"""
+        return cls.objects.create(topic=topic, payload=payload)
+
+
+class IdempotencyKey(models.Model):
+    """Stored response for a client-supplied Idempotency-Key, kept until expires_at"""
+    STATUS_CHOICES = [
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+    ]
+    
+    user = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'idempotency_keys'
+        unique_together = ['user', 'key']
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.key} ({self.status})"
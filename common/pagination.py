@@ -1,4 +1,6 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
 
@@ -27,3 +29,52 @@ class SmallResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 50
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a (date, id) ordering for high-volume lists.
+    
+    Each page is fetched with a range condition on the last row seen, so
+    later pages cost the same as the first and no COUNT(*) is run. Views
+    may set ``keyset_ordering``; pass ``include_total=true`` to get an
+    estimated total.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    total_query_param = 'include_total'
+    ordering = ('-created_at', '-id')
+    
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'keyset_ordering', self.ordering))
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = None
+        if request.query_params.get(self.total_query_param) in ('1', 'true', 'True'):
+            self.total = self.estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+    
+    def estimate_count(self, queryset):
+        """Planner estimate on PostgreSQL, exact count elsewhere"""
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.count()
+        
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']['Plan Rows']
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'links': {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link()
+            },
+            'estimated_total': self.total,
+            'page_size': self.page_size,
+            'results': data
+        })
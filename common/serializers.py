@@ -41,6 +41,18 @@ class SoftDeleteSerializer(serializers.ModelSerializer):
         abstract = True
 
 
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """Model serializer that can be limited to a subset of its fields"""
+    
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        
+        if fields:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
 class ChoiceField(serializers.ChoiceField):
     """Custom choice field that returns value instead of key"""
     
@@ -1,6 +1,13 @@
 import logging
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+from dateutil.relativedelta import relativedelta
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import models
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth, TruncQuarter
+from django.utils import timezone
 from celery import shared_task
 
 logger = logging.getLogger('altar_funds')
@@ -33,7 +40,7 @@ class NotificationService:
         """Send giving confirmation to member"""
         subject = f"Thank you for your gift of KES {amount}"
         message = f"""
-        Dear {member.full_name},
+        Dear {member.user.get_full_name()},
         
         Thank you for your generous gift of KES {amount}.
         Transaction ID: {transaction_id}
@@ -44,8 +51,8 @@ class NotificationService:
         """
         
         # Send email
-        if member.email:
-            send_email_notification.delay(subject, message, [member.email])
+        if member.user.email:
+            send_email_notification.delay(subject, message, [member.user.email])
     
     @staticmethod
     def send_payment_failure_notification(member, amount, error_message):
@@ -162,3 +169,238 @@ class AuditService:
             details=details,
             ip_address=ip_address or 'SYSTEM',
         )
+
+
+class OutboxService:
+    """
+    Runs outbox events in batches.
+    
+    Handlers are registered per topic with ``@OutboxService.handler(topic)``
+    and receive a list of payloads. A batch that fails is retried event by
+    event so one bad event does not hold back the rest; failing events are
+    retried with exponential backoff up to MAX_ATTEMPTS.
+    """
+    
+    BATCH_SIZE = 200
+    MAX_ATTEMPTS = 8
+    _handlers = {}
+    
+    @classmethod
+    def handler(cls, topic):
+        def register(func):
+            cls._handlers[topic] = func
+            return func
+        return register
+    
+    @classmethod
+    def drain(cls, batch_size=None, max_batches=50):
+        """Process due events until none are left (or max_batches is reached)"""
+        processed = 0
+        for _batch in range(max_batches):
+            count = cls._drain_batch(batch_size or cls.BATCH_SIZE)
+            if not count:
+                break
+            processed += count
+        return processed
+    
+    @classmethod
+    def _drain_batch(cls, batch_size):
+        from django.db import transaction
+        from common.models import OutboxEvent
+        
+        with transaction.atomic():
+            now = timezone.now()
+            events = list(
+                OutboxEvent.objects.select_for_update(skip_locked=True).filter(
+                    status='pending',
+                    available_at__lte=now
+                ).order_by('id')[:batch_size]
+            )
+            if not events:
+                return 0
+            
+            by_topic = {}
+            for event in events:
+                by_topic.setdefault(event.topic, []).append(event)
+            
+            for topic, topic_events in by_topic.items():
+                handler = cls._handlers.get(topic)
+                if handler is None:
+                    for event in topic_events:
+                        cls._mark_failed(event, f"No handler registered for topic '{topic}'", now)
+                    continue
+                
+                try:
+                    with transaction.atomic():
+                        handler([event.payload for event in topic_events])
+                    for event in topic_events:
+                        cls._mark_done(event, now)
+                except Exception:
+                    # Isolate the failing event(s)
+                    for event in topic_events:
+                        try:
+                            with transaction.atomic():
+                                handler([event.payload])
+                            cls._mark_done(event, now)
+                        except Exception as e:
+                            logger.error(f"Outbox event {event.pk} ({topic}) failed: {e}")
+                            cls._mark_failed(event, str(e), now)
+            
+            OutboxEvent.objects.bulk_update(
+                events,
+                ['status', 'attempts', 'available_at', 'processed_at', 'last_error', 'updated_at']
+            )
+        return len(events)
+    
+    @staticmethod
+    def _mark_done(event, now):
+        event.status = 'done'
+        event.attempts += 1
+        event.processed_at = now
+        event.last_error = ''
+        event.updated_at = now
+    
+    @classmethod
+    def _mark_failed(cls, event, error, now):
+        event.attempts += 1
+        event.last_error = error
+        event.updated_at = now
+        if event.attempts >= cls.MAX_ATTEMPTS:
+            event.status = 'failed'
+        else:
+            event.available_at = now + timedelta(seconds=30 * 2 ** (event.attempts - 1))
+
+
+@shared_task
+def drain_outbox():
+    """Run pending outbox events"""
+    return OutboxService.drain()
+
+
+@shared_task
+def purge_idempotency_keys():
+    """Delete stored Idempotency-Key responses past their TTL"""
+    from common.idempotency import purge_expired_idempotency_keys
+    return purge_expired_idempotency_keys()
+
+
+class TrendService:
+    """Service for gap-filled time series computed with a single grouped query"""
+    
+    GRANULARITIES = {
+        'day': TruncDay,
+        'week': TruncWeek,
+        'month': TruncMonth,
+        'quarter': TruncQuarter,
+        # Financial years are folded together from monthly buckets
+        'financial_year': TruncMonth,
+    }
+    
+    @staticmethod
+    def get_timezone():
+        """Get the zone buckets are cut in (Africa/Nairobi)"""
+        return ZoneInfo(settings.TIME_ZONE)
+    
+    @staticmethod
+    def bucket_start(value, granularity):
+        """Get the first day of the bucket a date falls in"""
+        if granularity == 'day':
+            return value
+        if granularity == 'week':
+            return value - timedelta(days=value.weekday())
+        if granularity == 'month':
+            return value.replace(day=1)
+        if granularity == 'quarter':
+            return value.replace(month=(value.month - 1) // 3 * 3 + 1, day=1)
+        if granularity == 'financial_year':
+            start_month = settings.FINANCIAL_YEAR_START_MONTH
+            year = value.year if value.month >= start_month else value.year - 1
+            return date(year, start_month, 1)
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    
+    @staticmethod
+    def shift(value, granularity, periods):
+        """Move a bucket start forwards or backwards by a number of periods"""
+        if granularity == 'day':
+            return value + timedelta(days=periods)
+        if granularity == 'week':
+            return value + timedelta(weeks=periods)
+        months = {'month': 1, 'quarter': 3, 'financial_year': 12}[granularity]
+        return value + relativedelta(months=months * periods)
+    
+    @staticmethod
+    def label(value, granularity):
+        """Get the display label of a bucket"""
+        if granularity == 'day':
+            return value.isoformat()
+        if granularity == 'week':
+            iso_year, iso_week, _ = value.isocalendar()
+            return f"{iso_year}-W{iso_week:02d}"
+        if granularity == 'month':
+            return value.strftime('%Y-%m')
+        if granularity == 'quarter':
+            return f"{value.year}-Q{(value.month - 1) // 3 + 1}"
+        if settings.FINANCIAL_YEAR_START_MONTH == 1:
+            return f"FY{value.year}"
+        return f"FY{value.year}/{(value.year + 1) % 100:02d}"
+    
+    @staticmethod
+    def series(queryset, date_field, granularity='month', start_date=None, end_date=None, aggregates=None):
+        """
+        Get aggregates per period between two dates, including empty periods.
+        
+        ``aggregates`` maps output keys to aggregate expressions and defaults
+        to a sum of ``amount`` and a row count. The date field may be a
+        DateField or a DateTimeField; datetimes are bucketed in local time.
+        
+        Financial years are added up from monthly rows, so they only accept
+        Sum and non-distinct Count aggregates and raise ValueError otherwise.
+        """
+        if granularity not in TrendService.GRANULARITIES:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        
+        aggregates = aggregates or {'total': Sum('amount'), 'count': Count('pk')}
+        if granularity == 'financial_year':
+            for name, expression in aggregates.items():
+                additive = isinstance(expression, (Sum, Count)) and not expression.distinct
+                if not additive:
+                    raise ValueError(f"Aggregate '{name}' cannot be summed across months into financial years")
+        end_date = end_date or timezone.localdate()
+        first = TrendService.bucket_start(start_date or end_date, granularity)
+        last = TrendService.bucket_start(end_date, granularity)
+        upper = TrendService.shift(last, granularity, 1)
+        
+        trunc = TrendService.GRANULARITIES[granularity]
+        field = queryset.model._meta.get_field(date_field)
+        if isinstance(field, models.DateTimeField):
+            tz = TrendService.get_timezone()
+            lower_bound = timezone.make_aware(datetime.combine(first, time.min), tz)
+            upper_bound = timezone.make_aware(datetime.combine(upper, time.min), tz)
+            bucket = trunc(date_field, output_field=models.DateField(), tzinfo=tz)
+        else:
+            lower_bound, upper_bound = first, upper
+            bucket = trunc(date_field)
+        
+        rows = queryset.filter(**{
+            f'{date_field}__gte': lower_bound,
+            f'{date_field}__lt': upper_bound,
+        }).annotate(bucket=bucket).values('bucket').annotate(**aggregates).order_by('bucket')
+        
+        totals = {}
+        for row in rows:
+            key = TrendService.bucket_start(row['bucket'], granularity)
+            bucket_totals = totals.setdefault(key, dict.fromkeys(aggregates, 0))
+            for name in aggregates:
+                bucket_totals[name] += row[name] or 0
+        
+        series = []
+        current = first
+        while current <= last:
+            series.append({
+                'period': TrendService.label(current, granularity),
+                'start_date': current,
+                **totals.get(current, dict.fromkeys(aggregates, 0)),
+            })
+            current = TrendService.shift(current, granularity, 1)
+        
+        return series
@@ -0,0 +1,289 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from .cache import ChurchDataCache
+from .idempotency import idempotent
+from .models import IdempotencyKey, OutboxEvent
+from .services import OutboxService, TrendService
+
+
+class ChurchDataCacheTests(TestCase):
+    """Versioned per-church cache entries must never come back once invalidated."""
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_bump_makes_entries_unreachable(self):
+        ChurchDataCache.get_or_compute(1, 'summary', lambda: 'old')
+        ChurchDataCache.bump_version(1)
+        self.assertEqual(ChurchDataCache.get_or_compute(1, 'summary', lambda: 'new'), 'new')
+    
+    def test_evicted_version_does_not_revive_old_entries(self):
+        ChurchDataCache.get_or_compute(1, 'summary', lambda: 'first')
+        ChurchDataCache.bump_version(1)
+        ChurchDataCache.get_or_compute(1, 'summary', lambda: 'second')
+        
+        # Losing the version key must not reuse any version written before
+        cache.delete(ChurchDataCache._version_key(1))
+        ChurchDataCache.bump_version(1)
+        self.assertEqual(ChurchDataCache.get_or_compute(1, 'summary', lambda: 'third'), 'third')
+        
+        cache.delete(ChurchDataCache._version_key(1))
+        self.assertEqual(ChurchDataCache.get_or_compute(1, 'summary', lambda: 'fourth'), 'fourth')
+
+
+class OutboxServiceTests(TestCase):
+    """Failed outbox events are retried with exponential backoff, then given up."""
+    
+    def setUp(self):
+        self.calls = []
+        self.failing = set()
+        OutboxService.handler('test.event')(self.handle)
+        self.addCleanup(OutboxService._handlers.pop, 'test.event')
+    
+    def handle(self, payloads):
+        self.calls.append([payload['n'] for payload in payloads])
+        if any(payload['n'] in self.failing for payload in payloads):
+            raise RuntimeError('handler failed')
+    
+    def test_failing_event_does_not_hold_back_the_batch(self):
+        ok, bad = OutboxEvent.publish('test.event', {'n': 1}), OutboxEvent.publish('test.event', {'n': 2})
+        self.failing = {2}
+        
+        OutboxService.drain()
+        
+        ok.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual(ok.status, 'done')
+        self.assertEqual(bad.status, 'pending')
+        self.assertEqual(bad.attempts, 1)
+        self.assertIn('handler failed', bad.last_error)
+        self.assertEqual(self.calls, [[1, 2], [1], [2]])
+    
+    def test_retries_back_off_until_given_up(self):
+        event = OutboxEvent.publish('test.event', {'n': 1})
+        self.failing = {1}
+        
+        delays = []
+        for attempt in range(OutboxService.MAX_ATTEMPTS):
+            before = timezone.now()
+            OutboxService.drain()
+            event.refresh_from_db()
+            self.assertEqual(event.attempts, attempt + 1)
+            if event.status == 'pending':
+                delays.append(round((event.available_at - before).total_seconds()))
+                # Not due yet, so another drain leaves it alone
+                self.assertEqual(OutboxService.drain(), 0)
+                OutboxEvent.objects.filter(pk=event.pk).update(available_at=before)
+        
+        self.assertEqual(event.status, 'failed')
+        self.assertEqual(delays, [30 * 2 ** n for n in range(OutboxService.MAX_ATTEMPTS - 1)])
+        self.assertEqual(OutboxService.drain(), 0)
+
+
+class IdempotencyKeyTests(TestCase):
+    """Repeated requests with the same Idempotency-Key run the view once."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user('giver@example.com', 'password', first_name='Giver', last_name='Test')
+        self.factory = APIRequestFactory()
+        self.calls = []
+        self.nested = None
+        
+        @api_view(['POST'])
+        @idempotent
+        def view(request):
+            self.calls.append(request.data)
+            if self.nested:
+                return self.nested()
+            if request.data.get('explode'):
+                raise RuntimeError('gateway down')
+            return Response({'id': len(self.calls)}, status=201)
+        
+        self.view = view
+    
+    def post(self, data, key='key-1'):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        request = self.factory.post('/api/giving/transactions/', data, format='json', **headers)
+        force_authenticate(request, user=self.user)
+        return self.view(request)
+    
+    def test_repeated_request_replays_the_stored_response(self):
+        first = self.post({'amount': '100'})
+        second = self.post({'amount': '100'})
+        
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual((second.status_code, second.data), (201, first.data))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+    
+    def test_requests_without_a_key_always_run(self):
+        self.post({'amount': '100'}, key=None)
+        self.post({'amount': '100'}, key=None)
+        self.assertEqual(len(self.calls), 2)
+    
+    def test_key_reused_for_a_different_request_is_rejected(self):
+        self.post({'amount': '100'})
+        response = self.post({'amount': '200'})
+        
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(len(self.calls), 1)
+    
+    def test_key_still_in_progress_conflicts(self):
+        # The repeat arrives while the first request is still inside the view
+        responses = []
+        
+        def repeat():
+            self.nested = None
+            responses.append(self.post({'amount': '100'}))
+            return Response({'id': 1}, status=201)
+        
+        self.nested = repeat
+        self.post({'amount': '100'})
+        
+        self.assertEqual(responses[0].status_code, 409)
+        self.assertEqual(len(self.calls), 1)
+    
+    def test_unhandled_error_releases_the_key(self):
+        with self.assertRaises(RuntimeError):
+            self.post({'amount': '100', 'explode': True})
+        self.assertFalse(IdempotencyKey.objects.exists())
+        
+        with self.assertRaises(RuntimeError):
+            self.post({'amount': '100', 'explode': True})
+        self.assertEqual(len(self.calls), 2)
+    
+    def test_abandoned_key_is_reclaimed_after_its_lease(self):
+        self.post({'amount': '100'})
+        # The worker died inside the view, leaving the key in progress
+        abandoned = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE + 1)
+        IdempotencyKey.objects.update(status='in_progress', response_status=None, created_at=abandoned)
+        
+        self.assertEqual(self.post({'amount': '200'}).status_code, 422)
+        response = self.post({'amount': '100'})
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.calls), 2)
+        record = IdempotencyKey.objects.get()
+        self.assertEqual((record.status, record.response_status), ('completed', 201))
+        self.assertGreater(record.created_at, abandoned)
+    
+    def test_key_within_its_lease_still_conflicts(self):
+        self.post({'amount': '100'})
+        IdempotencyKey.objects.update(status='in_progress', response_status=None)
+        
+        self.assertEqual(self.post({'amount': '100'}).status_code, 409)
+        self.assertEqual(len(self.calls), 1)
+    
+    def test_expired_key_is_treated_as_new(self):
+        self.post({'amount': '100'})
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        
+        response = self.post({'amount': '200'})
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.calls), 2)
+
+
+class TrendServiceTests(TestCase):
+    """Grouped trend buckets are gap-filled, labelled and cut in local time."""
+    
+    aggregates = {'total': Sum('attempts'), 'count': Count('pk')}
+    
+    def event(self, *args, attempts=1, tzinfo=None):
+        when = datetime(*args, tzinfo=tzinfo or TrendService.get_timezone())
+        return OutboxEvent.objects.create(topic='test.event', attempts=attempts, available_at=when)
+    
+    def series(self, granularity, start_date, end_date, aggregates=None):
+        return TrendService.series(
+            OutboxEvent.objects.all(),
+            'available_at',
+            granularity,
+            start_date=start_date,
+            end_date=end_date,
+            aggregates=aggregates or self.aggregates
+        )
+    
+    def test_empty_periods_are_filled_with_zeros(self):
+        self.event(2026, 3, 1, 9, 0, attempts=2)
+        self.event(2026, 3, 4, 18, 0, attempts=3)
+        
+        series = self.series('day', date(2026, 3, 1), date(2026, 3, 4))
+        
+        self.assertEqual([row['start_date'] for row in series], [date(2026, 3, day) for day in range(1, 5)])
+        self.assertEqual([row['period'] for row in series], ['2026-03-01', '2026-03-02', '2026-03-03', '2026-03-04'])
+        self.assertEqual([(row['total'], row['count']) for row in series], [(2, 1), (0, 0), (0, 0), (3, 1)])
+    
+    def test_weeks_start_on_monday_with_iso_labels(self):
+        self.event(2026, 3, 3, 10, 0)
+        self.event(2026, 3, 8, 23, 0)
+        self.event(2026, 3, 16, 0, 30)
+        
+        series = self.series('week', date(2026, 3, 4), date(2026, 3, 20))
+        
+        self.assertEqual(
+            [(row['period'], row['start_date'], row['count']) for row in series],
+            [
+                ('2026-W10', date(2026, 3, 2), 2),
+                ('2026-W11', date(2026, 3, 9), 0),
+                ('2026-W12', date(2026, 3, 16), 1),
+            ]
+        )
+    
+    def test_quarters(self):
+        self.event(2026, 2, 10, 12, 0)
+        self.event(2026, 8, 5, 12, 0)
+        
+        series = self.series('quarter', date(2026, 1, 1), date(2026, 9, 30))
+        
+        self.assertEqual(
+            [(row['period'], row['start_date'], row['count']) for row in series],
+            [('2026-Q1', date(2026, 1, 1), 1), ('2026-Q2', date(2026, 4, 1), 0), ('2026-Q3', date(2026, 7, 1), 1)]
+        )
+    
+    def test_financial_years_follow_the_configured_start_month(self):
+        self.event(2025, 6, 30, 12, 0, attempts=1)
+        self.event(2025, 7, 1, 12, 0, attempts=2)
+        self.event(2026, 2, 15, 12, 0, attempts=3)
+        
+        with override_settings(FINANCIAL_YEAR_START_MONTH=7):
+            series = self.series('financial_year', date(2025, 1, 1), date(2026, 5, 1))
+        
+        self.assertEqual(
+            [(row['period'], row['start_date'], row['total'], row['count']) for row in series],
+            [('FY2024/25', date(2024, 7, 1), 1, 1), ('FY2025/26', date(2025, 7, 1), 5, 2)]
+        )
+    
+    def test_calendar_financial_year_label(self):
+        self.event(2026, 5, 1, 12, 0)
+        
+        with override_settings(FINANCIAL_YEAR_START_MONTH=1):
+            series = self.series('financial_year', date(2026, 1, 1), date(2026, 12, 31))
+        
+        self.assertEqual([(row['period'], row['count']) for row in series], [('FY2026', 1)])
+    
+    def test_datetimes_are_bucketed_in_nairobi_time(self):
+        # 21:30 UTC on 31 March is 00:30 on 1 April in Nairobi
+        self.event(2026, 3, 31, 21, 30, tzinfo=dt_timezone.utc)
+        self.event(2026, 3, 31, 20, 30, tzinfo=dt_timezone.utc)
+        
+        series = self.series('month', date(2026, 3, 1), date(2026, 4, 30))
+        
+        self.assertEqual([(row['period'], row['count']) for row in series], [('2026-03', 1), ('2026-04', 1)])
+    
+    def test_financial_years_reject_non_additive_aggregates(self):
+        for aggregates in ({'largest': Max('attempts')}, {'topics': Count('topic', distinct=True)}):
+            with self.assertRaises(ValueError):
+                self.series('financial_year', date(2026, 1, 1), date(2026, 12, 31), aggregates)
+        
+        self.event(2026, 3, 1, 12, 0, attempts=4)
+        series = self.series('month', date(2026, 3, 1), date(2026, 3, 31), {'largest': Max('attempts')})
+        self.assertEqual(series[0]['largest'], 4)
@@ -7,6 +7,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
+from celery.schedules import crontab
+from corsheaders.defaults import default_headers
 
 # --------------------------------------------------
 # BASE CONFIG
@@ -252,6 +254,84 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+CELERY_BEAT_SCHEDULE = {
+    'drain-outbox': {
+        'task': 'common.services.drain_outbox',
+        'schedule': 10.0,
+    },
+    'generate-annual-giving-statements': {
+        'task': 'giving.tasks.generate_annual_statements',
+        'schedule': crontab(minute=0, hour=2, day_of_month=5, month_of_year=1),
+    },
+    'process-recurring-giving': {
+        'task': 'giving.tasks.process_recurring_giving',
+        'schedule': crontab(minute=15, hour=0),
+    },
+    'purge-idempotency-keys': {
+        'task': 'common.services.purge_idempotency_keys',
+        'schedule': crontab(minute=0, hour='*/6'),
+    },
+    'reconcile-giving-progress': {
+        'task': 'giving.tasks.reconcile_giving_progress',
+        'schedule': crontab(minute=30, hour=1),
+    },
+    'take-membership-snapshots': {
+        'task': 'accounts.tasks.take_membership_snapshots',
+        'schedule': crontab(minute=5, hour=0),
+    },
+    'take-platform-kpi-snapshot': {
+        'task': 'reports.tasks.take_platform_kpi_snapshot',
+        'schedule': crontab(minute='*/15'),
+    },
+}
+
+# Annual giving statements are rendered in chunks across a process pool;
+# one worker renders them in-process
+GIVING_STATEMENT_WORKERS = config('GIVING_STATEMENT_WORKERS', default=4, cast=int)
+GIVING_STATEMENT_CHUNK_SIZE = config('GIVING_STATEMENT_CHUNK_SIZE', default=500, cast=int)
+
+# Denomination reports aggregate churches in chunks across a thread pool
+DENOMINATION_REPORT_WORKERS = config('DENOMINATION_REPORT_WORKERS', default=4, cast=int)
+DENOMINATION_REPORT_CHUNK_SIZE = config('DENOMINATION_REPORT_CHUNK_SIZE', default=100, cast=int)
+
+# Smoothing factor of exponential-smoothing giving forecasts (0 < alpha < 1)
+GIVING_FORECAST_SMOOTHING = config('GIVING_FORECAST_SMOOTHING', default=0.3, cast=float)
+
+# Seconds a church's giving cohort matrix is kept; it is extended as months
+# close and rebuilt from scratch once it expires, picking up late refunds
+GIVING_COHORT_CACHE_TIMEOUT = config('GIVING_COHORT_CACHE_TIMEOUT', default=2678400, cast=int)
+
+# Heavy reports run on their own low-priority queue so they never hold up
+# payment tasks; serve it with e.g. `celery -A config worker -Q reports -c 1`
+REPORT_JOB_QUEUE = config('REPORT_JOB_QUEUE', default='reports')
+# Seconds a finished report is reused for an identical request
+REPORT_JOB_FRESHNESS = config('REPORT_JOB_FRESHNESS', default=900, cast=int)
+
+CELERY_TASK_ROUTES = {
+    'reports.tasks.run_report_job': {'queue': REPORT_JOB_QUEUE},
+}
+
+# --------------------------------------------------
+# CACHE
+# --------------------------------------------------
+
+# Local memory by default (and in tests); set CACHE_BACKEND and
+# CACHE_LOCATION to a shared backend such as Redis in production.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='altar-funds'),
+        'KEY_PREFIX': 'altar_funds',
+    }
+}
+
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=900, cast=int)
+
+# Seconds a response stored under an Idempotency-Key header can be replayed
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)
+# Seconds a claimed key may stay in progress before a retry may take it over
+IDEMPOTENCY_KEY_LEASE = config('IDEMPOTENCY_KEY_LEASE', default=300, cast=int)
+
 # --------------------------------------------------
 # CORS & CSRF
 # --------------------------------------------------
@@ -264,6 +344,8 @@ CORS_ALLOWED_ORIGINS = config(
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
 CSRF_TRUSTED_ORIGINS = config(
     'CSRF_TRUSTED_ORIGINS',
     default='http://localhost:3000,https://altarfunds.pythonanywhere.com',
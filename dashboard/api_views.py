@@ -5,12 +5,11 @@ from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta
 
-from giving.models import GivingTransaction, GivingCategory
+from giving.models import GivingTransaction, GivingCategory, GivingDailyRollup
 from expenses.models import Expense, ExpenseCategory
 from budgets.models import Budget
 from accounts.models import User, Member
-
-import calendar
+from common.services import TrendService
 
 
 @api_view(['GET'])
@@ -65,38 +64,38 @@ def financial_summary(request):
 def monthly_trend(request):
     """Get monthly income/expense trends"""
     user = request.user
-    now = timezone.now()
     
-    # Get last 12 months data
+    # Get last 12 calendar months, one grouped query per series
+    end_date = timezone.localdate()
+    start_date = TrendService.shift(TrendService.bucket_start(end_date, 'month'), 'month', -11)
+    
+    income_series = TrendService.series(
+        GivingDailyRollup.objects.all(),
+        'date',
+        'month',
+        start_date=start_date,
+        end_date=end_date,
+        aggregates={'total': Sum('total_amount')}
+    )
+    expense_series = TrendService.series(
+        Expense.objects.filter(status='approved'),
+        'date',
+        'month',
+        start_date=start_date,
+        end_date=end_date,
+        aggregates={'total': Sum('amount')}
+    )
+    
     monthly_data = []
-    for i in range(12):
-        month_date = now - timedelta(days=i*30)
-        month_start = month_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Get month end
-        _, last_day = calendar.monthrange(month_date.year, month_date.month)
-        month_end = month_date.replace(day=last_day, hour=23, minute=59, second=59, microsecond=999999)
-        
-        income = GivingTransaction.objects.filter(
-            transaction_date__gte=month_start,
-            transaction_date__lte=month_end,
-            status='completed'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        expenses = Expense.objects.filter(
-            date__gte=month_start,
-            date__lte=month_end,
-            status='approved'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
+    for income, expenses in zip(income_series, expense_series):
         monthly_data.append({
-            'month': month_date.strftime('%Y-%m'),
-            'income': income,
-            'expenses': expenses,
-            'balance': income - expenses
+            'month': income['period'],
+            'income': income['total'],
+            'expenses': expenses['total'],
+            'balance': income['total'] - expenses['total']
         })
     
-    return Response(list(reversed(monthly_data)))
+    return Response(monthly_data)
 
 
 @api_view(['GET'])
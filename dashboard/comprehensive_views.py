@@ -5,8 +5,9 @@ from django.db.models import Sum, Count
 from django.utils import timezone
 from datetime import timedelta
 
-from giving.models import GivingTransaction, GivingCategory
+from giving.models import GivingTransaction, GivingCategory, GivingDailyRollup
 from expenses.models import Expense
+from common.services import TrendService
 
 
 @api_view(['GET'])
@@ -33,47 +34,54 @@ def comprehensive_dashboard(request):
     
     church = user.church
     
-    # Financial Summary
-    total_income = GivingTransaction.objects.filter(
+    # Financial Summary (completed income comes from the daily rollup)
+    total_income = GivingDailyRollup.objects.filter(
         church=church
-    ).aggregate(total=Sum('amount'))['total'] or 0
+    ).aggregate(total=Sum('total_amount'))['total'] or 0
     
-    monthly_income = GivingTransaction.objects.filter(
+    monthly_income = GivingDailyRollup.objects.filter(
         church=church,
-        created_at__gte=timezone.now() - timedelta(days=30)
-    ).aggregate(total=Sum('amount'))['total'] or 0
+        date__gte=timezone.localdate() - timedelta(days=30)
+    ).aggregate(total=Sum('total_amount'))['total'] or 0
     
     total_expenses = Expense.objects.filter(
-        user__church=church
+        church=church
     ).aggregate(total=Sum('amount'))['total'] or 0
     
     monthly_expenses = Expense.objects.filter(
-        user__church=church,
+        church=church,
         date__gte=(timezone.now() - timedelta(days=30)).date()
     ).aggregate(total=Sum('amount'))['total'] or 0
     
-    # Monthly Trend (simplified for performance)
-    months = 6  # Reduced for better performance
+    # Monthly Trend over calendar months, one grouped query per series
+    months = 6
+    end_date = timezone.localdate()
+    start_date = TrendService.shift(TrendService.bucket_start(end_date, 'month'), 'month', -(months - 1))
+    
+    income_series = TrendService.series(
+        GivingDailyRollup.objects.filter(church=church),
+        'date',
+        'month',
+        start_date=start_date,
+        end_date=end_date,
+        aggregates={'total': Sum('total_amount')}
+    )
+    expense_series = TrendService.series(
+        Expense.objects.filter(church=church),
+        'date',
+        'month',
+        start_date=start_date,
+        end_date=end_date,
+        aggregates={'total': Sum('amount')}
+    )
+    
     trend_data = []
-    for i in range(months):
-        month_start = timezone.now() - timedelta(days=30 * (months - i - 1))
-        month_end = timezone.now() - timedelta(days=30 * (months - i - 2))
-        
-        income = GivingTransaction.objects.filter(
-            church=church,
-            created_at__range=[month_start, month_end]
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        expenses = Expense.objects.filter(
-            user__church=church,
-            date__range=[month_start.date(), month_end.date()]
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
+    for income, expenses in zip(income_series, expense_series):
         trend_data.append({
-            'month': month_start.strftime('%Y-%m'),
-            'income': income,
-            'expenses': expenses,
-            'net': income - expenses
+            'month': income['period'],
+            'income': income['total'],
+            'expenses': expenses['total'],
+            'net': income['total'] - expenses['total']
         })
     
     return Response({
@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from giving.models import GivingTransaction
+from expenses.models import Expense
+from budgets.models import Budget
+from accounts.models import Member
+from common.cache import ChurchDataCache
+import logging
+
+logger = logging.getLogger('altar_funds')
+
+
+@receiver([post_save, post_delete], sender=GivingTransaction)
+def giving_changed(sender, instance, **kwargs):
+    """Invalidate cached dashboards of the transaction's church"""
+    church_id = instance.church_id
+    # Bump after commit so readers cannot re-cache the pre-commit state
+    transaction.on_commit(lambda: ChurchDataCache.bump_version(church_id))
+
+
+@receiver([post_save, post_delete], sender=Expense)
+@receiver([post_save, post_delete], sender=Budget)
+def church_finances_changed(sender, instance, **kwargs):
+    """Invalidate cached dashboards of the expense or budget's church"""
+    church_id = instance.church_id
+    transaction.on_commit(lambda: ChurchDataCache.bump_version(church_id))
+
+
+@receiver([post_save, post_delete], sender=Member)
+def church_members_changed(sender, instance, **kwargs):
+    """Invalidate cached member counts when a member joins, leaves or changes status"""
+    church_id = instance.church_id
+    if church_id:
+        transaction.on_commit(lambda: ChurchDataCache.bump_version(church_id))
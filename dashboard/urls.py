@@ -4,7 +4,8 @@ from .views import (
     financial_summary,
     monthly_trend,
     income_breakdown,
-    expense_breakdown
+    expense_breakdown,
+    cache_stats
 )
 from .comprehensive_views import comprehensive_dashboard
 
@@ -20,4 +21,5 @@ urlpatterns = [
     path('income-breakdown/', income_breakdown, name='income_breakdown'),
     path('expense-breakdown/', expense_breakdown, name='expense_breakdown'),
     path('comprehensive/', comprehensive_dashboard, name='comprehensive_dashboard'),
+    path('cache-stats/', cache_stats, name='cache_stats'),
 ]
@@ -8,9 +8,23 @@ from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta
 
-from giving.models import GivingTransaction, GivingCategory
+from giving.models import GivingTransaction, GivingCategory, GivingDailyRollup
 from expenses.models import Expense
 from accounts.models import User
+from common.permissions import IsSystemAdmin
+from common.services import TrendService
+from common.cache import ChurchDataCache
+
+
+def _church_info(church):
+    """Church details returned alongside every dashboard payload."""
+    return {
+        'id': church.id,
+        'name': church.name,
+        'code': church.church_code,
+        'is_verified': church.is_verified,
+        'is_active': church.is_active
+    }
 
 @login_required
 def dashboard_view(request):
@@ -37,41 +51,50 @@ def financial_summary(request):
     
     church = user.church
     
-    # Calculate income (donations)
-    total_income = GivingTransaction.objects.filter(
+    # Rolling 30-day figures change with the date, so the day is part of the key
+    data = ChurchDataCache.get_or_compute(
+        church.id,
+        'financial_summary',
+        lambda: _financial_summary_data(church),
+        period=timezone.localdate().isoformat(),
+        role=user.role
+    )
+    
+    return Response({
+        **data,
+        'currency': 'KES',
+        'church': _church_info(church)
+    })
+
+def _financial_summary_data(church):
+    """Compute the cacheable part of the financial summary."""
+    # Calculate income (completed donations) from the daily rollup
+    total_income = GivingDailyRollup.objects.filter(
         church=church
-    ).aggregate(total=Sum('amount'))['total'] or 0
+    ).aggregate(total=Sum('total_amount'))['total'] or 0
     
-    monthly_income = GivingTransaction.objects.filter(
+    monthly_income = GivingDailyRollup.objects.filter(
         church=church,
-        created_at__gte=timezone.now() - timedelta(days=30)
-    ).aggregate(total=Sum('amount'))['total'] or 0
+        date__gte=timezone.localdate() - timedelta(days=30)
+    ).aggregate(total=Sum('total_amount'))['total'] or 0
     
     # Calculate expenses
     total_expenses = Expense.objects.filter(
-        user__church=church
+        church=church
     ).aggregate(total=Sum('amount'))['total'] or 0
     
     monthly_expenses = Expense.objects.filter(
-        user__church=church,
+        church=church,
         date__gte=(timezone.now() - timedelta(days=30)).date()
     ).aggregate(total=Sum('amount'))['total'] or 0
     
-    return Response({
+    return {
         'totalIncome': total_income,
         'monthlyIncome': monthly_income,
         'totalExpenses': total_expenses,
         'monthlyExpenses': monthly_expenses,
-        'netBalance': total_income - total_expenses,
-        'currency': 'KES',
-        'church': {
-            'id': church.id,
-            'name': church.name,
-            'code': church.church_code,
-            'is_verified': church.is_verified,
-            'is_active': church.is_active
-        }
-    })
+        'netBalance': total_income - total_expenses
+    }
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -90,27 +113,34 @@ def monthly_trend(request):
     
     church = user.church
     months = 12
+    end_date = timezone.localdate()
+    start_date = TrendService.shift(TrendService.bucket_start(end_date, 'month'), 'month', -(months - 1))
+    
+    # One grouped query per series over calendar months
+    income_series = TrendService.series(
+        GivingDailyRollup.objects.filter(church=church),
+        'date',
+        'month',
+        start_date=start_date,
+        end_date=end_date,
+        aggregates={'total': Sum('total_amount')}
+    )
+    expense_series = TrendService.series(
+        Expense.objects.filter(church=church),
+        'date',
+        'month',
+        start_date=start_date,
+        end_date=end_date,
+        aggregates={'total': Sum('amount')}
+    )
     
     trend_data = []
-    for i in range(months):
-        month_start = timezone.now() - timedelta(days=30 * (months - i - 1))
-        month_end = timezone.now() - timedelta(days=30 * (months - i - 2))
-        
-        income = GivingTransaction.objects.filter(
-            church=church,
-            created_at__range=[month_start, month_end]
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        expenses = Expense.objects.filter(
-            user__church=church,
-            date__range=[month_start.date(), month_end.date()]
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
+    for income, expenses in zip(income_series, expense_series):
         trend_data.append({
-            'month': month_start.strftime('%Y-%m'),
-            'income': income,
-            'expenses': expenses,
-            'net': income - expenses
+            'month': income['period'],
+            'income': income['total'],
+            'expenses': expenses['total'],
+            'net': income['total'] - expenses['total']
         })
     
     return Response({
@@ -141,34 +171,36 @@ def income_breakdown(request):
         }, status=200)
     
     church = user.church
-    categories = GivingCategory.objects.filter(church=church)
+    breakdown = ChurchDataCache.get_or_compute(
+        church.id,
+        'income_breakdown',
+        lambda: _income_breakdown_data(church),
+        role=user.role
+    )
+    
+    return Response({
+        'breakdown': breakdown,
+        'currency': 'KES',
+        'church': _church_info(church)
+    })
+
+def _income_breakdown_data(church):
+    """Compute the per-category income breakdown."""
+    # One annotated query instead of an aggregate per category
+    categories = list(GivingCategory.objects.filter(church=church).with_totals('all'))
     breakdown = []
+    church_total = sum(category.all_total for category in categories) or 1
     
     for category in categories:
-        total = GivingTransaction.objects.filter(
-            church=church,
-            category=category
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        total = category.all_total
         
         breakdown.append({
             'category': category.name,
             'amount': total,
-            'percentage': (total / max(1, GivingTransaction.objects.filter(
-                church=church
-            ).aggregate(total=Sum('amount'))['total'] or 1)) * 100
+            'percentage': (total / max(1, church_total)) * 100
         })
     
-    return Response({
-        'breakdown': breakdown,
-        'currency': 'KES',
-        'church': {
-            'id': church.id,
-            'name': church.name,
-            'code': church.church_code,
-            'is_verified': church.is_verified,
-            'is_active': church.is_active
-        }
-    })
+    return breakdown
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -186,14 +218,28 @@ def expense_breakdown(request):
         }, status=200)
     
     church = user.church
+    breakdown = ChurchDataCache.get_or_compute(
+        church.id,
+        'expense_breakdown',
+        lambda: _expense_breakdown_data(church),
+        role=user.role
+    )
     
+    return Response({
+        'breakdown': breakdown,
+        'currency': 'KES',
+        'church': _church_info(church)
+    })
+
+def _expense_breakdown_data(church):
+    """Compute the per-category expense breakdown."""
     # Group expenses by category - filter by users in the same church
-    expenses = Expense.objects.filter(user__church=church).values('category__name').annotate(
+    expenses = Expense.objects.filter(church=church).values('category__name').annotate(
         total=Sum('amount'),
         count=Count('id')
     ).order_by('-total')
     
-    total_expenses = Expense.objects.filter(user__church=church).aggregate(
+    total_expenses = Expense.objects.filter(church=church).aggregate(
         total=Sum('amount')
     )['total'] or 1
     
@@ -206,14 +252,10 @@ def expense_breakdown(request):
             'percentage': (expense['total'] / total_expenses) * 100
         })
     
-    return Response({
-        'breakdown': breakdown,
-        'currency': 'KES',
-        'church': {
-            'id': church.id,
-            'name': church.name,
-            'code': church.church_code,
-            'is_verified': church.is_verified,
-            'is_active': church.is_active
-        }
-    })
+    return breakdown
+
+@api_view(['GET'])
+@permission_classes([IsSystemAdmin])
+def cache_stats(request):
+    """Get dashboard cache hit and miss counters."""
+    return Response(ChurchDataCache.get_stats())
@@ -5,6 +5,7 @@ from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from giving.models import GivingTransaction, GivingCategory
 from accounts.models import User
+from common.pagination import KeysetPagination
 from rest_framework import serializers
 
 
@@ -20,6 +21,8 @@ class DonationListCreateView(generics.ListCreateAPIView):
     """List and create donations"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = DonationSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-transaction_date', '-id')
     
     def get_queryset(self):
         user = self.request.user
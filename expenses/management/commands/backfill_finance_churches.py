@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from accounts.models import User
+from budgets.models import Budget
+from expenses.models import Expense
+
+
+class Command(BaseCommand):
+    help = 'Copy the owning user\'s church onto expenses and budgets that have none'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows updated per statement'
+        )
+    
+    def handle(self, *args, **options):
+        for model in (Expense, Budget):
+            count = self.backfill(model, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Set church on {count} {model._meta.verbose_name_plural.lower()}'
+            ))
+    
+    def backfill(self, model, batch_size):
+        user_church = Subquery(
+            User.objects.filter(pk=OuterRef('user_id')).values('church_id')[:1]
+        )
+        pending = model.objects.filter(church__isnull=True, user__church__isnull=False)
+        
+        updated = 0
+        while True:
+            ids = list(pending.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return updated
+            
+            # Each batch commits on its own so a large table is not locked at once
+            with transaction.atomic():
+                updated += model.objects.filter(pk__in=ids).update(church_id=user_church)
@@ -25,10 +25,20 @@ class Expense(TimeStampedModel):
     ]
     
     user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='expenses')
+    # Copied from the submitting user so church aggregates need no join
+    church = models.ForeignKey(
+        'churches.Church',
+        on_delete=models.CASCADE,
+        related_name='expenses',
+        null=True,
+        blank=True
+    )
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     amount = models.DecimalField(max_digits=15, decimal_places=2)
     category = models.ForeignKey(ExpenseCategory, on_delete=models.CASCADE, related_name='expenses')
+    # Budget department this expense counts against, defaults to the category name
+    department = models.CharField(max_length=100, blank=True)
     date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     receipt = models.CharField(max_length=255, blank=True, null=True)
@@ -38,6 +48,22 @@ class Expense(TimeStampedModel):
         verbose_name = 'Expense'
         verbose_name_plural = 'Expenses'
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['church', 'status', 'date']),
+            models.Index(fields=['church', 'date']),
+            models.Index(fields=['status', 'date']),
+            models.Index(fields=['user', 'status', 'date']),
+            models.Index(fields=['date']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.amount}"
+    
+    @property
+    def budget_department(self):
+        return self.department or self.category.name
+    
+    def save(self, *args, **kwargs):
+        if self.church_id is None and self.user_id:
+            self.church_id = self.user.church_id
+        super().save(*args, **kwargs)
@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from budgets.services import BudgetSpendingService
+from common.cache import ChurchDataCache
+from .models import Expense
+
+
+class ExpenseApprovalService:
+    """Service for approving and rejecting expenses"""
+    
+    AMOUNT_LOCKED_MESSAGE = 'The amount can only be changed while the expense is pending'
+    
+    @staticmethod
+    def set_status(expenses, new_status):
+        """Move expenses to approved or rejected and update their budgets
+
+        Spending is added when an expense becomes approved and removed when an
+        approved expense is rejected, so repeating a call changes nothing.
+        """
+        with transaction.atomic():
+            changed = list(
+                expenses.exclude(status=new_status)
+                .select_related('category')
+                .select_for_update(of=('self',))
+            )
+            if not changed:
+                return []
+            
+            Expense.objects.filter(pk__in=[expense.pk for expense in changed]).update(
+                status=new_status,
+                updated_at=timezone.now()
+            )
+            
+            if new_status == 'approved':
+                BudgetSpendingService.apply(changed, 1)
+            else:
+                BudgetSpendingService.apply(
+                    [expense for expense in changed if expense.status == 'approved'],
+                    -1
+                )
+            
+            # update() skips the post_save handlers that invalidate dashboards
+            for church_id in {expense.church_id for expense in changed if expense.church_id}:
+                transaction.on_commit(lambda church_id=church_id: ChurchDataCache.bump_version(church_id))
+        
+        for expense in changed:
+            expense.status = new_status
+        return changed
+    
+    @staticmethod
+    def _lock(expense):
+        return Expense.objects.select_related('category').select_for_update(of=('self',)).get(pk=expense.pk)
+    
+    @staticmethod
+    def update(serializer):
+        """Save edits to an expense, moving an approved expense's spending to its new budgets
+
+        The amount is fixed once an expense has been approved or rejected.
+        """
+        with transaction.atomic():
+            # Save over the locked row so a concurrent approval is not undone
+            expense = ExpenseApprovalService._lock(serializer.instance)
+            # The serializer checked the status before the lock; an approval
+            # may have landed since
+            amount = serializer.validated_data.get('amount', expense.amount)
+            if expense.status != 'pending' and amount != expense.amount:
+                raise ValidationError({'amount': [ExpenseApprovalService.AMOUNT_LOCKED_MESSAGE]})
+            if expense.status == 'approved':
+                BudgetSpendingService.apply([expense], -1)
+            
+            serializer.instance = expense
+            expense = serializer.save()
+            if expense.status == 'approved':
+                BudgetSpendingService.apply([expense], 1)
+        return expense
+    
+    @staticmethod
+    def delete(expense):
+        """Delete an expense, removing its spending from its budgets if it was approved"""
+        with transaction.atomic():
+            expense = ExpenseApprovalService._lock(expense)
+            if expense.status == 'approved':
+                BudgetSpendingService.apply([expense], -1)
+            expense.delete()
@@ -3,13 +3,15 @@ from .views import (
     ExpenseListCreateView, 
     ExpenseDetailView,
     approve_expense,
-    reject_expense
+    reject_expense,
+    bulk_approve_expenses
 )
 
 app_name = 'expenses'
 
 urlpatterns = [
     path('', ExpenseListCreateView.as_view(), name='expense-list-create'),
+    path('bulk-approve/', bulk_approve_expenses, name='bulk_approve_expenses'),
     path('<int:pk>/', ExpenseDetailView.as_view(), name='expense-detail'),
     path('<int:pk>/approve/', approve_expense, name='approve_expense'),
     path('<int:pk>/reject/', reject_expense, name='reject_expense'),
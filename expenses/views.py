@@ -4,7 +4,11 @@ from rest_framework.response import Response
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from .models import Expense, ExpenseCategory
+from .services import ExpenseApprovalService
 from accounts.models import User
+from common.permissions import CanApproveExpenses
+
+BULK_APPROVE_LIMIT = 500
 
 
 class ExpenseListCreateView(generics.ListCreateAPIView):
@@ -36,6 +40,9 @@ class ExpenseListCreateView(generics.ListCreateAPIView):
         if self.request.method == 'POST':
             return ExpenseCreateSerializer
         return ExpenseSerializer
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user, church=self.request.user.church)
 
 
 class ExpenseDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -45,32 +52,78 @@ class ExpenseDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def get_queryset(self):
         return Expense.objects.filter(user=self.request.user)
+    
+    def get_serializer_class(self):
+        return ExpenseSerializer
+    
+    # Approved expenses count against budgets, so edits and deletions go
+    # through the approval service to keep spent amounts in step
+    def perform_update(self, serializer):
+        ExpenseApprovalService.update(serializer)
+    
+    def perform_destroy(self, instance):
+        ExpenseApprovalService.delete(instance)
+
+
+def _approvable_expenses(user):
+    """Expenses an approver may approve or reject: their own church's"""
+    expenses = Expense.objects.all()
+    if user.role != 'system_admin':
+        expenses = expenses.filter(church=user.church)
+    return expenses
 
 
 @api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
+@permission_classes([CanApproveExpenses])
 def approve_expense(request, pk):
     """Approve expense"""
-    try:
-        expense = Expense.objects.get(pk=pk, user=request.user)
-        expense.status = 'approved'
-        expense.save()
-        return Response({'message': 'Expense approved successfully'})
-    except Expense.DoesNotExist:
+    expenses = _approvable_expenses(request.user).filter(pk=pk)
+    if not expenses.exists():
         return Response({'error': 'Expense not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    ExpenseApprovalService.set_status(expenses, 'approved')
+    return Response({'message': 'Expense approved successfully'})
 
 
 @api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
+@permission_classes([CanApproveExpenses])
 def reject_expense(request, pk):
     """Reject expense"""
-    try:
-        expense = Expense.objects.get(pk=pk, user=request.user)
-        expense.status = 'rejected'
-        expense.save()
-        return Response({'message': 'Expense rejected successfully'})
-    except Expense.DoesNotExist:
+    expenses = _approvable_expenses(request.user).filter(pk=pk)
+    if not expenses.exists():
         return Response({'error': 'Expense not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    ExpenseApprovalService.set_status(expenses, 'rejected')
+    return Response({'message': 'Expense rejected successfully'})
+
+
+@api_view(['POST'])
+@permission_classes([CanApproveExpenses])
+def bulk_approve_expenses(request):
+    """Approve many expenses of the approver's church at once"""
+    ids = request.data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return Response({'error': 'ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > BULK_APPROVE_LIMIT:
+        return Response(
+            {'error': f'At most {BULK_APPROVE_LIMIT} expenses can be approved at once'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        ids = {int(pk) for pk in ids}
+    except (TypeError, ValueError):
+        return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    expenses = _approvable_expenses(request.user).filter(pk__in=ids)
+    approved = ExpenseApprovalService.set_status(expenses, 'approved')
+    approved_ids = sorted(expense.pk for expense in approved)
+    
+    return Response({
+        'message': f'{len(approved_ids)} expenses approved',
+        'approved': approved_ids,
+        'skipped': sorted(ids - set(approved_ids))
+    })
 
 
 # Simple serializers for now
@@ -88,9 +141,17 @@ class ExpenseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expense
         fields = '__all__'
+        # Status changes go through the approve/reject endpoints
+        read_only_fields = ['user', 'church', 'status']
+    
+    def validate_amount(self, value):
+        # Approved amounts are charged to budgets, so changing one needs a new expense
+        if self.instance and self.instance.status != 'pending' and value != self.instance.amount:
+            raise serializers.ValidationError(ExpenseApprovalService.AMOUNT_LOCKED_MESSAGE)
+        return value
 
 
 class ExpenseCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expense
-        fields = ['title', 'description', 'amount', 'category', 'date', 'receipt']
+        fields = ['title', 'description', 'amount', 'category', 'department', 'date', 'receipt']
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from giving.services import GivingLeaderboardService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly and yearly top-givers leaderboard from completed transactions'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Year to rebuild, defaults to the current year')
+        parser.add_argument('--church', type=int, help='Only rebuild this church ID')
+    
+    def handle(self, *args, **options):
+        year = options['year'] or timezone.localdate().year
+        
+        count = GivingLeaderboardService.rebuild(year, options['church'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} leaderboard entries for {year}'))
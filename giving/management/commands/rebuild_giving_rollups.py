@@ -0,0 +1,64 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from giving.services import GivingRollupService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or reconcile the daily giving rollup table for a date range'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to process (YYYY-MM-DD), defaults to 30 days ago')
+        parser.add_argument('--end', help='Last day to process (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--church', type=int, help='Only process this church ID')
+        parser.add_argument(
+            '--reconcile',
+            action='store_true',
+            help='Only repair buckets that differ from the raw transactions'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Report drift without writing anything'
+        )
+    
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start_date = self._parse(options['start'], today - timedelta(days=30))
+        end_date = self._parse(options['end'], today)
+        church_id = options['church']
+        
+        if start_date > end_date:
+            raise CommandError('--start must not be after --end')
+        
+        if options['check'] or options['reconcile']:
+            if options['check']:
+                drift = GivingRollupService.find_drift(start_date, end_date, church_id)
+            else:
+                drift = GivingRollupService.reconcile(start_date, end_date, church_id)
+            
+            for item in drift:
+                self.stdout.write(
+                    f"{item['key']}: stored {item['stored_total']} ({item['stored_count']}), "
+                    f"expected {item['expected_total']} ({item['expected_count']})"
+                )
+            
+            verb = 'Found' if options['check'] else 'Repaired'
+            self.stdout.write(self.style.SUCCESS(f'{verb} {len(drift)} drifted buckets'))
+            return
+        
+        count = GivingRollupService.rebuild(start_date, end_date, church_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} buckets from {start_date} to {end_date}'
+        ))
+    
+    def _parse(self, value, default):
+        if not value:
+            return default
+        
+        parsed = parse_date(value)
+        if not parsed:
+            raise CommandError(f'Invalid date: {value}')
+        return parsed
@@ -1,14 +1,65 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from common.models import TimeStampedModel, FinancialModel
 from common.validators import validate_amount
+from datetime import timedelta
 import uuid
 
 
+class GivingCategoryQuerySet(models.QuerySet):
+    """Queryset for giving categories"""
+    
+    PERIODS = ('month', 'year', 'all')
+    
+    def with_totals(self, period=None):
+        """
+        Annotate completed giving totals read from the daily rollup.
+        
+        Adds ``<period>_total`` for 'month', 'year' or 'all', or both
+        ``month_total`` and ``year_total`` when no period is given, using
+        conditional sums in a single grouped query.
+        """
+        from decimal import Decimal
+        from django.db.models import Q, Sum, Value
+        from django.db.models.functions import Coalesce
+        from django.utils import timezone
+        
+        periods = [period] if period else ['month', 'year']
+        today = timezone.localdate()
+        
+        annotations = {}
+        for name in periods:
+            if name not in self.PERIODS:
+                raise ValueError(f"Unknown period '{name}'")
+            
+            if name == 'month':
+                start = today.replace(day=1)
+                end = (start + timedelta(days=32)).replace(day=1)
+                condition = Q(daily_rollups__date__gte=start, daily_rollups__date__lt=end)
+            elif name == 'year':
+                condition = Q(daily_rollups__date__year=today.year)
+            else:
+                condition = None
+            
+            annotations[f'{name}_total'] = Coalesce(
+                Sum('daily_rollups__total_amount', filter=condition),
+                Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=15, decimal_places=2)
+            )
+        
+        # Meta.ordering is not applied to grouped queries, so keep it explicitly
+        queryset = self.annotate(**annotations)
+        if not queryset.query.order_by:
+            queryset = queryset.order_by(*self.model._meta.ordering)
+        return queryset
+
+
 class GivingCategory(TimeStampedModel):
     """Giving category model (Tithe, Offering, Building Fund, etc.)"""
     
+    objects = GivingCategoryQuerySet.as_manager()
+    
     name = models.CharField(_('Category Name'), max_length=100)
     description = models.TextField(_('Description'), blank=True)
     church = models.ForeignKey(
@@ -59,6 +110,11 @@ class GivingCategory(TimeStampedModel):
     def current_month_total(self):
         """Get total giving for current month"""
         from django.utils import timezone
+        
+        # Use the value annotated by GivingCategory.objects.with_totals() when present
+        if hasattr(self, 'month_total'):
+            return self.month_total
+        
         now = timezone.now()
         
         return self.giving_transactions.filter(
@@ -71,6 +127,10 @@ class GivingCategory(TimeStampedModel):
     def current_year_total(self):
         """Get total giving for current year"""
         from django.utils import timezone
+        
+        if hasattr(self, 'year_total'):
+            return self.year_total
+        
         now = timezone.now()
         
         return self.giving_transactions.filter(
@@ -222,6 +282,10 @@ class GivingTransaction(FinancialModel):
             models.Index(fields=['payment_method']),
             models.Index(fields=['transaction_date']),
             models.Index(fields=['payment_reference']),
+            models.Index(fields=['church', 'transaction_date', 'id']),
+            models.Index(fields=['member', 'transaction_date', 'id']),
+            models.Index(fields=['church', 'status', 'transaction_date']),
+            models.Index(fields=['member', 'status', 'transaction_date']),
         ]
     
     def __str__(self):
@@ -231,37 +295,26 @@ class GivingTransaction(FinancialModel):
         """Mark transaction as completed"""
         from django.utils import timezone
         
-        self.status = 'completed'
-        self.completed_date = timezone.now()
-        if payment_reference:
-            self.payment_reference = payment_reference
-        self.save()
-        
-        # Send confirmation notification
-        from common.services import NotificationService
-        NotificationService.send_giving_confirmation(
-            self.member,
-            self.amount,
-            str(self.transaction_id)
-        )
-        
-        # Update pledge if applicable
-        if self.pledge:
-            self.pledge.update_paid_amount()
-        
-        # Log completion
-        from common.services import AuditService
-        AuditService.log_financial_transaction(
-            user=self.created_by,
-            action='GIVING_COMPLETED',
-            amount=self.amount,
-            details={
-                'transaction_id': str(self.transaction_id),
-                'member': self.member.user.email,
-                'category': self.category.name,
-                'payment_method': self.payment_method
-            }
-        )
+        with transaction.atomic():
+            # Flip the status in SQL so a repeated callback is only counted once
+            newly_completed = GivingTransaction.objects.filter(
+                pk=self.pk
+            ).exclude(status='completed').update(status='completed')
+            
+            self.status = 'completed'
+            self.completed_date = timezone.now()
+            if payment_reference:
+                self.payment_reference = payment_reference
+            self.save()
+            
+            if newly_completed:
+                GivingDailyRollup.record(self, amount=self.amount, count=1)
+                GivingLeaderboardEntry.record(self, amount=self.amount, count=1)
+                
+                # Notification, audit log and pledge/campaign progress are run
+                # by the outbox worker (see giving.outbox)
+                from common.models import OutboxEvent
+                OutboxEvent.publish('giving.completed', {'giving_id': self.pk})
     
     def mark_failed(self, reason):
         """Mark transaction as failed"""
@@ -281,23 +334,34 @@ class GivingTransaction(FinancialModel):
         """Process refund"""
         from django.utils import timezone
         
-        self.status = 'refunded'
-        self.refund_amount = amount
-        self.refund_reason = reason
-        self.refund_date = timezone.now()
-        self.save()
-        
-        # Log refund
-        from common.services import AuditService
-        AuditService.log_financial_transaction(
-            user=self.updated_by,
-            action='GIVING_REFUND',
-            amount=amount,
-            details={
-                'original_transaction': str(self.transaction_id),
-                'reason': reason
-            }
-        )
+        with transaction.atomic():
+            was_completed = GivingTransaction.objects.filter(
+                pk=self.pk,
+                status='completed'
+            ).update(status='refunded')
+            
+            self.status = 'refunded'
+            self.refund_amount = amount
+            self.refund_reason = reason
+            self.refund_date = timezone.now()
+            self.save()
+            
+            # The whole gift leaves the completed totals; the refund is tracked separately
+            if was_completed:
+                GivingDailyRollup.record(
+                    self,
+                    amount=-self.amount,
+                    count=-1,
+                    refunded_amount=amount
+                )
+                GivingLeaderboardEntry.record(self, amount=-self.amount, count=-1)
+                
+                from common.models import OutboxEvent
+                OutboxEvent.publish('giving.refunded', {
+                    'giving_id': self.pk,
+                    'amount': str(amount),
+                    'reason': reason
+                })
 
 
 class RecurringGiving(FinancialModel):
@@ -394,6 +458,7 @@ class RecurringGiving(FinancialModel):
             models.Index(fields=['status']),
             models.Index(fields=['frequency']),
             models.Index(fields=['next_payment_date']),
+            models.Index(fields=['status', 'next_payment_date']),
         ]
     
     def __str__(self):
@@ -414,63 +479,85 @@ class RecurringGiving(FinancialModel):
         self.status = 'cancelled'
         self.save()
     
-    def update_next_payment_date(self):
-        """Update next payment date based on frequency"""
-        from datetime import timedelta, date
-        
-        current_date = self.next_payment_date
-        
-        if self.frequency == 'weekly':
-            self.next_payment_date = current_date + timedelta(weeks=1)
-        elif self.frequency == 'bi_weekly':
-            self.next_payment_date = current_date + timedelta(weeks=2)
-        elif self.frequency == 'monthly':
-            # Add one month
-            if current_date.month == 12:
-                self.next_payment_date = date(current_date.year + 1, 1, current_date.day)
-            else:
-                self.next_payment_date = date(current_date.year, current_date.month + 1, current_date.day)
-        elif self.frequency == 'quarterly':
-            self.next_payment_date = current_date + timedelta(weeks=13)
-        elif self.frequency == 'yearly':
-            self.next_payment_date = date(current_date.year + 1, current_date.month, current_date.day)
-        
-        self.save()
-    
-    def process_payment(self):
-        """Process recurring payment"""
-        from django.utils import timezone
+    @staticmethod
+    def calculate_next_payment_date(current_date, frequency, anchor_day):
+        """
+        Get the payment date one period after current_date.
         
-        if self.status != 'active':
-            return None
+        Monthly, quarterly and yearly schedules stay on the anchor day
+        (normally the start date's day), falling back to the last day of
+        shorter months, so a schedule started on the 31st pays on
+        28/29 Feb and then on 31 Mar again.
+        """
+        from datetime import timedelta
+        from dateutil.relativedelta import relativedelta
         
-        # Create transaction
-        transaction = GivingTransaction.objects.create(
-            member=self.member,
-            church=self.church,
-            category=self.category,
+        if frequency == 'weekly':
+            return current_date + timedelta(weeks=1)
+        if frequency == 'bi_weekly':
+            return current_date + timedelta(weeks=2)
+        if frequency == 'quarterly':
+            return current_date + relativedelta(months=3, day=anchor_day)
+        if frequency == 'yearly':
+            return current_date + relativedelta(years=1, day=anchor_day)
+        return current_date + relativedelta(months=1, day=anchor_day)
+    
+    def update_next_payment_date(self):
+        """Advance next payment date by one period based on frequency (not saved)"""
+        self.next_payment_date = RecurringGiving.calculate_next_payment_date(
+            self.next_payment_date,
+            self.frequency,
+            self.start_date.day
+        )
+    
+    def build_transaction(self, transaction_date):
+        """Build (without saving) the giving transaction for one recurring payment"""
+        return GivingTransaction(
+            member_id=self.member_id,
+            church_id=self.church_id,
+            category_id=self.category_id,
             transaction_type='recurring',
             amount=self.amount,
             payment_method=self.payment_method,
-            transaction_date=timezone.now().date(),
+            transaction_date=transaction_date,
             recurring_giving=self,
-            created_by=self.member.user
+            created_by_id=self.member.user_id,
+            updated_by_id=self.member.user_id
         )
+    
+    def record_payment(self, today=None):
+        """
+        Update statistics and schedule after a payment was created (not saved).
         
-        # Update statistics
+        Periods missed before ``today`` are skipped rather than charged, so a
+        schedule that fell behind gets one payment and its next payment date
+        moves to the first one after today.
+        """
         self.total_amount_given += self.amount
         self.total_transactions += 1
-        
-        # Update next payment date
         self.update_next_payment_date()
+        while today and self.next_payment_date <= today:
+            self.update_next_payment_date()
         
         # Check if end date reached
         if self.end_date and self.next_payment_date > self.end_date:
             self.status = 'completed'
+    
+    def process_payment(self):
+        """Process recurring payment"""
+        from django.utils import timezone
         
-        self.save()
+        if self.status != 'active':
+            return None
         
-        return transaction
+        with transaction.atomic():
+            giving = self.build_transaction(timezone.now())
+            giving.save()
+            
+            self.record_payment(timezone.localdate())
+            self.save()
+        
+        return giving
 
 
 class Pledge(TimeStampedModel):
@@ -586,8 +673,29 @@ class Pledge(TimeStampedModel):
             self.paid_amount < self.pledge_amount
         )
     
+    @classmethod
+    def apply_payment(cls, pledge_id, amount):
+        """
+        Atomically add a completed payment (or subtract a refund) and move the
+        status along with it. Conditions are evaluated on the pre-update row.
+        """
+        from django.db.models import Case, F, When
+        from django.utils import timezone
+        
+        cls.objects.filter(pk=pledge_id).update(
+            paid_amount=F('paid_amount') + amount,
+            status=Case(
+                When(status='cancelled', then=F('status')),
+                When(paid_amount__gte=F('pledge_amount') - amount, then=models.Value('fully_paid')),
+                When(paid_amount__gt=-amount, then=models.Value('partially_paid')),
+                When(end_date__lt=timezone.now().date(), then=models.Value('overdue')),
+                default=F('status'),
+            ),
+            updated_at=timezone.now()
+        )
+    
     def update_paid_amount(self):
-        """Update paid amount from transactions"""
+        """Recalculate paid amount from transactions (used to repair drift)"""
         total_paid = self.payments.filter(
             status='completed'
         ).aggregate(total=models.Sum('amount'))['total'] or 0
@@ -739,19 +847,39 @@ class GivingCampaign(TimeStampedModel):
             self.start_date <= now <= self.end_date
         )
     
+    @classmethod
+    def apply_contribution(cls, campaign_id, amount):
+        """Atomically add a completed contribution (or subtract a refund)"""
+        from django.db.models import F
+        from django.utils import timezone
+        
+        cls.objects.filter(pk=campaign_id).update(
+            current_amount=F('current_amount') + amount,
+            updated_at=timezone.now()
+        )
+    
     def update_current_amount(self):
-        """Update current amount from transactions"""
+        """Recalculate current amount from transactions (used to repair drift)"""
         total = self.transactions.filter(
-            status='completed'
-        ).aggregate(total=models.Sum('amount'))['total'] or 0
+            transaction__status='completed'
+        ).aggregate(total=models.Sum('allocated_amount'))['total'] or 0
         
         self.current_amount = total
         self.save()
     
-    def add_transaction(self, transaction):
+    def add_transaction(self, transaction, allocated_amount=None):
         """Add transaction to campaign"""
-        self.transactions.add(transaction)
-        self.update_current_amount()
+        allocated_amount = transaction.amount if allocated_amount is None else allocated_amount
+        GivingTransactionCampaign.objects.create(
+            transaction=transaction,
+            campaign=self,
+            allocated_amount=allocated_amount
+        )
+        
+        # Completed gifts count straight away; pending ones when they complete
+        if transaction.status == 'completed':
+            GivingCampaign.apply_contribution(self.pk, allocated_amount)
+            self.refresh_from_db(fields=['current_amount'])
 
 
 class GivingTransactionCampaign(models.Model):
@@ -783,3 +911,248 @@ class GivingTransactionCampaign(models.Model):
             models.Index(fields=['transaction']),
             models.Index(fields=['campaign']),
         ]
+
+
+def increment_counter(model, key, deltas):
+    """
+    Add ``{field: delta}`` to the counter row matching ``key``, creating it
+    with the deltas as its values if it does not exist yet.
+    """
+    from django.db.models import F
+    from django.utils import timezone
+    
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    changes['updated_at'] = timezone.now()
+    if model.objects.filter(**key).update(**changes):
+        return
+    
+    try:
+        with transaction.atomic():
+            model.objects.create(**deltas, **key)
+    except IntegrityError:
+        # Another writer created the row first
+        model.objects.filter(**key).update(**changes)
+
+
+def increment_counters(model, key_fields, increments, chunk_size=500):
+    """
+    Add deltas to many counter rows at once.
+    
+    ``increments`` maps key tuples (ordered like ``key_fields``) to
+    ``{field: delta}``. Missing rows are inserted first, ignoring ones another
+    writer already created, then each chunk of rows gets a single UPDATE
+    with a CASE per counter field.
+    """
+    from django.db.models import Case, F, When
+    from django.utils import timezone
+    
+    if not increments:
+        return
+    
+    model.objects.bulk_create(
+        [model(**dict(zip(key_fields, key))) for key in increments],
+        ignore_conflicts=True,
+        batch_size=1000
+    )
+    
+    filters = {
+        f'{field}__in': {key[index] for key in increments}
+        for index, field in enumerate(key_fields)
+    }
+    deltas_by_pk = {}
+    for row in model.objects.filter(**filters).values('pk', *key_fields):
+        key = tuple(row[field] for field in key_fields)
+        if key in increments:
+            deltas_by_pk[row['pk']] = increments[key]
+    
+    pks = list(deltas_by_pk)
+    fields = next(iter(increments.values())).keys()
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        changes = {
+            field: Case(
+                *[When(pk=pk, then=F(field) + deltas_by_pk[pk][field]) for pk in chunk],
+                default=F(field)
+            )
+            for field in fields
+        }
+        model.objects.filter(pk__in=chunk).update(updated_at=timezone.now(), **changes)
+
+
+class GivingDailyRollup(TimeStampedModel):
+    """Completed giving totals per church, category, payment method and day"""
+    
+    church = models.ForeignKey(
+        'churches.Church',
+        on_delete=models.CASCADE,
+        related_name='giving_rollups'
+    )
+    category = models.ForeignKey(
+        GivingCategory,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups'
+    )
+    payment_method = models.CharField(
+        _('Payment Method'),
+        max_length=20,
+        choices=GivingTransaction.PAYMENT_METHOD_CHOICES
+    )
+    date = models.DateField(_('Date'))
+    
+    # Totals of transactions currently in the completed state
+    total_amount = models.DecimalField(
+        _('Total Amount'),
+        max_digits=15,
+        decimal_places=2,
+        default=0
+    )
+    transaction_count = models.IntegerField(_('Transaction Count'), default=0)
+    refunded_amount = models.DecimalField(
+        _('Refunded Amount'),
+        max_digits=15,
+        decimal_places=2,
+        default=0
+    )
+    
+    class Meta:
+        db_table = 'giving_daily_rollups'
+        verbose_name = _('Giving Daily Rollup')
+        verbose_name_plural = _('Giving Daily Rollups')
+        ordering = ['-date']
+        unique_together = ['church', 'category', 'payment_method', 'date']
+        indexes = [
+            models.Index(fields=['church', 'date']),
+            models.Index(fields=['date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.church_id} - {self.category_id} - {self.date} - KES {self.total_amount}"
+    
+    @staticmethod
+    def bucket_date(value):
+        """Get the local (Africa/Nairobi) day a transaction date falls on"""
+        from datetime import datetime
+        from django.utils import timezone
+        
+        if isinstance(value, datetime):
+            if timezone.is_aware(value):
+                return timezone.localdate(value)
+            return value.date()
+        return value
+    
+    @classmethod
+    def bucket_key(cls, giving):
+        return {
+            'church_id': giving.church_id,
+            'category_id': giving.category_id,
+            'payment_method': giving.payment_method,
+            'date': cls.bucket_date(giving.transaction_date),
+        }
+    
+    @classmethod
+    def record(cls, giving, amount, count, refunded_amount=0):
+        """Apply a giving transaction's change to its daily bucket"""
+        increment_counter(cls, cls.bucket_key(giving), {
+            'total_amount': amount,
+            'transaction_count': count,
+            'refunded_amount': refunded_amount,
+        })
+    
+    @classmethod
+    def record_completed(cls, givings):
+        """Add a batch of newly completed transactions to their buckets in a few queries"""
+        key_fields = ('church_id', 'category_id', 'payment_method', 'date')
+        buckets = {}
+        for giving in givings:
+            key = tuple(cls.bucket_key(giving)[field] for field in key_fields)
+            bucket = buckets.setdefault(key, {'total_amount': 0, 'transaction_count': 0})
+            bucket['total_amount'] += giving.amount
+            bucket['transaction_count'] += 1
+        
+        increment_counters(cls, key_fields, buckets)
+
+
+class GivingLeaderboardEntry(TimeStampedModel):
+    """Completed giving totals per church, member and calendar period"""
+    
+    PERIOD_CHOICES = [
+        ('month', _('Month')),
+        ('year', _('Year')),
+    ]
+    
+    church = models.ForeignKey(
+        'churches.Church',
+        on_delete=models.CASCADE,
+        related_name='giving_leaderboard'
+    )
+    member = models.ForeignKey(
+        'accounts.Member',
+        on_delete=models.CASCADE,
+        related_name='giving_leaderboard'
+    )
+    period_type = models.CharField(_('Period Type'), max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField(_('Period Start'))
+    
+    total_amount = models.DecimalField(
+        _('Total Amount'),
+        max_digits=15,
+        decimal_places=2,
+        default=0
+    )
+    transaction_count = models.IntegerField(_('Transaction Count'), default=0)
+    
+    class Meta:
+        db_table = 'giving_leaderboard_entries'
+        verbose_name = _('Giving Leaderboard Entry')
+        verbose_name_plural = _('Giving Leaderboard Entries')
+        ordering = ['-total_amount']
+        unique_together = ['church', 'member', 'period_type', 'period_start']
+        indexes = [
+            models.Index(fields=['church', 'period_type', 'period_start', '-total_amount']),
+            models.Index(fields=['period_type', 'period_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.church_id} - {self.member_id} - {self.period_start} - KES {self.total_amount}"
+    
+    @staticmethod
+    def period_start_for(day, period_type):
+        """Get the first day of the period a local date falls in"""
+        if period_type == 'year':
+            return day.replace(month=1, day=1)
+        return day.replace(day=1)
+    
+    @classmethod
+    def entry_keys(cls, giving):
+        day = GivingDailyRollup.bucket_date(giving.transaction_date)
+        return [
+            {
+                'church_id': giving.church_id,
+                'member_id': giving.member_id,
+                'period_type': period_type,
+                'period_start': cls.period_start_for(day, period_type),
+            }
+            for period_type, _label in cls.PERIOD_CHOICES
+        ]
+    
+    @classmethod
+    def record(cls, giving, amount, count):
+        """Apply a giving transaction's change to its monthly and yearly entries"""
+        for key in cls.entry_keys(giving):
+            increment_counter(cls, key, {'total_amount': amount, 'transaction_count': count})
+    
+    @classmethod
+    def record_completed(cls, givings):
+        """Add a batch of newly completed transactions to their entries in a few queries"""
+        key_fields = ('church_id', 'member_id', 'period_type', 'period_start')
+        entries = {}
+        for giving in givings:
+            for key in cls.entry_keys(giving):
+                entry = entries.setdefault(
+                    tuple(key[field] for field in key_fields),
+                    {'total_amount': 0, 'transaction_count': 0}
+                )
+                entry['total_amount'] += giving.amount
+                entry['transaction_count'] += 1
+        
+        increment_counters(cls, key_fields, entries)
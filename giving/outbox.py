@@ -0,0 +1,92 @@
+from decimal import Decimal
+from functools import partial
+from django.db import transaction
+from common.services import OutboxService, NotificationService
+from .models import GivingTransaction, GivingTransactionCampaign, Pledge, GivingCampaign
+
+
+def apply_progress(givings, sign):
+    """Add (sign=1) or remove (sign=-1) gifts from their pledges and campaigns, once per target"""
+    pledge_totals = {}
+    for giving in givings:
+        if giving.pledge_id:
+            pledge_totals[giving.pledge_id] = pledge_totals.get(giving.pledge_id, Decimal('0.00')) + giving.amount
+    
+    campaign_totals = {}
+    allocations = GivingTransactionCampaign.objects.filter(
+        transaction__in=givings
+    ).values_list('campaign_id', 'allocated_amount')
+    for campaign_id, allocated_amount in allocations:
+        campaign_totals[campaign_id] = campaign_totals.get(campaign_id, Decimal('0.00')) + allocated_amount
+    
+    for pledge_id, total in pledge_totals.items():
+        Pledge.apply_payment(pledge_id, sign * total)
+    for campaign_id, total in campaign_totals.items():
+        GivingCampaign.apply_contribution(campaign_id, sign * total)
+
+
+@OutboxService.handler('giving.completed')
+def giving_completed(payloads):
+    """Progress, confirmation and audit log for newly completed gifts"""
+    from audit.models import AuditLog
+    
+    givings = list(
+        GivingTransaction.objects.filter(
+            pk__in=[payload['giving_id'] for payload in payloads]
+        ).select_related('member__user', 'category')
+    )
+    
+    apply_progress(givings, 1)
+    
+    # Queue the confirmations only once this batch has committed: a batch that
+    # fails is retried event by event, and the callbacks of the failed attempt
+    # are dropped with it, so nobody is thanked twice. robust=True keeps a
+    # broker outage from failing the progress and audit work.
+    for giving in givings:
+        transaction.on_commit(
+            partial(
+                NotificationService.send_giving_confirmation,
+                giving.member,
+                giving.amount,
+                str(giving.transaction_id)
+            ),
+            robust=True
+        )
+    
+    AuditLog.objects.bulk_create([
+        AuditLog(
+            user_id=giving.created_by_id,
+            action='GIVING_COMPLETED',
+            amount=giving.amount,
+            details={
+                'transaction_id': str(giving.transaction_id),
+                'member': giving.member.user.email,
+                'category': giving.category.name,
+                'payment_method': giving.payment_method
+            }
+        )
+        for giving in givings
+    ])
+
+
+@OutboxService.handler('giving.refunded')
+def giving_refunded(payloads):
+    """Progress reversal and audit log for refunded gifts"""
+    from audit.models import AuditLog
+    
+    givings = GivingTransaction.objects.in_bulk([payload['giving_id'] for payload in payloads])
+    
+    apply_progress([givings[payload['giving_id']] for payload in payloads], -1)
+    
+    AuditLog.objects.bulk_create([
+        AuditLog(
+            user_id=givings[payload['giving_id']].updated_by_id,
+            action='GIVING_REFUND',
+            amount=Decimal(payload['amount']),
+            details={
+                'original_transaction': str(givings[payload['giving_id']].transaction_id),
+                'reason': payload['reason']
+            }
+        )
+        for payload in payloads
+    ])
@@ -1,12 +1,16 @@
 from rest_framework import serializers
+from common.serializers import DynamicFieldsModelSerializer
 from .models import GivingCategory, GivingTransaction, RecurringGiving, Pledge, GivingCampaign
 
 class GivingCategorySerializer(serializers.ModelSerializer):
+    current_month_total = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
+    current_year_total = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
+    
     class Meta:
         model = GivingCategory
         fields = '__all__'
 
-class GivingTransactionSerializer(serializers.ModelSerializer):
+class GivingTransactionSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = GivingTransaction
         fields = '__all__'
@@ -0,0 +1,822 @@
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncDate, TruncMonth, TruncYear
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .models import (
+    GivingTransaction, GivingDailyRollup, GivingLeaderboardEntry,
+    GivingTransactionCampaign, Pledge, GivingCampaign, RecurringGiving
+)
+
+logger = logging.getLogger('altar_funds')
+
+
+class GivingRollupService:
+    """Service for maintaining the daily giving rollup table"""
+    
+    ROLLUP_KEY = ('church_id', 'category_id', 'payment_method', 'date')
+    
+    @staticmethod
+    def day_range(start_date, end_date):
+        """Get the aware datetime bounds covering the local days in the range"""
+        from datetime import datetime, time, timedelta
+        
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+        end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+        return start, end
+    
+    @staticmethod
+    def compute(start_date, end_date, church_id=None):
+        """Aggregate completed giving from the raw table into rollup buckets"""
+        start, end = GivingRollupService.day_range(start_date, end_date)
+        
+        givings = GivingTransaction.objects.filter(
+            status='completed',
+            transaction_date__gte=start,
+            transaction_date__lt=end
+        )
+        if church_id:
+            givings = givings.filter(church_id=church_id)
+        
+        rows = givings.annotate(
+            date=TruncDate('transaction_date', tzinfo=timezone.get_current_timezone())
+        ).values(
+            'church_id', 'category_id', 'payment_method', 'date'
+        ).annotate(
+            total=Sum('amount'),
+            count=Count('id')
+        ).order_by()
+        
+        return {
+            tuple(row[field] for field in GivingRollupService.ROLLUP_KEY): (row['total'], row['count'])
+            for row in rows
+        }
+    
+    @staticmethod
+    def stored(start_date, end_date, church_id=None):
+        """Get the rollup buckets currently stored for the range"""
+        rollups = GivingDailyRollup.objects.filter(date__gte=start_date, date__lte=end_date)
+        if church_id:
+            rollups = rollups.filter(church_id=church_id)
+        
+        return {
+            tuple(getattr(rollup, field) for field in GivingRollupService.ROLLUP_KEY): rollup
+            for rollup in rollups
+        }
+    
+    @staticmethod
+    def find_drift(start_date, end_date, church_id=None):
+        """Compare stored buckets against the raw table and list mismatches"""
+        expected = GivingRollupService.compute(start_date, end_date, church_id)
+        stored = GivingRollupService.stored(start_date, end_date, church_id)
+        
+        drift = []
+        for key in set(expected) | set(stored):
+            total, count = expected.get(key, (Decimal('0.00'), 0))
+            rollup = stored.get(key)
+            stored_total = rollup.total_amount if rollup else Decimal('0.00')
+            stored_count = rollup.transaction_count if rollup else 0
+            
+            if total != stored_total or count != stored_count:
+                drift.append({
+                    'key': dict(zip(GivingRollupService.ROLLUP_KEY, key)),
+                    'expected_total': total,
+                    'expected_count': count,
+                    'stored_total': stored_total,
+                    'stored_count': stored_count,
+                })
+        
+        return drift
+    
+    @staticmethod
+    @transaction.atomic
+    def reconcile(start_date, end_date, church_id=None):
+        """Repair drifted buckets in place, keeping refund totals"""
+        drift = GivingRollupService.find_drift(start_date, end_date, church_id)
+        
+        for item in drift:
+            GivingDailyRollup.objects.update_or_create(
+                **item['key'],
+                defaults={
+                    'total_amount': item['expected_total'],
+                    'transaction_count': item['expected_count'],
+                }
+            )
+        
+        if drift:
+            logger.warning(
+                f"Reconciled {len(drift)} giving rollup buckets between {start_date} and {end_date}"
+            )
+        return drift
+    
+    @staticmethod
+    @transaction.atomic
+    def rebuild(start_date, end_date, church_id=None):
+        """Replace the rollup buckets for the range with freshly computed ones"""
+        expected = GivingRollupService.compute(start_date, end_date, church_id)
+        start, end = GivingRollupService.day_range(start_date, end_date)
+        
+        refunds = GivingTransaction.objects.filter(
+            status='refunded',
+            refund_amount__isnull=False,
+            transaction_date__gte=start,
+            transaction_date__lt=end
+        )
+        if church_id:
+            refunds = refunds.filter(church_id=church_id)
+        refund_rows = refunds.annotate(
+            date=TruncDate('transaction_date', tzinfo=timezone.get_current_timezone())
+        ).values(
+            'church_id', 'category_id', 'payment_method', 'date'
+        ).annotate(
+            refunded=Sum('refund_amount')
+        ).order_by()
+        refunded = {
+            tuple(row[field] for field in GivingRollupService.ROLLUP_KEY): row['refunded']
+            for row in refund_rows
+        }
+        
+        stale = GivingDailyRollup.objects.filter(date__gte=start_date, date__lte=end_date)
+        if church_id:
+            stale = stale.filter(church_id=church_id)
+        stale.delete()
+        
+        rollups = []
+        for key in set(expected) | set(refunded):
+            total, count = expected.get(key, (Decimal('0.00'), 0))
+            rollups.append(GivingDailyRollup(
+                total_amount=total,
+                transaction_count=count,
+                refunded_amount=refunded.get(key, Decimal('0.00')),
+                **dict(zip(GivingRollupService.ROLLUP_KEY, key))
+            ))
+        GivingDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+        
+        logger.info(
+            f"Rebuilt {len(rollups)} giving rollup buckets between {start_date} and {end_date}"
+        )
+        return len(rollups)
+
+
+class GivingLeaderboardService:
+    """Service for reading and rebuilding the top-givers leaderboard"""
+    
+    TRUNCATE = {
+        'month': TruncMonth,
+        'year': TruncYear,
+    }
+    
+    @staticmethod
+    def top(entries, limit=10):
+        """
+        Get the top givers from a filtered set of leaderboard entries.
+        
+        Entries are summed per member, so one member's totals in several
+        churches collapse into a single row.
+        """
+        rows = entries.values(
+            'member_id', 'member__user__first_name', 'member__user__last_name'
+        ).annotate(
+            total=Sum('total_amount'),
+            count=Sum('transaction_count')
+        ).filter(
+            count__gt=0
+        ).order_by('-total', 'member_id')[:limit]
+        
+        return [
+            {
+                'member_id': row['member_id'],
+                'name': f"{row['member__user__first_name']} {row['member__user__last_name']}",
+                'total': row['total'],
+                'count': row['count'],
+            }
+            for row in rows
+        ]
+    
+    @staticmethod
+    @transaction.atomic
+    def rebuild(year, church_id=None):
+        """Replace a year's monthly and yearly entries with freshly computed ones"""
+        start, end = GivingRollupService.day_range(date(year, 1, 1), date(year, 12, 31))
+        
+        givings = GivingTransaction.objects.filter(
+            status='completed',
+            transaction_date__gte=start,
+            transaction_date__lt=end
+        )
+        stale = GivingLeaderboardEntry.objects.filter(period_start__year=year)
+        if church_id:
+            givings = givings.filter(church_id=church_id)
+            stale = stale.filter(church_id=church_id)
+        stale.delete()
+        
+        entries = []
+        for period_type, trunc in GivingLeaderboardService.TRUNCATE.items():
+            rows = givings.annotate(
+                period_start=trunc('transaction_date', tzinfo=timezone.get_current_timezone())
+            ).values(
+                'church_id', 'member_id', 'period_start'
+            ).annotate(
+                total=Sum('amount'),
+                count=Count('id')
+            ).order_by()
+            
+            for row in rows:
+                entries.append(GivingLeaderboardEntry(
+                    church_id=row['church_id'],
+                    member_id=row['member_id'],
+                    period_type=period_type,
+                    period_start=GivingDailyRollup.bucket_date(row['period_start']),
+                    total_amount=row['total'],
+                    transaction_count=row['count'],
+                ))
+        GivingLeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+        
+        logger.info(f"Rebuilt {len(entries)} giving leaderboard entries for {year}")
+        return len(entries)
+
+
+class GivingProgressService:
+    """
+    Service for checking pledge and campaign progress counters against transactions.
+    
+    Progress is applied by the giving outbox handlers, so a gift can already be
+    completed (or refunded) while its event still waits to be drained. Pledges
+    and campaigns with such gifts are left alone until the event has run;
+    correcting them now would count the gift twice.
+    """
+    
+    PROGRESS_TOPICS = ('giving.completed', 'giving.refunded')
+    
+    @staticmethod
+    def expected_totals(pledge_ids=None, campaign_ids=None):
+        """Completed gift totals by pledge and by campaign"""
+        paid = GivingTransaction.objects.filter(status='completed', pledge__isnull=False)
+        raised = GivingTransactionCampaign.objects.filter(transaction__status='completed')
+        if pledge_ids is not None:
+            paid = paid.filter(pledge_id__in=pledge_ids)
+        if campaign_ids is not None:
+            raised = raised.filter(campaign_id__in=campaign_ids)
+        
+        return (
+            dict(paid.values('pledge_id').annotate(
+                total=Sum('amount')
+            ).order_by().values_list('pledge_id', 'total')),
+            dict(raised.values('campaign_id').annotate(
+                total=Sum('allocated_amount')
+            ).order_by().values_list('campaign_id', 'total'))
+        )
+    
+    @staticmethod
+    def pending_targets():
+        """Pledges and campaigns with gifts whose progress event has not run yet"""
+        from common.models import OutboxEvent
+        
+        giving_ids = [
+            payload['giving_id']
+            for payload in OutboxEvent.objects.filter(
+                topic__in=GivingProgressService.PROGRESS_TOPICS,
+                status='pending'
+            ).values_list('payload', flat=True)
+        ]
+        if not giving_ids:
+            return set(), set()
+        
+        pledge_ids = set(
+            GivingTransaction.objects.filter(
+                pk__in=giving_ids,
+                pledge__isnull=False
+            ).values_list('pledge_id', flat=True)
+        )
+        campaign_ids = set(
+            GivingTransactionCampaign.objects.filter(
+                transaction_id__in=giving_ids
+            ).values_list('campaign_id', flat=True)
+        )
+        return pledge_ids, campaign_ids
+    
+    @staticmethod
+    def _drift(pledges, campaigns, pledge_ids=None, campaign_ids=None):
+        """
+        Compare stored progress with the gifts. Totals are read before the
+        pending events, so a gift completed in between is either left out of
+        both or seen as pending.
+        """
+        paid, raised = GivingProgressService.expected_totals(pledge_ids, campaign_ids)
+        pending_pledges, pending_campaigns = GivingProgressService.pending_targets()
+        
+        drift = {'pledges': [], 'campaigns': []}
+        for pledge in pledges:
+            expected = paid.get(pledge['id'], Decimal('0.00'))
+            if expected != pledge['paid_amount'] and pledge['id'] not in pending_pledges:
+                drift['pledges'].append({**pledge, 'stored': pledge['paid_amount'], 'expected': expected})
+        for campaign in campaigns:
+            expected = raised.get(campaign['id'], Decimal('0.00'))
+            if expected != campaign['current_amount'] and campaign['id'] not in pending_campaigns:
+                drift['campaigns'].append({**campaign, 'stored': campaign['current_amount'], 'expected': expected})
+        return drift
+    
+    @staticmethod
+    def find_drift():
+        """List pledges and campaigns whose stored progress differs from their settled gifts"""
+        return GivingProgressService._drift(
+            Pledge.objects.values('id', 'paid_amount'),
+            GivingCampaign.objects.values('id', 'current_amount')
+        )
+    
+    @staticmethod
+    def pledge_status(pledge, paid_amount, today):
+        """Status of a pledge with the given paid amount, as Pledge.update_paid_amount sets it"""
+        if pledge['status'] == 'cancelled':
+            return pledge['status']
+        if paid_amount >= pledge['pledge_amount']:
+            return 'fully_paid'
+        if paid_amount > 0:
+            return 'partially_paid'
+        if pledge['end_date'] < today:
+            return 'overdue'
+        return pledge['status']
+    
+    @staticmethod
+    def reconcile():
+        """Reset every drifted pledge and campaign from its transactions"""
+        candidates = GivingProgressService.find_drift()
+        pledge_ids = [item['id'] for item in candidates['pledges']]
+        campaign_ids = [item['id'] for item in candidates['campaigns']]
+        if not pledge_ids and not campaign_ids:
+            return candidates
+        
+        now = timezone.now()
+        with transaction.atomic():
+            # Hold the rows so the outbox worker cannot apply progress meanwhile,
+            # then check again under the lock
+            drift = GivingProgressService._drift(
+                Pledge.objects.select_for_update().filter(id__in=pledge_ids).values(
+                    'id', 'paid_amount', 'pledge_amount', 'status', 'end_date'
+                ),
+                GivingCampaign.objects.select_for_update().filter(id__in=campaign_ids).values(
+                    'id', 'current_amount'
+                ),
+                pledge_ids,
+                campaign_ids
+            )
+            
+            # Each write only applies if the stored amount is still the one checked
+            for item in drift['pledges']:
+                Pledge.objects.filter(pk=item['id'], paid_amount=item['stored']).update(
+                    paid_amount=item['expected'],
+                    status=GivingProgressService.pledge_status(item, item['expected'], now.date()),
+                    updated_at=now
+                )
+            for item in drift['campaigns']:
+                GivingCampaign.objects.filter(pk=item['id'], current_amount=item['stored']).update(
+                    current_amount=item['expected'],
+                    updated_at=now
+                )
+        
+        if drift['pledges'] or drift['campaigns']:
+            logger.warning(
+                f"Reconciled {len(drift['pledges'])} pledges and {len(drift['campaigns'])} campaigns"
+            )
+        return drift
+
+
+class RecurringGivingService:
+    """Service for running due recurring giving schedules in batches"""
+    
+    CHUNK_SIZE = 500
+    
+    @staticmethod
+    def process_due(today=None, chunk_size=None):
+        """
+        Create the transactions for every schedule due on or before today.
+        
+        Schedules are claimed chunk by chunk with SELECT ... FOR UPDATE SKIP
+        LOCKED, so several workers can run this at once without charging a
+        schedule twice. Each due schedule is charged once per run, however
+        many periods it missed; see RecurringGiving.record_payment.
+        """
+        today = today or timezone.localdate()
+        chunk_size = chunk_size or RecurringGivingService.CHUNK_SIZE
+        
+        processed = 0
+        while True:
+            count = RecurringGivingService._process_chunk(today, chunk_size)
+            if count is None:
+                # Another worker took part of this chunk first, pick again
+                continue
+            if not count:
+                break
+            processed += count
+        
+        if processed:
+            logger.info(f"Processed {processed} recurring giving payments due by {today}")
+        return processed
+    
+    @staticmethod
+    def _process_chunk(today, chunk_size):
+        from common.cache import ChurchDataCache
+        
+        with transaction.atomic():
+            schedules = list(
+                RecurringGiving.objects.select_for_update(
+                    skip_locked=True,
+                    of=('self',)
+                ).select_related(
+                    'member'
+                ).filter(
+                    status='active',
+                    next_payment_date__lte=today
+                ).order_by('next_payment_date', 'id')[:chunk_size]
+            )
+            if not schedules:
+                return 0
+            
+            now = timezone.now()
+            givings = []
+            for schedule in schedules:
+                givings.append(schedule.build_transaction(now))
+                schedule.record_payment(today)
+                schedule.updated_at = now
+            
+            # Backends without SKIP LOCKED (SQLite ignores FOR UPDATE entirely)
+            # can hand the same schedules to two workers. Only write schedules
+            # that are still due: one already charged today is past today now.
+            claimed = RecurringGiving.objects.filter(
+                status='active',
+                next_payment_date__lte=today
+            ).bulk_update(
+                schedules,
+                ['next_payment_date', 'total_amount_given', 'total_transactions', 'status', 'updated_at'],
+                batch_size=1000
+            )
+            if claimed != len(schedules):
+                transaction.set_rollback(True)
+                return None
+            
+            GivingTransaction.objects.bulk_create(givings, batch_size=1000)
+            
+            # bulk_create skips the post_save handlers that invalidate dashboards
+            for church_id in {schedule.church_id for schedule in schedules}:
+                transaction.on_commit(lambda church_id=church_id: ChurchDataCache.bump_version(church_id))
+        
+        return len(schedules)
+
+
+class EnvelopeImportService:
+    """Service for importing batches of cash and cheque envelopes"""
+    
+    MAX_ROWS = 5000
+    PAYMENT_METHODS = {value for value, _label in GivingTransaction.PAYMENT_METHOD_CHOICES}
+    
+    @staticmethod
+    def parse_csv(content):
+        """Read envelope rows from CSV text with a header row"""
+        reader = csv.DictReader(io.StringIO(content))
+        return [
+            {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+            for row in reader
+        ]
+    
+    @staticmethod
+    def validate(church, rows, default_date):
+        """
+        Check every envelope against lookup maps loaded once for the batch.
+        
+        Returns the cleaned envelopes and a list of per-row errors (rows are
+        numbered from 1).
+        """
+        from accounts.models import Member
+        from common.validators import validate_amount
+        from django.core.exceptions import ValidationError
+        from django.utils.dateparse import parse_date
+        
+        def ids(field):
+            return {str(row.get(field)).strip() for row in rows if str(row.get(field) or '').strip().isdigit()}
+        
+        member_numbers = {str(row.get('member_number') or '').strip() for row in rows}
+        members = dict(
+            Member.objects.filter(
+                church=church,
+                membership_number__in=member_numbers
+            ).values_list('membership_number', 'id')
+        )
+        # Numeric values are category IDs, anything else a name, so a category
+        # named like another's ID cannot shadow it
+        categories_by_id = {}
+        categories_by_name = {}
+        for category_id, name in church.giving_categories.filter(is_active=True).values_list('id', 'name'):
+            categories_by_id[str(category_id)] = category_id
+            categories_by_name[name.lower()] = category_id
+        pledges = dict(
+            Pledge.objects.filter(church=church, id__in=ids('pledge')).values_list('id', 'member_id')
+        )
+        campaigns = set(
+            GivingCampaign.objects.filter(church=church, id__in=ids('campaign')).values_list('id', flat=True)
+        )
+        
+        envelopes = []
+        errors = []
+        for number, row in enumerate(rows, start=1):
+            row_errors = {}
+            
+            member_id = members.get(str(row.get('member_number') or '').strip())
+            if not member_id:
+                row_errors['member_number'] = 'Unknown member number'
+            
+            category = str(row.get('category') or '').strip()
+            if category.isdigit():
+                category_id = categories_by_id.get(category)
+            else:
+                category_id = categories_by_name.get(category.lower())
+            if not category_id:
+                row_errors['category'] = 'Unknown or inactive category'
+            
+            amount = None
+            try:
+                validate_amount(row.get('amount'))
+                amount = Decimal(str(row.get('amount'))).quantize(Decimal('0.01'))
+            except (ValidationError, ArithmeticError) as e:
+                row_errors['amount'] = e.messages[0] if isinstance(e, ValidationError) else 'Enter a valid amount'
+            
+            method = str(row.get('method') or 'cash').strip().lower()
+            if method not in EnvelopeImportService.PAYMENT_METHODS:
+                row_errors['method'] = f"Unknown payment method '{method}'"
+            
+            given_on = default_date
+            if row.get('date'):
+                # parse_date returns None for a bad format and raises for
+                # impossible dates such as 2026-02-30
+                try:
+                    given_on = parse_date(str(row['date']).strip())
+                except ValueError:
+                    given_on = None
+                if not given_on:
+                    row_errors['date'] = 'Enter a date as YYYY-MM-DD'
+            
+            pledge_id = None
+            if row.get('pledge'):
+                pledge_id = int(row['pledge']) if str(row['pledge']).strip().isdigit() else None
+                if pledge_id not in pledges or (member_id and pledges[pledge_id] != member_id):
+                    row_errors['pledge'] = "Pledge not found for this member"
+            
+            campaign_id = None
+            if row.get('campaign'):
+                campaign_id = int(row['campaign']) if str(row['campaign']).strip().isdigit() else None
+                if campaign_id not in campaigns:
+                    row_errors['campaign'] = 'Campaign not found'
+            
+            if row_errors:
+                errors.append({'row': number, 'errors': row_errors})
+                continue
+            
+            envelopes.append({
+                'member_id': member_id,
+                'category_id': category_id,
+                'amount': amount,
+                'payment_method': method,
+                'date': given_on,
+                'pledge_id': pledge_id,
+                'campaign_id': campaign_id,
+                'payment_reference': str(row.get('reference') or '').strip(),
+                'notes': str(row.get('note') or '').strip(),
+            })
+        return envelopes, errors
+    
+    @staticmethod
+    def import_batch(church, user, rows, default_date=None):
+        """
+        Validate and insert a batch of envelopes as completed gifts.
+        
+        Nothing is written unless every row is valid, so a corrected batch can
+        be resubmitted without creating duplicates. Rollups and leaderboards
+        are updated once per batch; pledge and campaign progress, the
+        confirmation and the audit log follow through the outbox, as for any
+        other completed gift.
+        """
+        from datetime import datetime, time
+        from common.cache import ChurchDataCache
+        from common.models import OutboxEvent
+        
+        default_date = default_date or timezone.localdate()
+        envelopes, errors = EnvelopeImportService.validate(church, rows, default_date)
+        if errors:
+            return {'created': 0, 'total_amount': Decimal('0.00'), 'errors': errors}
+        
+        now = timezone.now()
+        tz = timezone.get_current_timezone()
+        givings = [
+            GivingTransaction(
+                member_id=envelope['member_id'],
+                church=church,
+                category_id=envelope['category_id'],
+                transaction_type='pledge_payment' if envelope['pledge_id'] else 'one_time',
+                amount=envelope['amount'],
+                payment_method=envelope['payment_method'],
+                payment_reference=envelope['payment_reference'],
+                status='completed',
+                transaction_date=timezone.make_aware(datetime.combine(envelope['date'], time.min), tz),
+                completed_date=now,
+                pledge_id=envelope['pledge_id'],
+                notes=envelope['notes'],
+                created_by=user,
+                updated_by=user
+            )
+            for envelope in envelopes
+        ]
+        
+        with transaction.atomic():
+            GivingTransaction.objects.bulk_create(givings, batch_size=1000)
+            
+            # Derived totals, one write per bucket rather than per envelope
+            GivingDailyRollup.record_completed(givings)
+            GivingLeaderboardEntry.record_completed(givings)
+            
+            GivingTransactionCampaign.objects.bulk_create([
+                GivingTransactionCampaign(
+                    transaction=giving,
+                    campaign_id=envelope['campaign_id'],
+                    allocated_amount=giving.amount
+                )
+                for giving, envelope in zip(givings, envelopes)
+                if envelope['campaign_id']
+            ], batch_size=1000)
+            
+            OutboxEvent.objects.bulk_create([
+                OutboxEvent(topic='giving.completed', payload={'giving_id': giving.pk})
+                for giving in givings
+            ], batch_size=1000)
+            
+            # bulk_create skips the post_save handlers that invalidate dashboards
+            transaction.on_commit(lambda: ChurchDataCache.bump_version(church.id))
+        
+        total_amount = sum((giving.amount for giving in givings), Decimal('0.00'))
+        logger.info(f"Imported {len(givings)} envelopes (KES {total_amount}) for church {church.id}")
+        return {'created': len(givings), 'total_amount': total_amount, 'errors': []}
+
+
+def _write_statement_chunk(statements):
+    """
+    Render and write one chunk of annual statements.
+    
+    Runs inside pool workers, so it only takes plain data and never touches
+    the database. Returns the manifest entries for the chunk.
+    """
+    entries = []
+    for statement in statements:
+        directory = os.path.join(settings.MEDIA_ROOT, statement['directory'])
+        os.makedirs(directory, exist_ok=True)
+        
+        html_path = os.path.join(statement['directory'], f"{statement['file_stem']}.html")
+        with open(os.path.join(settings.MEDIA_ROOT, html_path), 'w', encoding='utf-8') as html_file:
+            html_file.write(render_to_string('giving/annual_statement.html', statement))
+        
+        csv_path = os.path.join(statement['directory'], f"{statement['file_stem']}.csv")
+        with open(os.path.join(settings.MEDIA_ROOT, csv_path), 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['Year', 'Church', 'Member Number', 'Member Name', 'Category', 'Gifts', 'Amount (KES)'])
+            for line in statement['lines']:
+                writer.writerow([
+                    statement['year'], statement['church']['name'], statement['member']['membership_number'],
+                    statement['member']['name'], line['category'], line['count'], line['total']
+                ])
+            writer.writerow([
+                statement['year'], statement['church']['name'], statement['member']['membership_number'],
+                statement['member']['name'], 'Total', statement['count'], statement['total']
+            ])
+        
+        entries.append({
+            'member_id': statement['member']['id'],
+            'membership_number': statement['member']['membership_number'],
+            'name': statement['member']['name'],
+            'total': statement['total'],
+            'html': html_path,
+            'csv': csv_path,
+        })
+    return entries
+
+
+class GivingStatementService:
+    """Service for generating year-end statements of tax-deductible giving"""
+    
+    @staticmethod
+    def statement_directory(year, church):
+        return os.path.join('statements', str(year), church.church_code or str(church.id))
+    
+    @staticmethod
+    def build_statements(year, church):
+        """Collect the per-member statement data for a church in one grouped query"""
+        from accounts.models import Member
+        
+        start, end = GivingRollupService.day_range(date(year, 1, 1), date(year, 12, 31))
+        rows = GivingTransaction.objects.filter(
+            church=church,
+            status='completed',
+            category__is_tax_deductible=True,
+            transaction_date__gte=start,
+            transaction_date__lt=end
+        ).values(
+            'member_id', 'category__name'
+        ).annotate(
+            total=Sum('amount'),
+            count=Count('id')
+        ).order_by('member_id', 'category__name')
+        
+        lines_by_member = {}
+        for row in rows:
+            lines_by_member.setdefault(row['member_id'], []).append({
+                'category': row['category__name'],
+                'total': str(row['total'].quantize(Decimal('0.01'))),
+                'count': row['count'],
+            })
+        
+        members = Member.objects.filter(id__in=lines_by_member).values(
+            'id', 'membership_number', 'kra_pin', 'user__first_name', 'user__last_name', 'user__email'
+        )
+        
+        directory = GivingStatementService.statement_directory(year, church)
+        church_data = {
+            'id': church.id,
+            'name': church.name,
+            'code': church.church_code,
+            'address': ', '.join(filter(None, [church.address_line1, church.address_line2, church.city, church.county])),
+            'registration_number': church.registration_number,
+        }
+        issued_on = timezone.localdate().isoformat()
+        
+        statements = []
+        for member in members:
+            lines = lines_by_member[member['id']]
+            statements.append({
+                'year': year,
+                'issued_on': issued_on,
+                'church': church_data,
+                'member': {
+                    'id': member['id'],
+                    'membership_number': member['membership_number'] or '',
+                    'name': f"{member['user__first_name']} {member['user__last_name']}".strip(),
+                    'email': member['user__email'],
+                    'kra_pin': member['kra_pin'],
+                },
+                'lines': lines,
+                'total': str(sum(Decimal(line['total']) for line in lines).quantize(Decimal('0.01'))),
+                'count': sum(line['count'] for line in lines),
+                'directory': directory,
+                'file_stem': f"statement-{member['id']}",
+            })
+        return statements
+    
+    @staticmethod
+    def generate_for_church(year, church, workers=None, chunk_size=None):
+        """Render all of a church's statements and write their manifest
+
+        A single worker renders every chunk in this process, without a pool.
+        """
+        workers = settings.GIVING_STATEMENT_WORKERS if workers is None else workers
+        chunk_size = chunk_size or settings.GIVING_STATEMENT_CHUNK_SIZE
+        
+        statements = GivingStatementService.build_statements(year, church)
+        chunks = [statements[i:i + chunk_size] for i in range(0, len(statements), chunk_size)]
+        
+        # Pool workers cannot be started from daemonic processes, so render
+        # inline there, with a single worker and when there is only one chunk
+        if workers > 1 and len(chunks) > 1 and not multiprocessing.current_process().daemon:
+            # Forked workers must not share the parent's database connections
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(chunks)),
+                mp_context=multiprocessing.get_context('fork')
+            ) as pool:
+                results = list(pool.map(_write_statement_chunk, chunks))
+        else:
+            results = [_write_statement_chunk(chunk) for chunk in chunks]
+        
+        entries = [entry for result in results for entry in result]
+        manifest = {
+            'year': year,
+            'church': {'id': church.id, 'name': church.name, 'code': church.church_code},
+            'generated_at': timezone.now().isoformat(),
+            'statement_count': len(entries),
+            'total': str(sum((Decimal(entry['total']) for entry in entries), Decimal('0.00'))),
+            'statements': entries,
+        }
+        
+        directory = os.path.join(settings.MEDIA_ROOT, GivingStatementService.statement_directory(year, church))
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, 'manifest.json')
+        with open(manifest_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        
+        logger.info(f"Generated {len(entries)} {year} giving statements for church {church.id}")
+        return manifest_path
@@ -0,0 +1,52 @@
+import logging
+from celery import shared_task
+from django.utils import timezone
+
+logger = logging.getLogger('altar_funds')
+
+
+@shared_task
+def generate_annual_statements(year=None, church_id=None):
+    """Queue year-end giving statements for one church or every active church"""
+    from churches.models import Church
+    
+    # Default to the year that has just closed
+    year = year or timezone.localdate().year - 1
+    
+    churches = Church.objects.filter(is_active=True)
+    if church_id:
+        churches = churches.filter(id=church_id)
+    
+    church_ids = list(churches.values_list('id', flat=True))
+    for church_pk in church_ids:
+        generate_church_statements.delay(year, church_pk)
+    
+    logger.info(f"Queued {year} giving statements for {len(church_ids)} churches")
+    return len(church_ids)
+
+
+@shared_task
+def generate_church_statements(year, church_id):
+    """Render one church's year-end giving statements to MEDIA_ROOT"""
+    from churches.models import Church
+    from .services import GivingStatementService
+    
+    church = Church.objects.get(id=church_id)
+    return GivingStatementService.generate_for_church(year, church)
+
+
+@shared_task
+def reconcile_giving_progress():
+    """Repair pledge and campaign progress counters that drifted from their gifts"""
+    from .services import GivingProgressService
+    
+    drift = GivingProgressService.reconcile()
+    return {'pledges': len(drift['pledges']), 'campaigns': len(drift['campaigns'])}
+
+
+@shared_task
+def process_recurring_giving():
+    """Create the payments for all recurring giving schedules that are due"""
+    from .services import RecurringGivingService
+    
+    return RecurringGivingService.process_due()
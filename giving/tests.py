@@ -0,0 +1,683 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from itertools import count
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Member, User
+from audit.models import AuditLog
+from churches.models import Church
+from common.models import OutboxEvent
+from common.services import OutboxService
+from .models import (
+    GivingCategory, GivingDailyRollup, GivingLeaderboardEntry, GivingTransaction, Pledge, RecurringGiving
+)
+from .services import (
+    GivingLeaderboardService, GivingProgressService, GivingRollupService, GivingStatementService,
+    RecurringGivingService
+)
+
+_sequence = count(1)
+
+
+class GivingTestCase(TestCase):
+    """Shared builders for giving tests."""
+    
+    def create_church(self, **kwargs):
+        number = next(_sequence)
+        fields = {
+            'name': f'Church {number}',
+            'church_code': f'T{number:04d}',
+            'phone_number': '+254700000000',
+            'email': f'church{number}@example.com',
+            'address_line1': 'Moi Avenue',
+            'city': 'Nairobi',
+            'county': 'Nairobi',
+            'senior_pastor_name': 'Pastor',
+            'status': 'verified',
+        }
+        fields.update(kwargs)
+        return Church.objects.create(**fields)
+    
+    def create_user(self, church, role='member', **kwargs):
+        number = next(_sequence)
+        return User.objects.create_user(
+            f'user{number}@example.com',
+            'password',
+            first_name=f'User{number}',
+            last_name='Test',
+            role=role,
+            church=church,
+            **kwargs
+        )
+    
+    def create_member(self, church, **kwargs):
+        return Member.objects.create(user=self.create_user(church), church=church, **kwargs)
+    
+    def create_category(self, church, name='Tithe', **kwargs):
+        return GivingCategory.objects.create(church=church, name=name, **kwargs)
+    
+    def create_giving(self, member, category, amount='100.00', status='pending', when=None, **kwargs):
+        return GivingTransaction.objects.create(
+            member=member,
+            church=member.church,
+            category=category,
+            amount=Decimal(amount),
+            status=status,
+            transaction_date=when or timezone.now(),
+            created_by=member.user,
+            updated_by=member.user,
+            **kwargs
+        )
+    
+    def complete(self, amount='100.00', **kwargs):
+        giving = self.create_giving(self.member, self.category, amount, **kwargs)
+        giving.mark_completed()
+        return giving
+    
+    def create_pledge(self, amount='1000.00', **kwargs):
+        fields = {
+            'member': self.member,
+            'church': self.church,
+            'category': self.category,
+            'pledge_amount': Decimal(amount),
+            'pledge_date': date(2026, 1, 1),
+            'start_date': date(2026, 1, 1),
+            'end_date': date(2030, 12, 31),
+            'title': 'Building fund',
+        }
+        fields.update(kwargs)
+        return Pledge.objects.create(**fields)
+    
+    def local(self, *args):
+        return timezone.make_aware(datetime(*args))
+
+
+class GivingExportTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church)
+        self.client = APIClient()
+        self.client.force_authenticate(self.create_user(self.church, role='treasurer'))
+        self.url = f'/api/giving/church/{self.church.id}/export.csv'
+    
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode().splitlines()[1:]
+    
+    def test_end_date_includes_the_whole_day(self):
+        self.create_giving(self.member, self.category, status='completed', when=self.local(2026, 3, 31, 23, 30))
+        self.create_giving(self.member, self.category, status='completed', when=self.local(2026, 4, 1, 0, 0))
+        
+        rows = self.export(start_date='2026-03-31', end_date='2026-03-31')
+        self.assertEqual(len(rows), 1)
+        self.assertTrue(rows[0].startswith('2026-03-31T23:30'))
+    
+    def test_invalid_dates_are_rejected(self):
+        for value in ('garbage', '2026-02-30'):
+            response = self.client.get(self.url, {'start_date': value})
+            self.assertEqual(response.status_code, 400, value)
+
+
+class GivingCursorPaginationTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church)
+        self.client = APIClient()
+        self.client.force_authenticate(self.create_user(self.church, role='treasurer'))
+    
+    def test_pages_cover_every_row_once(self):
+        # Several gifts share a timestamp so pages must break ties by id
+        when = self.local(2026, 5, 3, 10, 0)
+        created = {
+            self.create_giving(self.member, self.category, when=when if number % 2 else None).id
+            for number in range(7)
+        }
+        
+        seen = []
+        url = '/api/giving/transactions-list/?page_size=3&include_total=true'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['estimated_total'], 7)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['links']['next']
+        
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(set(seen), created)
+    
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/giving/transactions-list/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class GivingHistoryTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church)
+        self.client = APIClient()
+        self.client.force_authenticate(self.member.user)
+        
+        for amount in ('10.00', '20.00', '30.00', '40.00', '50.50'):
+            self.create_giving(self.member, self.category, amount)
+        self.create_giving(self.create_member(self.church), self.category, '999.00')
+    
+    def test_fields_trim_each_row_and_totals_cover_every_page(self):
+        amounts, pages = [], 0
+        url = '/api/giving/transactions-list/history/?page_size=2&fields=amount,category,not_a_field'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.data['data']
+            self.assertEqual((data['total_given'], data['transaction_count']), (150.5, 5))
+            for row in data['givings']:
+                self.assertEqual(set(row), {'amount', 'category'})
+                amounts.append(row['amount'])
+            url = data['links']['next']
+            pages += 1
+        
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(amounts), ['10.00', '20.00', '30.00', '40.00', '50.50'])
+    
+    def test_without_fields_rows_are_complete(self):
+        response = self.client.get('/api/giving/transactions-list/history/')
+        
+        row = response.data['data']['givings'][0]
+        self.assertTrue({'id', 'amount', 'category', 'transaction_date', 'status'} <= set(row))
+
+
+class GivingOutboxTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church)
+    
+    def test_confirmation_is_sent_once_when_a_batch_is_retried(self):
+        good, bad = self.complete(), self.complete()
+        
+        bulk_create = AuditLog.objects.bulk_create
+        
+        # The audit log is written after the confirmations are queued
+        def fail_on_bad(logs):
+            if any(log.details['transaction_id'] == str(bad.transaction_id) for log in logs):
+                raise RuntimeError('audit failed')
+            return bulk_create(logs)
+        
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=fail_on_bad), \
+                mock.patch('giving.outbox.NotificationService') as notifications:
+            with self.captureOnCommitCallbacks(execute=True):
+                OutboxService.drain()
+        
+        notifications.send_giving_confirmation.assert_called_once_with(
+            good.member, good.amount, str(good.transaction_id)
+        )
+        self.assertEqual(OutboxEvent.objects.get(payload__giving_id=good.pk).status, 'done')
+        self.assertEqual(OutboxEvent.objects.get(payload__giving_id=bad.pk).status, 'pending')
+    
+    def test_notification_errors_do_not_hold_back_progress(self):
+        pledge = self.create_pledge()
+        self.complete(pledge=pledge)
+        
+        with mock.patch('giving.outbox.NotificationService') as notifications:
+            notifications.send_giving_confirmation.side_effect = ConnectionError('broker down')
+            with self.captureOnCommitCallbacks() as callbacks:
+                OutboxService.drain()
+        
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(OutboxEvent.objects.exclude(status='done').exists())
+        self.assertTrue(AuditLog.objects.filter(action='GIVING_COMPLETED').exists())
+        pledge.refresh_from_db()
+        self.assertEqual(pledge.paid_amount, Decimal('100.00'))
+
+
+class GivingProgressReconcileTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church)
+    
+    def test_reconcile_leaves_gifts_with_pending_events_to_the_outbox(self):
+        pledge = self.create_pledge()
+        self.complete(pledge=pledge)
+        
+        drift = GivingProgressService.reconcile()
+        with self.captureOnCommitCallbacks():
+            OutboxService.drain()
+        
+        self.assertEqual(drift['pledges'], [])
+        pledge.refresh_from_db()
+        self.assertEqual(pledge.paid_amount, Decimal('100.00'))
+        self.assertEqual(pledge.status, 'partially_paid')
+    
+    def test_reconcile_repairs_settled_drift(self):
+        pledge = self.create_pledge(amount='100.00')
+        self.complete(pledge=pledge)
+        with self.captureOnCommitCallbacks():
+            OutboxService.drain()
+        Pledge.objects.filter(pk=pledge.pk).update(paid_amount=Decimal('40.00'), status='partially_paid')
+        
+        drift = GivingProgressService.reconcile()
+        
+        self.assertEqual([item['id'] for item in drift['pledges']], [pledge.pk])
+        pledge.refresh_from_db()
+        self.assertEqual(pledge.paid_amount, Decimal('100.00'))
+        self.assertEqual(pledge.status, 'fully_paid')
+        self.assertEqual(GivingProgressService.find_drift(), {'pledges': [], 'campaigns': []})
+    
+    def test_reconcile_does_not_overwrite_a_concurrent_increment(self):
+        pledge = self.create_pledge()
+        Pledge.objects.filter(pk=pledge.pk).update(paid_amount=Decimal('40.00'))
+        
+        # Progress applied between the drift check and the write wins
+        drift = GivingProgressService._drift
+        
+        def drift_then_increment(*args, **kwargs):
+            result = drift(*args, **kwargs)
+            Pledge.apply_payment(pledge.pk, Decimal('10.00'))
+            return result
+        
+        with mock.patch.object(GivingProgressService, '_drift', side_effect=drift_then_increment):
+            GivingProgressService.reconcile()
+        
+        pledge.refresh_from_db()
+        self.assertEqual(pledge.paid_amount, Decimal('60.00'))
+
+
+class GivingRollupIdempotencyTests(GivingTestCase):
+    """Repeated payment callbacks and refunds must move every counter exactly once."""
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church)
+    
+    def drain(self):
+        with self.captureOnCommitCallbacks():
+            OutboxService.drain()
+    
+    def rollup(self):
+        return GivingDailyRollup.objects.get(church=self.church, category=self.category)
+    
+    def test_completing_twice_counts_once(self):
+        pledge = self.create_pledge()
+        giving = self.complete(pledge=pledge)
+        giving.mark_completed()
+        GivingTransaction.objects.get(pk=giving.pk).mark_completed()
+        self.drain()
+        
+        rollup = self.rollup()
+        self.assertEqual((rollup.total_amount, rollup.transaction_count), (Decimal('100.00'), 1))
+        self.assertEqual(OutboxEvent.objects.filter(topic='giving.completed').count(), 1)
+        pledge.refresh_from_db()
+        self.assertEqual(pledge.paid_amount, Decimal('100.00'))
+    
+    def test_refund_reverses_once(self):
+        pledge = self.create_pledge()
+        giving = self.complete(pledge=pledge)
+        self.complete('50.00')
+        self.drain()
+        
+        giving.refund(Decimal('100.00'), 'Duplicate payment')
+        giving.refund(Decimal('100.00'), 'Duplicate payment')
+        self.drain()
+        
+        rollup = self.rollup()
+        self.assertEqual(
+            (rollup.total_amount, rollup.transaction_count, rollup.refunded_amount),
+            (Decimal('50.00'), 1, Decimal('100.00'))
+        )
+        pledge.refresh_from_db()
+        self.assertEqual(pledge.paid_amount, Decimal('0.00'))
+        self.assertEqual(GivingRollupService.find_drift(date(2000, 1, 1), timezone.localdate()), [])
+    
+    def test_refund_of_an_uncompleted_gift_changes_nothing(self):
+        giving = self.create_giving(self.member, self.category)
+        giving.refund(Decimal('100.00'), 'Cancelled')
+        
+        self.assertFalse(GivingDailyRollup.objects.exists())
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+class RebuildGivingRollupsCommandTests(GivingTestCase):
+    """The rollup command reports and repairs corrupted buckets, keeping refunds netted out."""
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church)
+        
+        refunded = self.complete('100.00')
+        self.complete('50.00')
+        refunded.refund(Decimal('100.00'), 'Duplicate payment')
+        with self.captureOnCommitCallbacks():
+            OutboxService.drain()
+        
+        today = timezone.localdate().isoformat()
+        self.range = ['--start', today, '--end', today]
+        GivingDailyRollup.objects.update(total_amount=Decimal('999.00'), transaction_count=7)
+    
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('rebuild_giving_rollups', *self.range, *args, stdout=out)
+        return out.getvalue()
+    
+    def bucket(self):
+        rollup = GivingDailyRollup.objects.get(church=self.church, category=self.category)
+        return rollup.total_amount, rollup.transaction_count, rollup.refunded_amount
+    
+    def test_check_reports_without_writing(self):
+        output = self.run_command('--check')
+        
+        self.assertIn('stored 999.00 (7), expected 50.00 (1)', output)
+        self.assertIn('Found 1 drifted buckets', output)
+        self.assertEqual(self.bucket(), (Decimal('999.00'), 7, Decimal('100.00')))
+    
+    def test_reconcile_repairs_the_bucket(self):
+        output = self.run_command('--reconcile')
+        
+        self.assertIn('Repaired 1 drifted buckets', output)
+        self.assertEqual(self.bucket(), (Decimal('50.00'), 1, Decimal('100.00')))
+        self.assertIn('Found 0 drifted buckets', self.run_command('--check'))
+    
+    def test_rebuild_recomputes_totals_and_refunds(self):
+        GivingDailyRollup.objects.update(refunded_amount=Decimal('0.00'))
+        
+        output = self.run_command()
+        
+        self.assertIn('Rebuilt 1 buckets', output)
+        self.assertEqual(self.bucket(), (Decimal('50.00'), 1, Decimal('100.00')))
+    
+    def test_start_after_end_is_rejected(self):
+        with self.assertRaises(CommandError):
+            call_command('rebuild_giving_rollups', '--start', '2026-05-02', '--end', '2026-05-01')
+
+
+class GivingLeaderboardTests(GivingTestCase):
+    """Leaderboard entries follow completions and refunds, and a rebuild reproduces them."""
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church)
+        self.other = self.create_member(self.church)
+    
+    def give(self, member, amount, when):
+        giving = self.create_giving(member, self.category, amount, when=when)
+        giving.mark_completed()
+        return giving
+    
+    def entries(self, **filters):
+        return sorted(
+            GivingLeaderboardEntry.objects.filter(**filters).values_list(
+                'church_id', 'member_id', 'period_type', 'period_start', 'total_amount', 'transaction_count'
+            )
+        )
+    
+    def month(self, year, month):
+        return GivingLeaderboardEntry.objects.filter(
+            church=self.church, period_type='month', period_start=date(year, month, 1)
+        )
+    
+    def test_top_orders_members_by_their_period_total(self):
+        self.give(self.member, '100.00', self.local(2026, 3, 2, 9))
+        self.give(self.member, '50.00', self.local(2026, 3, 20, 9))
+        self.give(self.other, '120.00', self.local(2026, 3, 5, 9))
+        self.give(self.other, '500.00', self.local(2026, 4, 5, 9))
+        
+        top = GivingLeaderboardService.top(self.month(2026, 3))
+        
+        self.assertEqual(
+            [(row['member_id'], row['total'], row['count']) for row in top],
+            [(self.member.id, Decimal('150.00'), 2), (self.other.id, Decimal('120.00'), 1)]
+        )
+        self.assertEqual(len(GivingLeaderboardService.top(self.month(2026, 3), limit=1)), 1)
+    
+    def test_refund_takes_the_gift_off_the_leaderboard_once(self):
+        giving = self.give(self.member, '100.00', self.local(2026, 3, 2, 9))
+        self.give(self.other, '40.00', self.local(2026, 3, 5, 9))
+        giving.mark_completed()
+        
+        giving.refund(Decimal('100.00'), 'Duplicate payment')
+        GivingTransaction.objects.get(pk=giving.pk).refund(Decimal('100.00'), 'Duplicate payment')
+        
+        entry = GivingLeaderboardEntry.objects.get(member=self.member, period_type='year')
+        self.assertEqual((entry.total_amount, entry.transaction_count), (Decimal('0.00'), 0))
+        self.assertEqual([row['member_id'] for row in GivingLeaderboardService.top(self.month(2026, 3))], [self.other.id])
+    
+    def test_rebuild_reproduces_the_incremental_entries(self):
+        self.give(self.member, '100.00', self.local(2026, 1, 31, 23))
+        self.give(self.member, '60.00', self.local(2026, 2, 1, 0))
+        self.give(self.other, '25.00', self.local(2026, 2, 14, 9))
+        self.give(self.member, '10.00', self.local(2025, 12, 31, 9))
+        elsewhere = self.create_member(self.create_church())
+        giving = self.create_giving(elsewhere, self.create_category(elsewhere.church), '70.00', when=self.local(2026, 2, 1, 9))
+        giving.mark_completed()
+        incremental = self.entries()
+        
+        GivingLeaderboardEntry.objects.filter(member=self.member, period_start__year=2026).update(total_amount=1)
+        GivingLeaderboardEntry.objects.filter(member=self.other).delete()
+        GivingLeaderboardService.rebuild(2026, church_id=self.church.id)
+        
+        # Other years and churches are left as they were
+        self.assertEqual(self.entries(), incremental)
+
+
+class GivingCategoryTotalsTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church)
+    
+    def test_annotated_totals_match_the_transactions(self):
+        today = timezone.localdate()
+        self.complete('100.00')
+        self.complete('40.00', when=self.local(today.year, 1, 1, 9, 0) if today.month > 1 else None)
+        self.complete('25.00', when=self.local(today.year - 1, 12, 31, 9, 0))
+        self.create_giving(self.member, self.category, '500.00')
+        empty = self.create_category(self.church, name='Offering')
+        
+        with self.assertNumQueries(1):
+            categories = {
+                category.pk: category
+                for category in GivingCategory.objects.filter(church=self.church).with_totals()
+            }
+        
+        for category in (self.category, empty):
+            annotated = categories[category.pk]
+            self.assertEqual(annotated.current_month_total, category.current_month_total)
+            self.assertEqual(annotated.current_year_total, category.current_year_total)
+        self.assertEqual(categories[self.category.pk].year_total, Decimal('140.00'))
+        self.assertEqual(categories[empty.pk].month_total, Decimal('0.00'))
+        
+        all_time = GivingCategory.objects.filter(church=self.church).with_totals('all').get(pk=self.category.pk)
+        self.assertEqual(all_time.all_total, Decimal('165.00'))
+        self.assertFalse(hasattr(all_time, 'month_total'))
+    
+    def test_unknown_period_is_rejected(self):
+        with self.assertRaises(ValueError):
+            GivingCategory.objects.with_totals('week')
+
+
+class RecurringGivingServiceTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church)
+        self.schedule = RecurringGiving.objects.create(
+            member=self.member,
+            church=self.church,
+            category=self.category,
+            frequency='monthly',
+            amount=Decimal('100.00'),
+            start_date=date(2026, 1, 31),
+            next_payment_date=date(2026, 1, 31),
+            payment_method='mpesa',
+            created_by=self.member.user,
+            updated_by=self.member.user,
+        )
+    
+    def test_schedule_behind_is_charged_once(self):
+        self.assertEqual(RecurringGivingService.process_due(today=date(2026, 3, 31)), 1)
+        self.assertEqual(RecurringGivingService.process_due(today=date(2026, 3, 31)), 0)
+        
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.next_payment_date, date(2026, 4, 30))
+        self.assertEqual(self.schedule.total_transactions, 1)
+        self.assertEqual(self.schedule.transactions.count(), 1)
+    
+    def test_schedule_charged_by_another_worker_is_skipped(self):
+        build_transaction = RecurringGiving.build_transaction
+        
+        # Another worker charges the schedule after this one selected it
+        def charged_elsewhere(schedule, when):
+            RecurringGiving.objects.filter(pk=schedule.pk).update(next_payment_date=date(2026, 2, 28))
+            return build_transaction(schedule, when)
+        
+        with mock.patch.object(RecurringGiving, 'build_transaction', autospec=True, side_effect=charged_elsewhere):
+            self.assertIsNone(RecurringGivingService._process_chunk(date(2026, 2, 1), 10))
+        
+        self.assertFalse(GivingTransaction.objects.exists())
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.total_transactions, 0)
+
+
+class EnvelopeImportTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.category = self.create_category(self.church)
+        self.member = self.create_member(self.church, membership_number='ENV-1')
+        self.client = APIClient()
+        self.client.force_authenticate(self.create_user(self.church, role='treasurer'))
+        self.url = f'/api/giving/church/{self.church.id}/envelopes/'
+    
+    def envelope(self, **kwargs):
+        row = {'member_number': 'ENV-1', 'category': 'tithe', 'amount': '100', 'method': 'cash'}
+        row.update(kwargs)
+        return row
+    
+    def test_invalid_rows_are_reported_and_nothing_is_imported(self):
+        rows = [
+            self.envelope(),
+            self.envelope(date='2026-02-30'),
+            self.envelope(date='30/01/2026'),
+            self.envelope(member_number='NOPE', amount='-5', method='barter'),
+        ]
+        
+        response = self.client.post(self.url, {'envelopes': rows}, format='json')
+        
+        self.assertEqual(response.status_code, 400)
+        errors = {error['row']: set(error['errors']) for error in response.data['errors']}
+        self.assertEqual(errors, {
+            2: {'date'},
+            3: {'date'},
+            4: {'member_number', 'amount', 'method'},
+        })
+        self.assertFalse(GivingTransaction.objects.exists())
+    
+    def test_numeric_category_is_an_id_never_a_name(self):
+        self.create_category(self.church, name=str(self.category.pk))
+        missing = GivingCategory.objects.order_by('-pk').values_list('pk', flat=True).first() + 1
+        rows = [
+            self.envelope(category=str(self.category.pk)),
+            self.envelope(category='Tithe'),
+            self.envelope(category=str(missing)),
+        ]
+        
+        response = self.client.post(self.url, {'envelopes': rows}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.data['errors']], [3])
+        
+        response = self.client.post(self.url, {'envelopes': rows[:2]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(GivingTransaction.objects.values_list('category_id', flat=True)),
+            [self.category.pk] * 2
+        )
+    
+    def test_impossible_batch_date_is_rejected(self):
+        response = self.client.post(self.url, {'date': '2026-02-30', 'envelopes': [self.envelope()]}, format='json')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_imported_gifts_go_through_the_outbox(self):
+        pledge = self.create_pledge()
+        rows = [self.envelope(pledge=str(pledge.pk)), self.envelope(amount='50', date='2026-03-01')]
+        
+        response = self.client.post(self.url, {'envelopes': rows}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(OutboxEvent.objects.filter(topic='giving.completed', status='pending').count(), 2)
+        
+        with self.captureOnCommitCallbacks():
+            OutboxService.drain()
+        
+        pledge.refresh_from_db()
+        self.assertEqual(pledge.paid_amount, Decimal('100.00'))
+        self.assertEqual(AuditLog.objects.filter(action='GIVING_COMPLETED').count(), 2)
+        self.assertEqual(GivingProgressService.find_drift(), {'pledges': [], 'campaigns': []})
+        self.assertEqual(GivingRollupService.find_drift(date(2000, 1, 1), timezone.localdate()), [])
+
+
+class GivingStatementTests(GivingTestCase):
+    """Year-end statements list each member's completed tax-deductible giving."""
+    
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.church = self.create_church()
+        self.tithe = self.create_category(self.church)
+        self.offering = self.create_category(self.church, 'Offering', is_tax_deductible=False)
+        self.first = self.create_member(self.church, membership_number='M001')
+        self.second = self.create_member(self.church, membership_number='M002')
+        
+        for member, category, amount, status, when in (
+            (self.first, self.tithe, '100.00', 'completed', self.local(2025, 1, 1, 9)),
+            (self.first, self.tithe, '50.50', 'completed', self.local(2025, 12, 31, 18)),
+            (self.first, self.offering, '200.00', 'completed', self.local(2025, 6, 1, 9)),
+            (self.first, self.tithe, '30.00', 'pending', self.local(2025, 6, 1, 9)),
+            (self.first, self.tithe, '40.00', 'completed', self.local(2024, 12, 31, 18)),
+            (self.second, self.tithe, '75.00', 'completed', self.local(2025, 3, 1, 9)),
+            # Only non-deductible giving, so no statement
+            (self.create_member(self.church), self.offering, '10.00', 'completed', self.local(2025, 3, 1, 9)),
+        ):
+            self.create_giving(member, category, amount, status, when)
+    
+    def read(self, path):
+        with open(os.path.join(settings.MEDIA_ROOT, path), encoding='utf-8') as statement_file:
+            return statement_file.read()
+    
+    def test_statements_total_tax_deductible_giving_per_member(self):
+        manifest_path = GivingStatementService.generate_for_church(2025, self.church, workers=1, chunk_size=1)
+        with open(manifest_path, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+        
+        self.assertEqual(manifest['statement_count'], 2)
+        self.assertEqual(manifest['total'], '225.50')
+        entries = {entry['membership_number']: entry for entry in manifest['statements']}
+        self.assertEqual(set(entries), {'M001', 'M002'})
+        self.assertEqual(entries['M001']['total'], '150.50')
+        self.assertEqual(entries['M002']['total'], '75.00')
+        
+        rows = list(csv.reader(self.read(entries['M001']['csv']).splitlines()))
+        self.assertEqual([row[4:] for row in rows[1:]], [['Tithe', '2', '150.50'], ['Total', '2', '150.50']])
+        self.assertIn('150.50', self.read(entries['M001']['html']))
+        self.assertNotIn('Offering', self.read(entries['M001']['html']))
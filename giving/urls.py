@@ -7,6 +7,8 @@ from .views import (
     PledgeViewSet, 
     GivingCampaignViewSet,
     church_givings,
+    export_church_givings,
+    import_envelopes,
     giving_categories,
     create_giving_transaction
 )
@@ -26,4 +28,6 @@ urlpatterns = [
     path('transactions/', create_giving_transaction, name='create_giving_transaction'),
     path('', include(router.urls)),
     path('church/<int:church_id>/', church_givings, name='church_givings'),
+    path('church/<int:church_id>/export.csv', export_church_givings, name='export_church_givings'),
+    path('church/<int:church_id>/envelopes/', import_envelopes, name='import_envelopes'),
 ]
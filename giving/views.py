@@ -2,13 +2,17 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotFound
 from django.db.models import Sum, Count, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.db import transaction
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
 from .models import GivingCategory, GivingTransaction, RecurringGiving, Pledge, GivingCampaign
+from .services import EnvelopeImportService, GivingRollupService
 from .serializers import (
     GivingCategorySerializer, 
     GivingTransactionSerializer, 
@@ -16,12 +20,23 @@ from .serializers import (
     PledgeSerializer, 
     GivingCampaignSerializer
 )
-from common.permissions import IsMember, IsChurchAdmin, IsSystemAdmin, IsOwnerOrChurchAdmin
+from common.permissions import IsMember, IsChurchAdmin, IsSystemAdmin, IsOwnerOrChurchAdmin, CanManageChurchFinances
+from common.services import TrendService
+from common.pagination import KeysetPagination
+from common.idempotency import idempotent
 from payments.models import Payment
+from churches.models import Church
+import csv
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Fields the giving history endpoint accepts in ?fields= projections
+HISTORY_FIELDS = {field.name for field in GivingTransaction._meta.concrete_fields}
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -42,10 +57,10 @@ def giving_categories(request):
         
         # Get categories for user's church
         if user.role == 'system_admin':
-            categories = GivingCategory.objects.filter(is_active=True)
+            categories = GivingCategory.objects.filter(is_active=True).with_totals()
             logger.info(f"System admin fetching all active categories: {categories.count()} found")
         else:
-            categories = GivingCategory.objects.filter(church=user.church, is_active=True)
+            categories = GivingCategory.objects.filter(church=user.church, is_active=True).with_totals()
             logger.info(f"User {user.email} fetching categories for church {user.church.name}: {categories.count()} found")
         
         serializer = GivingCategorySerializer(categories, many=True)
@@ -70,6 +85,7 @@ def giving_categories(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_giving_transaction(request):
     """Create a giving transaction from mobile app"""
     try:
@@ -130,10 +146,10 @@ def create_giving_transaction(request):
             payment_method=data.get('payment_method', 'mpesa'),
             transaction_type='one_time',
             status='pending',
-            transaction_date=timezone.now().date(),
+            transaction_date=timezone.now(),
             created_by=user,
             updated_by=user,
-            note=data.get('note', ''),
+            notes=data.get('note', ''),
             is_anonymous=data.get('is_anonymous', False)
         )
         
@@ -166,14 +182,17 @@ class GivingCategoryViewSet(viewsets.ModelViewSet):
         """Filter active categories for user's church"""
         user = self.request.user
         if user.role == 'system_admin':
-            return GivingCategory.objects.filter(is_active=True)
+            categories = GivingCategory.objects.filter(is_active=True)
         else:
-            return GivingCategory.objects.filter(church=user.church, is_active=True)
+            categories = GivingCategory.objects.filter(church=user.church, is_active=True)
+        return categories.with_totals()
 
 
 class GivingTransactionViewSet(viewsets.ModelViewSet):
     serializer_class = GivingTransactionSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrChurchAdmin]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-transaction_date', '-id')
     queryset = GivingTransaction.objects.all()
     
     def get_queryset(self):
@@ -220,24 +239,38 @@ class GivingTransactionViewSet(viewsets.ModelViewSet):
             if church_id:
                 givings = givings.filter(church_id=church_id)
             
-            # Order by date
-            givings = givings.order_by('-transaction_date')
+            # Calculate totals over the whole filtered history in one query
+            totals = givings.aggregate(total=Sum('amount'), count=Count('id'))
             
-            # Calculate totals
-            total_given = givings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            # Optional projection, e.g. ?fields=transaction_date,amount,category
+            fields = [
+                field for field in request.query_params.get('fields', '').split(',')
+                if field in HISTORY_FIELDS
+            ]
+            if fields:
+                # Keep the pagination keys loaded so cursors can be built
+                givings = givings.only(*set(fields) | {'id', 'transaction_date'})
             
-            # Serialize data
-            serializer = self.get_serializer(givings, many=True)
+            # Serialize one page of the history
+            page = self.paginate_queryset(givings)
+            serializer = self.get_serializer(page, many=True, fields=fields or None)
             
             return Response({
                 'success': True,
                 'data': {
-                    'total_given': float(total_given),
-                    'transaction_count': givings.count(),
-                    'givings': serializer.data
+                    'total_given': float(totals['total'] or Decimal('0.00')),
+                    'transaction_count': totals['count'],
+                    'givings': serializer.data,
+                    'links': {
+                        'next': self.paginator.get_next_link(),
+                        'previous': self.paginator.get_previous_link()
+                    },
+                    'page_size': self.paginator.page_size
                 }
             }, status=status.HTTP_200_OK)
             
+        except NotFound:
+            raise
         except Exception as e:
             logger.error(f"Error fetching giving history: {str(e)}")
             return Response({
@@ -265,26 +298,32 @@ class GivingTransactionViewSet(viewsets.ModelViewSet):
                 count=Count('id')
             )
             
-            # Calculate monthly totals
+            # Calculate monthly totals in a single grouped query
+            series = TrendService.series(
+                givings,
+                'transaction_date',
+                'month',
+                start_date=date(current_year, 1, 1),
+                end_date=date(current_year, 12, 31)
+            )
             monthly_totals = []
-            for month in range(1, 13):
-                month_givings = givings.filter(transaction_date__month=month)
-                total = month_givings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            for bucket in series:
                 monthly_totals.append({
-                    'month': month,
-                    'total': float(total),
-                    'count': month_givings.count()
+                    'month': bucket['start_date'].month,
+                    'total': float(bucket['total']),
+                    'count': bucket['count']
                 })
             
             # Overall totals
-            total_given = givings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            total_given = sum(bucket['total'] for bucket in series)
+            transaction_count = sum(bucket['count'] for bucket in series)
             
             return Response({
                 'success': True,
                 'data': {
                     'year': current_year,
                     'total_given': float(total_given),
-                    'transaction_count': givings.count(),
+                    'transaction_count': transaction_count,
                     'by_category': list(by_category),
                     'monthly_totals': monthly_totals
                 }
@@ -434,3 +473,188 @@ def church_givings(request, church_id):
             'success': False,
             'message': 'Failed to fetch church givings'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class _Echo:
+    """File-like object that hands each written CSV line straight back"""
+    
+    def write(self, value):
+        return value
+
+
+@api_view(['GET'])
+@permission_classes([IsChurchAdmin])
+def export_church_givings(request, church_id):
+    """Stream a church's givings as CSV (Church Admin only)"""
+    user = request.user
+    
+    # Verify user has access to this church
+    if user.role != 'system_admin' and user.church_id != church_id:
+        return Response({
+            'success': False,
+            'message': 'You can only export givings for your own church'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    # Get query parameters
+    dates = {}
+    for name in ('start_date', 'end_date'):
+        value = request.query_params.get(name)
+        if not value:
+            continue
+        try:
+            dates[name] = parse_date(value)
+        except ValueError:
+            dates[name] = None
+        if dates[name] is None:
+            return Response({
+                'success': False,
+                'message': f'{name} must be a valid date (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    giving_type = request.query_params.get('giving_type')
+    status_filter = request.query_params.get('status', 'completed')
+    
+    # Base query
+    givings = GivingTransaction.objects.filter(church_id=church_id)
+    
+    # Apply filters; the dates are whole local days, end date included
+    if status_filter != 'all':
+        givings = givings.filter(status=status_filter)
+    if dates:
+        start, end = GivingRollupService.day_range(
+            dates.get('start_date', dates.get('end_date')),
+            dates.get('end_date', dates.get('start_date'))
+        )
+        if 'start_date' in dates:
+            givings = givings.filter(transaction_date__gte=start)
+        if 'end_date' in dates:
+            givings = givings.filter(transaction_date__lt=end)
+    if giving_type:
+        givings = givings.filter(category__name=giving_type)
+    
+    # Project only the exported columns so no model instances are built
+    rows = givings.order_by('transaction_date', 'id').values_list(
+        'transaction_date',
+        'transaction_id',
+        'member__membership_number',
+        'member__user__first_name',
+        'member__user__last_name',
+        'is_anonymous',
+        'category__name',
+        'amount',
+        'currency',
+        'payment_method',
+        'payment_reference',
+        'status'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    
+    def stream():
+        writer = csv.writer(_Echo())
+        yield writer.writerow([
+            'Date', 'Transaction ID', 'Membership Number', 'Member', 'Category',
+            'Amount', 'Currency', 'Payment Method', 'Payment Reference', 'Status'
+        ])
+        
+        for (transaction_date, transaction_id, membership_number, first_name, last_name,
+                is_anonymous, category, amount, currency, payment_method, reference, giving_status) in rows:
+            yield writer.writerow([
+                timezone.localtime(transaction_date).isoformat(),
+                transaction_id,
+                '' if is_anonymous else (membership_number or ''),
+                'Anonymous' if is_anonymous else f"{first_name} {last_name}".strip(),
+                category,
+                amount,
+                currency,
+                payment_method,
+                reference,
+                giving_status
+            ])
+    
+    response = StreamingHttpResponse(stream(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="church-{church_id}-givings.csv"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([CanManageChurchFinances])
+def import_envelopes(request, church_id):
+    """
+    Import a batch of cash/cheque envelopes as completed gifts (Treasurer only)
+    
+    Accepts a CSV upload in ``file``, CSV text in ``csv``, or a JSON list of
+    envelopes (bare or under ``envelopes``) with member_number, category (ID
+    or name), amount and method, plus optional date, pledge, campaign,
+    reference and note. An optional ``date`` applies to rows without one.
+    """
+    user = request.user
+    
+    # Verify user has access to this church
+    if user.role != 'system_admin' and user.church_id != church_id:
+        return Response({
+            'success': False,
+            'message': 'You can only import givings for your own church'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        church = Church.objects.get(id=church_id)
+    except Church.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Church not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    # Read the envelopes from whichever format was sent
+    data = request.data
+    batch_date = None
+    if 'file' in request.FILES:
+        rows = EnvelopeImportService.parse_csv(request.FILES['file'].read().decode('utf-8-sig'))
+    elif isinstance(data, list):
+        rows = data
+    elif 'csv' in data:
+        rows = EnvelopeImportService.parse_csv(data['csv'])
+    else:
+        rows = data.get('envelopes', [])
+    
+    if not isinstance(data, list) and data.get('date'):
+        try:
+            batch_date = parse_date(str(data['date']))
+        except ValueError:
+            batch_date = None
+        if not batch_date:
+            return Response({
+                'success': False,
+                'message': 'Enter the batch date as YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return Response({
+            'success': False,
+            'message': 'Envelopes must be a list of objects'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if not rows:
+        return Response({
+            'success': False,
+            'message': 'No envelopes to import'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(rows) > EnvelopeImportService.MAX_ROWS:
+        return Response({
+            'success': False,
+            'message': f'A batch can hold at most {EnvelopeImportService.MAX_ROWS} envelopes'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    result = EnvelopeImportService.import_batch(church, user, rows, batch_date)
+    
+    if result['errors']:
+        return Response({
+            'success': False,
+            'message': f"{len(result['errors'])} of {len(rows)} envelopes are invalid; nothing was imported",
+            'errors': result['errors']
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'message': f"Imported {result['created']} envelopes",
+        'data': {
+            'created': result['created'],
+            'total_amount': float(result['total_amount'])
+        }
+    }, status=status.HTTP_201_CREATED)
@@ -241,6 +241,7 @@ class MobileNotification(TimeStampedModel):
             models.Index(fields=['notification_type']),
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['user', 'created_at', 'id']),
         ]
     
     def __str__(self):
@@ -28,6 +28,7 @@ urlpatterns = [
     path('notifications/', views.MobileNotificationListView.as_view(), name='notification-list'),
     path('notifications/<int:pk>/', views.MobileNotificationDetailView.as_view(), name='notification-detail'),
     path('notifications/send/', views.mobile_send_push_notification, name='send-push-notification'),
+    path('v2/notifications/', views.MobileNotificationCursorListView.as_view(), name='notification-list-v2'),
     
     # Analytics
     path('analytics/track/', views.mobile_track_analytics, name='track-analytics'),
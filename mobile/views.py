@@ -25,7 +25,7 @@ from common.serializers import UserSerializer
 from django.contrib.auth import get_user_model
 from accounts.models import Member
 from common.permissions import IsOwnerOrReadOnly, CanManageChurchFinances
-from common.pagination import StandardResultsSetPagination
+from common.pagination import StandardResultsSetPagination, KeysetPagination
 from common.services import NotificationService, AuditService
 from .services import MobileAuthService, MobileNotificationService, MobileAnalyticsService
 
@@ -393,7 +393,7 @@ class MobileEnhancedDashboardView(views.APIView):
         # Personal giving statistics
         from giving.models import GivingTransaction, RecurringGiving
         from expenses.models import Expense
-        from members.models import Member
+        from accounts.models import Member
         
         now = timezone.now()
         current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -483,24 +483,10 @@ class MobileEnhancedDashboardView(views.APIView):
         return Response(dashboard_data)
     
     def _calculate_growth_rate(self, church):
-        """Calculate member growth rate"""
-        from members.models import Member
-        from datetime import timedelta
+        """Calculate member growth rate over the last 30 days"""
+        from accounts.services import MembershipSnapshotService
         
-        now = timezone.now()
-        last_month = now - timedelta(days=30)
-        
-        current_members = Member.objects.filter(church=church).count()
-        previous_members = Member.objects.filter(
-            church=church,
-            created_at__lt=last_month
-        ).count()
-        
-        if previous_members == 0:
-            return 100
-        
-        growth = ((current_members - previous_members) / previous_members) * 100
-        return round(growth, 2)
+        return MembershipSnapshotService.growth_rate(church, days=30, default=100)
     
     def _calculate_avg_monthly_giving(self, member):
         """Calculate average monthly giving"""
@@ -846,6 +832,18 @@ class MobileNotificationListView(generics.ListAPIView):
         ).order_by('-created_at')
 
 
+class MobileNotificationCursorListView(MobileNotificationListView):
+    """
+    List mobile notifications by cursor instead of page number.
+    
+    Served as v2 so released apps that send ?page= keep the page-numbered
+    list and its response shape.
+    """
+    
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+
 class MobileNotificationDetailView(generics.RetrieveUpdateAPIView):
     """Mobile notification details"""
     
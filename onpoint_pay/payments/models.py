@@ -87,6 +87,7 @@ class Transaction(models.Model):
             models.Index(fields=['reference']),
             models.Index(fields=['payment_method']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['merchant', 'created_at', 'id']),
         ]
     
     def __str__(self):
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TransactionCursorPagination(CursorPagination):
+    """
+    Keyset pagination for merchant transaction lists.
+    
+    Pages are fetched by (created_at, id) position instead of OFFSET, so
+    deep pages stay as cheap as the first one.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
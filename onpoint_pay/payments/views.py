@@ -17,6 +17,7 @@ from .serializers import (
     RefundSerializer
 )
 from .services.mpesa_service import MpesaService
+from .pagination import TransactionCursorPagination
 from .utils import validate_api_key, check_rate_limits, create_webhook_log
 
 
@@ -266,6 +267,7 @@ class TransactionListView(generics.ListAPIView):
     """List merchant's transactions"""
     permission_classes = [IsAuthenticated]
     serializer_class = TransactionSerializer
+    pagination_class = TransactionCursorPagination
     
     def get_queryset(self):
         queryset = Transaction.objects.filter(merchant=self.request.user)
@@ -10,6 +10,7 @@ from .models import PaymentRequest, Payment, Transaction
 from .serializers import PaymentRequestSerializer, PaymentSerializer, TransactionSerializer
 from .paystack_service import paystack_service
 from common.permissions import CanViewPayments, IsChurchAdmin, IsSystemAdmin
+from common.idempotency import idempotent
 import json
 import uuid
 import logging
@@ -51,6 +52,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
         return Payment.objects.filter(user=user)
     
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    @idempotent
     def initialize_paystack(self, request):
         """Initialize Paystack payment"""
         try:
@@ -2,6 +2,7 @@ from django.contrib import admin
 from giving.models import GivingTransaction, GivingCategory
 from expenses.models import Expense, ExpenseCategory
 from budgets.models import Budget
+from .models import ReportJob
 
 
 @admin.register(GivingTransaction)
@@ -143,4 +144,18 @@ class BudgetAdmin(admin.ModelAdmin):
     
     def remaining_amount(self, obj):
         return obj.remaining_amount
-    remaining_amount.short_description = 'Remaining Amount'
\ No newline at end of file
+    remaining_amount.short_description = 'Remaining Amount'
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    """Report job admin"""
+    
+    list_display = ['id', 'report_type', 'requested_by', 'church', 'status', 'created_at', 'completed_at']
+    list_filter = ['report_type', 'status']
+    search_fields = ['requested_by__email', 'parameters_hash']
+    readonly_fields = [
+        'requested_by', 'church', 'report_type', 'parameters', 'parameters_hash', 'scope',
+        'result', 'error', 'started_at', 'completed_at', 'created_at', 'updated_at'
+    ]
+    ordering = ['-created_at']
@@ -0,0 +1,687 @@
+import logging
+from datetime import date, datetime, time, timedelta
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from churches.models import Church
+from common.cache import ChurchDataCache
+from giving.models import GivingDailyRollup, GivingTransaction, Pledge, RecurringGiving
+from .services import CHURCH_ADMIN_ROLES
+
+logger = logging.getLogger(__name__)
+
+FORECAST_METHODS = ('linear', 'exponential')
+
+
+def _round(values):
+    """Turn an array into JSON-friendly numbers, with None for gaps"""
+    return [None if np.isnan(value) else round(float(value), 2) for value in values]
+
+
+def _analytics_church(user, church_id=None):
+    """The church whose analytics a user may see: any for system admins, their own for church admins"""
+    if user.role == 'system_admin':
+        if not church_id:
+            raise ValueError('church_id is required')
+        return Church.objects.get(pk=church_id)
+    if user.role in CHURCH_ADMIN_ROLES and user.church_id:
+        return user.church
+    raise PermissionDenied('Giving analytics are only available to church administrators')
+
+
+class GivingAnalyticsService:
+    """
+    Time-series analytics over a church's daily giving.
+    
+    The daily totals are pulled from the giving rollup in one query and held
+    in a NumPy array indexed by day; every figure below is computed from that
+    array without going back to the database.
+    """
+    
+    WEEKS = 26
+    MOVING_AVERAGE_WEEKS = 4
+    
+    @staticmethod
+    def load_daily(church_id, start_date, end_date):
+        """Daily completed giving totals for the range, zero on days without giving"""
+        rows = GivingDailyRollup.objects.filter(
+            church_id=church_id,
+            date__gte=start_date,
+            date__lte=end_date
+        ).values('date').annotate(total=Sum('total_amount')).order_by().values_list('date', 'total')
+        
+        amounts = np.zeros((end_date - start_date).days + 1)
+        rows = list(rows)
+        if rows:
+            days, totals = zip(*rows)
+            index = (np.array(days, dtype='datetime64[D]') - np.datetime64(start_date, 'D')).astype(int)
+            amounts[index] = np.array(totals, dtype=float)
+        return amounts
+    
+    @staticmethod
+    def rolling_mean(values, window):
+        """Trailing mean over `window` values, NaN until the window is full"""
+        means = np.full(len(values), np.nan)
+        if len(values) >= window:
+            sums = np.cumsum(np.insert(values, 0, 0.0))
+            means[window - 1:] = (sums[window:] - sums[:-window]) / window
+        return means
+    
+    @staticmethod
+    def monthly_totals(start_date, amounts):
+        """Sum a daily series into calendar months; returns the months and their totals"""
+        days = np.datetime64(start_date, 'D') + np.arange(len(amounts))
+        months = days.astype('datetime64[M]')
+        index = (months - months[0]).astype(int)
+        return np.unique(months), np.bincount(index, weights=amounts)
+    
+    @staticmethod
+    def year_over_year(totals, periods=12):
+        """Change and percentage change of each value against the one a year earlier"""
+        previous = np.full(len(totals), np.nan)
+        previous[periods:] = totals[:-periods]
+        change = totals - previous
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent = np.where(previous > 0, change / previous * 100, np.nan)
+        return previous, change, percent
+    
+    @staticmethod
+    def seasonal_indices(months, totals):
+        """
+        Ratio-to-moving-average index of each calendar month (January first).
+        
+        Each month is divided by the centred 12-month moving average around
+        it, and the ratios are averaged per calendar month and scaled to a
+        mean of 1. Needs two years of months; None otherwise.
+        """
+        count = len(totals)
+        if count < 24:
+            return None
+        
+        yearly = GivingAnalyticsService.rolling_mean(totals, 12)
+        centred = np.full(count, np.nan)
+        centred[6:count - 6] = (yearly[11:count - 1] + yearly[12:count]) / 2
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = np.where(centred > 0, totals / centred, np.nan)
+        
+        calendar = months.astype(int) % 12
+        valid = ~np.isnan(ratios)
+        sums = np.bincount(calendar[valid], weights=ratios[valid], minlength=12)
+        counts = np.bincount(calendar[valid], minlength=12)
+        if not counts.any():
+            return None
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            indices = np.where(counts > 0, sums / counts, np.nan)
+        return indices / np.nanmean(indices)
+    
+    @staticmethod
+    def forecast(months, totals, horizon, method='linear', indices=None, alpha=0.3):
+        """
+        Forecast the next `horizon` monthly totals.
+        
+        The series is deseasonalised with the seasonal indices when there are
+        any, projected with a least-squares trend line ('linear') or simple
+        exponential smoothing ('exponential'), then reseasonalised.
+        """
+        count = len(totals)
+        future = months[-1] + np.arange(1, horizon + 1)
+        if count == 0:
+            return future, np.zeros(horizon)
+        
+        if indices is None:
+            factors = np.ones(12)
+        else:
+            factors = np.nan_to_num(indices, nan=1.0)
+            factors[factors <= 0] = 1.0
+        adjusted = totals / factors[months.astype(int) % 12]
+        
+        if method == 'exponential':
+            # level = alpha * sum((1 - alpha)^k * x[n-1-k]) + (1 - alpha)^n * x[0]
+            weights = alpha * (1 - alpha) ** np.arange(count)[::-1]
+            level = weights @ adjusted + (1 - alpha) ** count * adjusted[0]
+            projected = np.full(horizon, level)
+        elif count > 1:
+            slope, intercept = np.polyfit(np.arange(count), adjusted, 1)
+            projected = intercept + slope * np.arange(count, count + horizon)
+        else:
+            projected = np.full(horizon, adjusted[0])
+        
+        return future, np.maximum(projected * factors[future.astype(int) % 12], 0)
+    
+    @staticmethod
+    def build(church_id, today, years=3, horizon=6, method='linear', alpha=0.3):
+        """Weekly and monthly series, year-over-year figures, seasonality and a forecast"""
+        weeks = GivingAnalyticsService.WEEKS
+        window = GivingAnalyticsService.MOVING_AVERAGE_WEEKS
+        
+        # Complete weeks end last Sunday and complete months last month
+        last_sunday = today - timedelta(days=today.weekday() + 1)
+        weeks_start = last_sunday - timedelta(weeks=weeks + window - 1) + timedelta(days=1)
+        start_date = min(date(today.year - years, 1, 1), weeks_start)
+        amounts = GivingAnalyticsService.load_daily(church_id, start_date, today)
+        
+        # Weekly totals with their moving average
+        week_offset = (weeks_start - start_date).days
+        weekly = amounts[week_offset:week_offset + (weeks + window - 1) * 7].reshape(-1, 7).sum(axis=1)
+        weekly_average = GivingAnalyticsService.rolling_mean(weekly, window)
+        week_starts = np.datetime64(weeks_start, 'D') + np.arange(len(weekly)) * 7
+        
+        # Monthly totals of the complete months, from January `years` years ago
+        months, monthly = GivingAnalyticsService.monthly_totals(start_date, amounts)
+        first_month = np.datetime64(date(today.year - years, 1, 1), 'M')
+        complete = (months >= first_month) & (months < np.datetime64(today, 'M'))
+        months, monthly = months[complete], monthly[complete]
+        previous, change, percent = GivingAnalyticsService.year_over_year(monthly)
+        
+        # Year to date against the same days a year earlier
+        days = np.datetime64(start_date, 'D') + np.arange(len(amounts))
+        year_start = np.datetime64(date(today.year, 1, 1), 'D')
+        last_year = np.datetime64(date(today.year - 1, 1, 1), 'D')
+        elapsed = np.datetime64(today, 'D') - year_start
+        this_year_total = amounts[(days >= year_start) & (days <= year_start + elapsed)].sum()
+        last_year_total = amounts[(days >= last_year) & (days <= last_year + elapsed)].sum()
+        
+        # Seasonality and forecast ignore the months before the church's first gift
+        giving_months = np.flatnonzero(monthly)
+        first = giving_months[0] if len(giving_months) else len(monthly)
+        indices = GivingAnalyticsService.seasonal_indices(months[first:], monthly[first:])
+        forecast_months, forecast = GivingAnalyticsService.forecast(
+            months[first:] if first < len(months) else months[-1:],
+            monthly[first:],
+            horizon,
+            method,
+            indices,
+            alpha
+        )
+        
+        return {
+            'weekly': [
+                {'week_start': str(week), 'total': total, 'moving_average': average}
+                for week, total, average in zip(
+                    week_starts[window - 1:],
+                    _round(weekly[window - 1:]),
+                    _round(weekly_average[window - 1:])
+                )
+            ],
+            'monthly': [
+                {
+                    'month': str(month),
+                    'total': total,
+                    'previous_year': last,
+                    'change': delta,
+                    'change_percent': pct
+                }
+                for month, total, last, delta, pct in zip(
+                    months, _round(monthly), _round(previous), _round(change), _round(percent)
+                )
+            ],
+            'year_to_date': {
+                'total': round(float(this_year_total), 2),
+                'previous_year': round(float(last_year_total), 2),
+                'change_percent': (
+                    round(float((this_year_total - last_year_total) / last_year_total * 100), 2)
+                    if last_year_total else None
+                )
+            },
+            'seasonal_indices': (
+                [{'month': number, 'index': index} for number, index in zip(range(1, 13), _round(indices))]
+                if indices is not None else []
+            ),
+            'forecast': {
+                'method': method,
+                'periods': [
+                    {'month': str(month), 'total': total}
+                    for month, total in zip(forecast_months, _round(forecast))
+                ]
+            }
+        }
+    
+    @staticmethod
+    def report(user, church_id=None, years=3, horizon=6, method='linear', alpha=None):
+        """Serve a church's giving analytics, cached until its giving changes"""
+        church = _analytics_church(user, church_id)
+        years = int(years)
+        horizon = int(horizon)
+        alpha = float(alpha) if alpha not in (None, '') else settings.GIVING_FORECAST_SMOOTHING
+        if not 1 <= years <= 10:
+            raise ValueError('years must be between 1 and 10')
+        if not 1 <= horizon <= 24:
+            raise ValueError('horizon must be between 1 and 24')
+        if method not in FORECAST_METHODS:
+            raise ValueError(f"method must be one of: {', '.join(FORECAST_METHODS)}")
+        if not 0 < alpha < 1:
+            raise ValueError('alpha must be between 0 and 1')
+        
+        today = timezone.localdate()
+        data = ChurchDataCache.get_or_compute(
+            church.id,
+            'giving_analytics',
+            lambda: GivingAnalyticsService.build(church.id, today, years, horizon, method, alpha),
+            period=f'{today.isoformat()}:{years}:{horizon}:{method}:{alpha}'
+        )
+        
+        return {
+            'church_id': church.id,
+            'church_name': church.name,
+            'as_of': today,
+            **data
+        }
+
+
+class CashFlowProjectionService:
+    """
+    Expected income from active recurring giving schedules and open pledges.
+    
+    Schedules are expanded into their payment dates as NumPy arrays, one
+    matrix per frequency (a row per schedule, a column per payment), so
+    thousands of schedules take a handful of array operations rather than a
+    Python loop each.
+    """
+    
+    GRANULARITIES = ('day', 'week', 'month')
+    
+    # Frequencies that move by a number of days or of calendar months
+    DAY_STEPS = {'weekly': 7, 'bi_weekly': 14}
+    MONTH_STEPS = {'monthly': 1, 'quarterly': 3, 'yearly': 12}
+    
+    # Days per installment used by Pledge.calculate_installment_amount
+    INSTALLMENT_DAYS = {'weekly': 7, 'bi_weekly': 14, 'monthly': 30, 'quarterly': 90, 'yearly': 365}
+    
+    # Monday 5 January 1970, the origin of week buckets
+    WEEK_ORIGIN = np.datetime64('1970-01-05', 'D')
+    
+    @staticmethod
+    def expand(frequencies, firsts, anchors, ends, amounts, caps, start_date, end_date):
+        """
+        Payment dates and amounts of many schedules between two dates.
+        
+        Each schedule pays `amounts` every period from its first payment
+        date until its end date. Monthly, quarterly and yearly payments fall
+        on the anchor day, or the last day of shorter months, as
+        RecurringGiving.calculate_next_payment_date does. Payments stop once
+        a schedule's cap has been reached.
+        """
+        start = np.datetime64(start_date, 'D')
+        end = np.datetime64(end_date, 'D')
+        dates, values = [], []
+        
+        for frequency in np.unique(frequencies):
+            rows = frequencies == frequency
+            first, anchor, amount = firsts[rows], anchors[rows], amounts[rows]
+            
+            if frequency in CashFlowProjectionService.DAY_STEPS:
+                step = CashFlowProjectionService.DAY_STEPS[frequency]
+                skip = np.maximum(-((first - start).astype(int) // step), 0)
+                periods = skip[:, None] + np.arange((end - start).astype(int) // step + 1)
+                due = first[:, None] + periods * step
+            else:
+                step = CashFlowProjectionService.MONTH_STEPS.get(frequency, 1)
+                first_month = first.astype('datetime64[M]')
+                skip = np.maximum((start.astype('datetime64[M]') - first_month).astype(int) // step, 0)
+                count = (end.astype('datetime64[M]') - start.astype('datetime64[M]')).astype(int) // step + 2
+                months = first_month[:, None] + (skip[:, None] + np.arange(count)) * step
+                month_days = ((months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')).astype(int)
+                due = months.astype('datetime64[D]') + np.minimum(anchor[:, None], month_days) - 1
+            
+            # The first month's anchor day can fall before the next real payment
+            paid = (due >= start) & (due >= first[:, None]) & (due <= end) & (due <= ends[rows][:, None])
+            
+            # Installments before this one, to stop at the cap
+            earlier = np.cumsum(paid, axis=1) - 1
+            payment = np.clip(caps[rows][:, None] - earlier * amount[:, None], 0, amount[:, None])
+            paid &= payment > 0
+            
+            dates.append(due[paid])
+            values.append(payment[paid])
+        
+        if not dates:
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=float)
+        return np.concatenate(dates), np.concatenate(values)
+    
+    @staticmethod
+    def recurring_payments(church_id, start_date, end_date):
+        """
+        Expected payments of the church's active recurring giving.
+        
+        A schedule whose next payment date has already passed is charged once
+        on the next run (see RecurringGiving.record_payment), so its overdue
+        charge is expected on ``start_date`` and its regular payments resume
+        after it. Also returns the number of schedules and of overdue ones.
+        """
+        rows = list(RecurringGiving.objects.filter(
+            church_id=church_id,
+            status='active',
+            next_payment_date__lte=end_date
+        ).values_list('frequency', 'next_payment_date', 'start_date', 'end_date', 'amount'))
+        
+        if not rows:
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=float), 0, 0
+        
+        frequencies, nexts, starts, ends, amounts = zip(*rows)
+        frequencies = np.array(frequencies)
+        nexts = np.array(nexts, dtype='datetime64[D]')
+        anchors = np.array([start.day for start in starts])
+        ends = np.array([end or end_date for end in ends], dtype='datetime64[D]')
+        amounts = np.array(amounts, dtype=float)
+        
+        start = np.datetime64(start_date, 'D')
+        overdue = nexts < start
+        dates, values = [np.full(overdue.sum(), start)], [amounts[overdue]]
+        for selected, first_day in ((~overdue, start_date), (overdue, start_date + timedelta(days=1))):
+            if not selected.any():
+                continue
+            expanded_dates, expanded_values = CashFlowProjectionService.expand(
+                frequencies[selected],
+                nexts[selected],
+                anchors[selected],
+                ends[selected],
+                amounts[selected],
+                np.full(selected.sum(), np.inf),
+                first_day,
+                end_date
+            )
+            dates.append(expanded_dates)
+            values.append(expanded_values)
+        
+        return np.concatenate(dates), np.concatenate(values), len(rows), int(overdue.sum())
+    
+    @staticmethod
+    def pledge_payments(church_id, start_date, end_date):
+        """Expected installments of the church's open pledges, up to each unpaid balance"""
+        rows = list(Pledge.objects.filter(
+            church_id=church_id,
+            status__in=['active', 'partially_paid'],
+            end_date__gte=start_date,
+            start_date__lte=end_date
+        ).values_list(
+            'payment_frequency', 'start_date', 'end_date', 'pledge_amount', 'paid_amount', 'installment_amount'
+        ))
+        
+        if not rows:
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=float), 0
+        
+        frequencies, starts, ends, pledged, paid, installments = zip(*rows)
+        frequencies = np.array(frequencies)
+        starts = np.array(starts, dtype='datetime64[D]')
+        ends = np.array(ends, dtype='datetime64[D]')
+        pledged = np.array(pledged, dtype=float)
+        
+        # Pledges without an installment amount spread the pledge over their duration
+        period_days = np.vectorize(CashFlowProjectionService.INSTALLMENT_DAYS.get)(frequencies, 1)
+        count = (ends - starts).astype(int) // period_days
+        spread = np.where(count > 0, pledged / np.maximum(count, 1), pledged)
+        installments = np.array([value or np.nan for value in installments], dtype=float)
+        amounts = np.where(np.isnan(installments), spread, installments)
+        
+        dates, values = CashFlowProjectionService.expand(
+            frequencies,
+            starts,
+            np.array([row[1].day for row in rows]),
+            ends,
+            amounts,
+            pledged - np.array(paid, dtype=float),
+            start_date,
+            end_date
+        )
+        return dates, values, len(rows)
+    
+    @staticmethod
+    def bucket(dates, granularity):
+        """First day of the day, week (Monday) or month bucket of each date"""
+        if granularity == 'month':
+            return dates.astype('datetime64[M]').astype('datetime64[D]')
+        if granularity == 'week':
+            origin = CashFlowProjectionService.WEEK_ORIGIN
+            return origin + (dates - origin).astype(int) // 7 * 7
+        return dates
+    
+    @staticmethod
+    def build(church_id, today, months=6, history_months=12, granularity='month'):
+        """
+        Merge the actual giving of the last `history_months` months with the
+        payments expected from today to the end of the month `months` months
+        ahead, summed per bucket. Overdue recurring charges count in today's
+        bucket.
+        """
+        current_month = np.datetime64(today, 'M')
+        history_start = (current_month - history_months).astype('datetime64[D]').astype(object)
+        end_date = ((current_month + months + 1).astype('datetime64[D]') - 1).astype(object)
+        
+        amounts = GivingAnalyticsService.load_daily(church_id, history_start, today)
+        history_days = np.datetime64(history_start, 'D') + np.arange(len(amounts))
+        recurring_dates, recurring, schedule_count, overdue_count = CashFlowProjectionService.recurring_payments(
+            church_id, today, end_date
+        )
+        pledge_dates, pledges, pledge_count = CashFlowProjectionService.pledge_payments(
+            church_id, today, end_date
+        )
+        
+        bucket = CashFlowProjectionService.bucket
+        step = 7 if granularity == 'week' else 1
+        if granularity == 'month':
+            periods = np.arange(
+                np.datetime64(history_start, 'M'), np.datetime64(end_date, 'M') + 1
+            ).astype('datetime64[D]')
+        else:
+            first = bucket(np.array([history_start], dtype='datetime64[D]'), granularity)[0]
+            periods = np.arange(first, np.datetime64(end_date, 'D') + 1, step)
+        
+        def totals(dates, values):
+            if granularity == 'month':
+                index = np.searchsorted(periods, bucket(dates, granularity))
+            else:
+                index = (bucket(dates, granularity) - periods[0]).astype(int) // step
+            return np.bincount(index, weights=values, minlength=len(periods))
+        
+        actual = totals(history_days, amounts)
+        actual[periods > np.datetime64(today, 'D')] = np.nan
+        recurring_totals = totals(recurring_dates, recurring)
+        pledge_totals = totals(pledge_dates, pledges)
+        
+        labels = (periods.astype('datetime64[M]') if granularity == 'month' else periods).astype(str).tolist()
+        return {
+            'granularity': granularity,
+            'projection_end': end_date,
+            'totals': {
+                'recurring': round(float(recurring.sum()), 2),
+                'pledges': round(float(pledges.sum()), 2),
+                'projected': round(float(recurring.sum() + pledges.sum()), 2),
+                'recurring_schedules': schedule_count,
+                'overdue_schedules': overdue_count,
+                'open_pledges': pledge_count
+            },
+            'series': [
+                {
+                    'period': label,
+                    'actual': actual_total,
+                    'recurring': recurring_total,
+                    'pledges': pledge_total,
+                    'projected': round(recurring_total + pledge_total, 2)
+                }
+                for label, actual_total, recurring_total, pledge_total in zip(
+                    labels, _round(actual), _round(recurring_totals), _round(pledge_totals)
+                )
+            ]
+        }
+    
+    @staticmethod
+    def report(user, church_id=None, months=6, history_months=12, granularity='month'):
+        """Serve a church's projected cash flow next to its recent giving"""
+        church = _analytics_church(user, church_id)
+        months = int(months)
+        history_months = int(history_months)
+        if not 1 <= months <= 24:
+            raise ValueError('months must be between 1 and 24')
+        if not 0 <= history_months <= 36:
+            raise ValueError('history_months must be between 0 and 36')
+        if granularity not in CashFlowProjectionService.GRANULARITIES:
+            raise ValueError(f"granularity must be one of: {', '.join(CashFlowProjectionService.GRANULARITIES)}")
+        
+        today = timezone.localdate()
+        return {
+            'church_id': church.id,
+            'church_name': church.name,
+            'as_of': today,
+            'months': months,
+            'history_months': history_months,
+            **CashFlowProjectionService.build(church.id, today, months, history_months, granularity)
+        }
+
+
+class GivingCohortService:
+    """
+    Retention of givers grouped by the month of their first completed gift.
+    
+    Cell (cohort, offset) of the activity matrix counts the members of a
+    cohort who gave `offset` months after their first gift. Only closed
+    months are counted, so a church's matrix is kept in the cache and each
+    refresh adds just the months that closed since, with one grouped query
+    over those months.
+    """
+    
+    CACHE_KEY = 'giving_cohorts:{}'
+    
+    @staticmethod
+    def empty_state():
+        return {
+            'through': None,
+            'origin': None,
+            'members': np.array([], dtype=np.int64),
+            'first_months': np.array([], dtype=np.int64),
+            'active': np.zeros((0, 0), dtype=np.int64),
+            'amounts': np.zeros((0, 0))
+        }
+    
+    @staticmethod
+    def monthly_giving(church_id, start_month, end_month):
+        """Completed giving per member and month between two datetime64[M] months, as arrays"""
+        tzinfo = timezone.get_current_timezone()
+        givings = GivingTransaction.objects.filter(
+            church_id=church_id,
+            status='completed',
+            transaction_date__lt=timezone.make_aware(
+                datetime.combine((end_month + 1).astype('datetime64[D]').astype(object), time.min)
+            )
+        )
+        if start_month is not None:
+            givings = givings.filter(transaction_date__gte=timezone.make_aware(
+                datetime.combine(start_month.astype('datetime64[D]').astype(object), time.min)
+            ))
+        
+        rows = list(givings.values(
+            'member_id',
+            year=ExtractYear('transaction_date', tzinfo=tzinfo),
+            month=ExtractMonth('transaction_date', tzinfo=tzinfo)
+        ).annotate(total=Sum('amount')).order_by().values_list('member_id', 'year', 'month', 'total'))
+        
+        if not rows:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([])
+        
+        members, years, months, totals = zip(*rows)
+        # Months since January 1970, the integer value of datetime64[M]
+        month_numbers = (np.array(years) - 1970) * 12 + np.array(months) - 1
+        return np.array(members, dtype=np.int64), month_numbers, np.array(totals, dtype=float)
+    
+    @staticmethod
+    def update(state, members, months, totals, through):
+        """Add (member, month) giving for months after the state's last month, up to `through`"""
+        # Members who gave for the first time in the new months start a cohort
+        position = np.searchsorted(state['members'], members)
+        known = position < len(state['members'])
+        known[known] = state['members'][position[known]] == members[known]
+        
+        new_members, inverse = np.unique(members[~known], return_inverse=True)
+        new_firsts = np.full(len(new_members), np.iinfo(np.int64).max)
+        np.minimum.at(new_firsts, inverse, months[~known])
+        
+        all_members = np.concatenate([state['members'], new_members])
+        all_firsts = np.concatenate([state['first_months'], new_firsts])
+        order = np.argsort(all_members)
+        all_members, all_firsts = all_members[order], all_firsts[order]
+        
+        origin = state['origin']
+        if origin is None:
+            if not len(all_firsts):
+                return {**state, 'through': through}
+            origin = int(all_firsts.min())
+        
+        # Grow the matrix by the closed months, then count each (member, month) once
+        size = through - origin + 1
+        grow = size - len(state['active'])
+        active = np.pad(state['active'], ((0, grow), (0, grow)))
+        amounts = np.pad(state['amounts'], ((0, grow), (0, grow)))
+        
+        firsts = all_firsts[np.searchsorted(all_members, members)]
+        cells = (firsts - origin, months - firsts)
+        np.add.at(active, cells, 1)
+        np.add.at(amounts, cells, totals)
+        
+        return {
+            'through': through,
+            'origin': origin,
+            'members': all_members,
+            'first_months': all_firsts,
+            'active': active,
+            'amounts': amounts
+        }
+    
+    @staticmethod
+    def refresh(church_id, today):
+        """Bring a church's cached matrix up to the last closed month"""
+        key = GivingCohortService.CACHE_KEY.format(church_id)
+        through = int((np.datetime64(today, 'M') - 1).astype(np.int64))
+        
+        state = cache.get(key) or GivingCohortService.empty_state()
+        if state['through'] == through:
+            return state
+        
+        start = None if state['through'] is None else np.datetime64(state['through'] + 1, 'M')
+        members, months, totals = GivingCohortService.monthly_giving(
+            church_id, start, np.datetime64(through, 'M')
+        )
+        state = GivingCohortService.update(state, members, months, totals, through)
+        cache.set(key, state, settings.GIVING_COHORT_CACHE_TIMEOUT)
+        
+        logger.info(f"Refreshed giving cohorts of church {church_id} through {np.datetime64(through, 'M')}")
+        return state
+    
+    @staticmethod
+    def report(user, church_id=None, cohorts=12):
+        """Serve the retention of a church's recent first-gift cohorts"""
+        church = _analytics_church(user, church_id)
+        cohorts = int(cohorts)
+        if not 1 <= cohorts <= 60:
+            raise ValueError('cohorts must be between 1 and 60')
+        
+        state = GivingCohortService.refresh(church.id, timezone.localdate())
+        active, amounts = state['active'], state['amounts']
+        
+        rows = []
+        for index in range(max(len(active) - cohorts, 0), len(active)):
+            size = active[index, 0]
+            if not size:
+                continue
+            
+            # A cohort has been observed for the months from its first through the last closed one
+            observed = len(active) - index
+            rows.append({
+                'cohort': str(np.datetime64(state['origin'] + index, 'M')),
+                'size': int(size),
+                'active': active[index, :observed].tolist(),
+                'retention': _round(active[index, :observed] / size * 100),
+                'amounts': _round(amounts[index, :observed])
+            })
+        
+        return {
+            'church_id': church.id,
+            'church_name': church.name,
+            'through': str(np.datetime64(state['through'], 'M')),
+            'cohorts': rows
+        }
@@ -0,0 +1,97 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from common.models import TimeStampedModel
+
+
+class ReportJob(TimeStampedModel):
+    """Report built in the background (reports.services.ReportJobService) with its stored result"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    REPORT_TYPE_CHOICES = [
+        ('giving_trends', 'Giving Trends'),
+        ('financial_summary', 'Financial Summary'),
+        ('denomination_consolidated', 'Denomination Consolidated'),
+    ]
+    
+    requested_by = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        related_name='report_jobs'
+    )
+    church = models.ForeignKey(
+        'churches.Church',
+        on_delete=models.CASCADE,
+        related_name='report_jobs',
+        null=True,
+        blank=True
+    )
+    report_type = models.CharField(max_length=50, choices=REPORT_TYPE_CHOICES)
+    parameters = models.JSONField(default=dict)
+    # Identifies the report type, parameters and data scope for de-duplication
+    parameters_hash = models.CharField(max_length=64)
+    scope = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'report_jobs'
+        verbose_name = 'Report Job'
+        verbose_name_plural = 'Report Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['parameters_hash', 'status', 'created_at']),
+            models.Index(fields=['requested_by', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_report_type_display()} #{self.pk} ({self.status})"
+
+
+class PlatformKPISnapshot(models.Model):
+    """Platform-wide figures captured periodically (reports.services.PlatformKPIService)"""
+    taken_at = models.DateTimeField(db_index=True)
+    
+    # Churches
+    church_count = models.PositiveIntegerField(default=0)
+    active_church_count = models.PositiveIntegerField(default=0)
+    verified_church_count = models.PositiveIntegerField(default=0)
+    pending_church_count = models.PositiveIntegerField(default=0)
+    churches_by_status = models.JSONField(default=dict)
+    
+    # People
+    user_count = models.PositiveIntegerField(default=0)
+    active_user_count = models.PositiveIntegerField(default=0)
+    member_count = models.PositiveIntegerField(default=0)
+    
+    # Calendar month the month_* figures cover
+    month = models.DateField()
+    month_givings_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    month_givings_count = models.PositiveIntegerField(default=0)
+    month_expenses_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    top_churches = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    
+    # Giving transactions and payments, overall and created in the last 30 days
+    transaction_count = models.PositiveIntegerField(default=0)
+    recent_transaction_count = models.PositiveIntegerField(default=0)
+    payment_volume = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    recent_payment_volume = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    
+    # Highest primary keys seen, so rows added since can be counted by key range
+    high_water_marks = models.JSONField(default=dict)
+    
+    class Meta:
+        db_table = 'platform_kpi_snapshots'
+        verbose_name = 'Platform KPI Snapshot'
+        verbose_name_plural = 'Platform KPI Snapshots'
+        ordering = ['-taken_at']
+    
+    def __str__(self):
+        return f"Platform KPIs at {self.taken_at:%Y-%m-%d %H:%M}"
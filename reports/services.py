@@ -0,0 +1,684 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import repeat
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import Sum, Count, Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from giving.models import GivingTransaction, GivingDailyRollup, GivingLeaderboardEntry
+from giving.services import GivingLeaderboardService
+from expenses.models import Expense
+from budgets.models import Budget
+from accounts.models import User, Member
+from churches.models import Church, Denomination
+from common.cache import ChurchDataCache
+from common.services import TrendService
+from payments.models import Payment
+from .models import ReportJob, PlatformKPISnapshot
+
+logger = logging.getLogger(__name__)
+
+CHURCH_ADMIN_ROLES = ['pastor', 'treasurer', 'auditor']
+
+# Report period names mapped to TrendService granularities
+TREND_GRANULARITIES = {
+    'daily': 'day',
+    'weekly': 'week',
+    'monthly': 'month',
+    'quarterly': 'quarter',
+    'yearly': 'financial_year',
+}
+
+
+class ReportService:
+    """Builders for the report payloads served by the report views and jobs"""
+    
+    @staticmethod
+    def giving_trends(user, church_id=None, period='monthly', year=None):
+        """Giving totals over the year by period and category, plus top givers"""
+        # Determine church filter
+        if user.role == 'system_admin':
+            church_filter = Q(church_id=church_id) if church_id else Q()
+        elif user.role in CHURCH_ADMIN_ROLES:
+            church_filter = Q(church=user.church)
+        else:
+            church_filter = Q(member__user=user)
+        
+        year = int(year or timezone.now().year)
+        transactions = GivingTransaction.objects.filter(
+            church_filter,
+            transaction_date__year=year,
+            status='completed'
+        )
+        
+        # Church-wide figures come from the daily rollup, a member's own from their transactions
+        if user.role in CHURCH_ADMIN_ROLES + ['system_admin']:
+            givings = GivingDailyRollup.objects.filter(church_filter, date__year=year)
+            date_field = 'date'
+            totals = {'total': Sum('total_amount'), 'count': Sum('transaction_count')}
+        else:
+            givings = transactions
+            date_field = 'transaction_date'
+            totals = {'total': Sum('amount'), 'count': Count('id')}
+        
+        # Calculate trends based on period in a single grouped query
+        granularity = TREND_GRANULARITIES.get(period, 'month')
+        trends = []
+        for bucket in TrendService.series(
+            givings,
+            date_field,
+            granularity,
+            start_date=date(year, 1, 1),
+            end_date=date(year, 12, 31),
+            aggregates=totals
+        ):
+            trends.append({
+                'period': bucket['period'],
+                'total': float(bucket['total']),
+                'count': bucket['count']
+            })
+        
+        # Giving by type
+        by_type = []
+        for row in givings.values('category__name').annotate(**totals):
+            by_type.append({
+                'category__name': row['category__name'],
+                'total': row['total'],
+                'count': row['count'],
+                'avg': (row['total'] / row['count']) if row['count'] else Decimal('0.00')
+            })
+        
+        # Top givers (for church admins only), from the precomputed leaderboard
+        top_givers = []
+        if user.role in CHURCH_ADMIN_ROLES + ['system_admin']:
+            leaderboard = GivingLeaderboardEntry.objects.filter(
+                church_filter,
+                period_type='year',
+                period_start=date(year, 1, 1)
+            )
+            
+            for giver in GivingLeaderboardService.top(leaderboard, limit=10):
+                top_givers.append({
+                    'member_id': giver['member_id'],
+                    'name': giver['name'],
+                    'total': float(giver['total']),
+                    'count': giver['count']
+                })
+        
+        return {
+            'trends': trends,
+            'by_type': by_type,
+            'top_givers': top_givers,
+            'period': period,
+            'year': year
+        }
+    
+    @staticmethod
+    def financial_summary(user, church_id=None, start_date=None, end_date=None):
+        """Income, expense and budget totals for a date range, by category"""
+        # Determine church filter based on role
+        if user.role == 'system_admin':
+            # System admin can view any church or all churches
+            church_filter = Q(church_id=church_id) if church_id else Q()
+        else:
+            # Church admins and members see their own church
+            church_filter = Q(church=user.church)
+        
+        # Date filter (rollups and expenses are both dated by day)
+        start_of_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        date_filter = Q()
+        if start_date:
+            date_filter &= Q(date__gte=start_date)
+        if end_date:
+            date_filter &= Q(date__lte=end_date)
+        else:
+            # Default to current month
+            date_filter &= Q(date__gte=timezone.localdate(start_of_month))
+        
+        # Calculate income (givings) from the daily rollup
+        givings = GivingDailyRollup.objects.filter(
+            church_filter,
+            date_filter
+        )
+        total_income = givings.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
+        
+        # Calculate expenses
+        expenses = Expense.objects.filter(
+            church_filter,
+            date_filter,
+            status='approved'
+        )
+        total_expenses = expenses.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        
+        # Calculate net income
+        net_income = total_income - total_expenses
+        
+        # Calculate budget utilization
+        budget_totals = Budget.objects.filter(church_filter).aggregate(
+            total=Sum('allocated_amount'),
+            spent=Sum('spent_amount')
+        )
+        total_budget = budget_totals['total'] or Decimal('0.00')
+        budget_spent = budget_totals['spent'] or Decimal('0.00')
+        budget_utilization = (float(budget_spent) / float(total_budget) * 100) if total_budget > 0 else 0
+        
+        # Income by category
+        income_by_category = givings.values('category__name').annotate(
+            total=Sum('total_amount'),
+            count=Sum('transaction_count')
+        )
+        
+        # Expenses by category
+        expenses_by_category = expenses.values('category__name').annotate(
+            total=Sum('amount'),
+            count=Count('id')
+        )
+        
+        return {
+            'total_income': float(total_income),
+            'total_expenses': float(total_expenses),
+            'net_income': float(net_income),
+            'total_budget': float(total_budget),
+            'budget_spent': float(budget_spent),
+            'budget_utilization': round(budget_utilization, 2),
+            'income_by_category': list(income_by_category),
+            'expenses_by_category': list(expenses_by_category),
+            'period': {
+                'start_date': start_date or start_of_month.isoformat(),
+                'end_date': end_date or timezone.now().isoformat()
+            }
+        }
+    
+    @staticmethod
+    def denomination_consolidated(user, denomination_id, start_date=None, end_date=None):
+        """Consolidated income, expenses and members of a denomination's churches"""
+        denomination = Denomination.objects.get(id=denomination_id)
+        if not DenominationReportService.can_view(user, denomination):
+            raise PermissionDenied('You can only report on your own denomination')
+        
+        today = timezone.localdate()
+        start = parse_date(start_date) if start_date else today.replace(day=1)
+        end = parse_date(end_date) if end_date else today
+        if start is None or end is None or start > end:
+            raise ValueError('start_date and end_date must be dates (YYYY-MM-DD) in order')
+        
+        return DenominationReportService.build(denomination, start, end)
+
+
+def _aggregate_church_chunk(church_ids, start_date, end_date):
+    """Thread pool entry point: aggregate a chunk and release the thread's connection"""
+    try:
+        return DenominationReportService.church_partials(church_ids, start_date, end_date)
+    finally:
+        connections.close_all()
+
+
+class DenominationReportService:
+    """
+    Consolidated finances across a denomination's churches.
+    
+    Per-church partial results are cached through ChurchDataCache, so only
+    churches whose data changed since the last run are aggregated again.
+    The rest are split into chunks aggregated concurrently, one grouped
+    query per figure per chunk.
+    """
+    
+    CACHE_ENDPOINT = 'denomination_partial'
+    
+    @staticmethod
+    def can_view(user, denomination):
+        if user.role == 'system_admin':
+            return True
+        return (
+            user.role == 'denomination_admin'
+            and user.church is not None
+            and user.church.denomination_id == denomination.id
+        )
+    
+    @staticmethod
+    def church_partials(church_ids, start_date, end_date):
+        """Income by category, approved expenses and members for each church"""
+        partials = {
+            church_id: {
+                'income': Decimal('0.00'),
+                'transactions': 0,
+                'income_by_category': {},
+                'expenses': Decimal('0.00'),
+                'members': 0
+            }
+            for church_id in church_ids
+        }
+        
+        income = GivingDailyRollup.objects.filter(
+            church_id__in=church_ids,
+            date__range=(start_date, end_date)
+        ).values('church_id', 'category__name').annotate(
+            total=Sum('total_amount'),
+            count=Sum('transaction_count')
+        ).order_by()
+        for row in income:
+            partial = partials[row['church_id']]
+            partial['income'] += row['total']
+            partial['transactions'] += row['count']
+            partial['income_by_category'][row['category__name']] = (row['total'], row['count'])
+        
+        expenses = Expense.objects.filter(
+            church_id__in=church_ids,
+            status='approved',
+            date__range=(start_date, end_date)
+        ).values('church_id').annotate(total=Sum('amount')).order_by()
+        for row in expenses:
+            partials[row['church_id']]['expenses'] = row['total']
+        
+        members = Member.objects.filter(
+            church_id__in=church_ids
+        ).values('church_id').annotate(count=Count('id')).order_by()
+        for row in members:
+            partials[row['church_id']]['members'] = row['count']
+        
+        return partials
+    
+    @staticmethod
+    def collect_partials(church_ids, start_date, end_date):
+        """Cached partials plus freshly aggregated ones for the cache misses"""
+        period = f'{start_date.isoformat()}:{end_date.isoformat()}'
+        partials, keys = ChurchDataCache.get_many(
+            church_ids,
+            DenominationReportService.CACHE_ENDPOINT,
+            period
+        )
+        
+        missing = [church_id for church_id in church_ids if church_id not in partials]
+        chunk_size = settings.DENOMINATION_REPORT_CHUNK_SIZE
+        chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+        workers = min(settings.DENOMINATION_REPORT_WORKERS, len(chunks))
+        
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(
+                    _aggregate_church_chunk,
+                    chunks,
+                    repeat(start_date),
+                    repeat(end_date)
+                ))
+        else:
+            results = [
+                DenominationReportService.church_partials(chunk, start_date, end_date)
+                for chunk in chunks
+            ]
+        
+        computed = {}
+        for result in results:
+            computed.update(result)
+        ChurchDataCache.set_many({keys[church_id]: partial for church_id, partial in computed.items()})
+        
+        partials.update(computed)
+        return partials, len(missing)
+    
+    @staticmethod
+    def build(denomination, start_date, end_date):
+        """Merge the per-church partials into the consolidated report"""
+        churches = list(
+            Church.objects.filter(denomination=denomination, is_active=True)
+            .values('id', 'name', 'church_code')
+            .order_by('name')
+        )
+        partials, computed = DenominationReportService.collect_partials(
+            [church['id'] for church in churches],
+            start_date,
+            end_date
+        )
+        
+        total_income = Decimal('0.00')
+        total_expenses = Decimal('0.00')
+        total_members = 0
+        by_category = {}
+        church_rows = []
+        for church in churches:
+            partial = partials[church['id']]
+            total_income += partial['income']
+            total_expenses += partial['expenses']
+            total_members += partial['members']
+            for name, (amount, count) in partial['income_by_category'].items():
+                category_total = by_category.setdefault(name, [Decimal('0.00'), 0])
+                category_total[0] += amount
+                category_total[1] += count
+            
+            church_rows.append({
+                'church_id': church['id'],
+                'name': church['name'],
+                'church_code': church['church_code'],
+                'income': float(partial['income']),
+                'transactions': partial['transactions'],
+                'expenses': float(partial['expenses']),
+                'net': float(partial['income'] - partial['expenses']),
+                'members': partial['members']
+            })
+        
+        church_rows.sort(key=lambda row: row['income'], reverse=True)
+        income_by_category = [
+            {'category': name, 'total': float(amount), 'count': count}
+            for name, (amount, count) in sorted(by_category.items(), key=lambda item: item[1][0], reverse=True)
+        ]
+        
+        logger.info(
+            f"Consolidated {len(churches)} churches of {denomination.name}, "
+            f"{computed} aggregated and {len(churches) - computed} from cache"
+        )
+        
+        return {
+            'denomination': {
+                'id': denomination.id,
+                'name': denomination.name
+            },
+            'period': {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat()
+            },
+            'totals': {
+                'churches': len(churches),
+                'income': float(total_income),
+                'expenses': float(total_expenses),
+                'net': float(total_income - total_expenses),
+                'members': total_members
+            },
+            'income_by_category': income_by_category,
+            'churches': church_rows
+        }
+
+
+class ReportJobService:
+    """Service for running heavy reports in the background and sharing their results"""
+    
+    # Report types mapped to their builder and accepted parameters
+    REPORTS = {
+        'giving_trends': (ReportService.giving_trends, ('church_id', 'period', 'year')),
+        'financial_summary': (ReportService.financial_summary, ('church_id', 'start_date', 'end_date')),
+        'denomination_consolidated': (
+            ReportService.denomination_consolidated,
+            ('denomination_id', 'start_date', 'end_date')
+        ),
+    }
+    
+    @staticmethod
+    def scope_for(user, church_id=None):
+        """Identify whose data a report run by this user would contain"""
+        if user.role == 'system_admin':
+            return f'church:{church_id}' if church_id else 'platform'
+        if user.role in CHURCH_ADMIN_ROLES:
+            return f'church:{user.church_id}'
+        # Members see their own giving, so their reports are never shared
+        return f'user:{user.id}'
+    
+    @staticmethod
+    def clean_parameters(report_type, parameters):
+        """Keep only the report's known, non-empty parameters"""
+        _, accepted = ReportJobService.REPORTS[report_type]
+        return {
+            name: str(parameters[name])
+            for name in accepted
+            if parameters.get(name) not in (None, '')
+        }
+    
+    @staticmethod
+    def parameters_hash(report_type, parameters, scope):
+        payload = json.dumps(
+            {'report_type': report_type, 'parameters': parameters, 'scope': scope},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    @staticmethod
+    def can_view(user, job):
+        if job.requested_by_id == user.id:
+            return True
+        return ReportJobService.scope_for(user, job.parameters.get('church_id')) == job.scope
+    
+    @staticmethod
+    def submit(user, report_type, parameters):
+        """Queue a report, or return a fresh or running job for the same parameters
+
+        Returns the job and whether it was reused.
+        """
+        parameters = ReportJobService.clean_parameters(report_type, parameters)
+        scope = ReportJobService.scope_for(user, parameters.get('church_id'))
+        parameters_hash = ReportJobService.parameters_hash(report_type, parameters, scope)
+        
+        fresh_since = timezone.now() - timedelta(seconds=settings.REPORT_JOB_FRESHNESS)
+        existing = ReportJob.objects.filter(
+            Q(status='completed', completed_at__gte=fresh_since)
+            | Q(status__in=['pending', 'running'], created_at__gte=fresh_since),
+            parameters_hash=parameters_hash
+        ).order_by('-created_at').first()
+        if existing:
+            return existing, True
+        
+        job = ReportJob.objects.create(
+            requested_by=user,
+            church_id=user.church_id if user.role != 'system_admin' else parameters.get('church_id'),
+            report_type=report_type,
+            parameters=parameters,
+            parameters_hash=parameters_hash,
+            scope=scope
+        )
+        
+        from .tasks import run_report_job
+        transaction.on_commit(lambda: run_report_job.delay(job.id))
+        return job, False
+    
+    @staticmethod
+    def run(job_id):
+        """Build the report of a pending job and store its result"""
+        # Claim the job so a redelivered task does not run it twice
+        claimed = ReportJob.objects.filter(pk=job_id, status='pending').update(
+            status='running',
+            started_at=timezone.now()
+        )
+        if not claimed:
+            return None
+        
+        job = ReportJob.objects.select_related('requested_by').get(pk=job_id)
+        builder, _ = ReportJobService.REPORTS[job.report_type]
+        try:
+            result = builder(job.requested_by, **job.parameters)
+        except Exception as e:
+            logger.error(f"Report job {job.id} ({job.report_type}) failed: {str(e)}")
+            job.status = 'failed'
+            job.error = str(e)
+        else:
+            # Round-trip through JSON so the stored result matches what is served
+            job.result = json.loads(json.dumps(result, cls=DjangoJSONEncoder))
+            job.status = 'completed'
+        
+        job.completed_at = timezone.now()
+        job.save(update_fields=['status', 'result', 'error', 'completed_at', 'updated_at'])
+        return job
+    
+    @staticmethod
+    def to_csv(result):
+        """Flatten a report result into CSV
+
+        Scalar values come first as name/value rows, then every list of rows
+        as its own titled table.
+        """
+        output = io.StringIO()
+        writer = csv.writer(output)
+        
+        tables = []
+        for name, value in result.items():
+            if isinstance(value, list):
+                tables.append((name, value))
+            elif isinstance(value, dict):
+                for key, item in value.items():
+                    writer.writerow([f'{name}.{key}', item])
+            else:
+                writer.writerow([name, value])
+        
+        for name, rows in tables:
+            writer.writerow([])
+            writer.writerow([name])
+            if not rows:
+                continue
+            columns = list(rows[0].keys())
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow([row.get(column) for column in columns])
+        
+        return output.getvalue()
+
+
+class PlatformKPIService:
+    """
+    Service for platform-wide KPI snapshots.
+    
+    The platform dashboards read the latest snapshot instead of counting and
+    summing every tenant's rows on each load. Rows added since the snapshot
+    are found by primary key range from its high-water marks, which stays
+    cheap however large the tables grow.
+    """
+    
+    # High-water mark names mapped to the models they track
+    TRACKED_MODELS = {
+        'church': Church,
+        'user': User,
+        'member': Member,
+        'giving_transaction': GivingTransaction,
+        'payment': Payment,
+    }
+    
+    HISTORY_FIELDS = (
+        'church_count', 'active_church_count', 'user_count', 'member_count',
+        'month_givings_total', 'month_expenses_total', 'transaction_count', 'payment_volume'
+    )
+    
+    @staticmethod
+    def take_snapshot():
+        """Capture the current platform figures"""
+        now = timezone.now()
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        recent_since = now - timedelta(days=30)
+        
+        # Read the marks first so rows added while the snapshot runs show up in the next delta
+        high_water_marks = {
+            name: model.objects.aggregate(last=Max('id'))['last'] or 0
+            for name, model in PlatformKPIService.TRACKED_MODELS.items()
+        }
+        
+        churches_by_status = {}
+        active_churches = 0
+        verified_churches = 0
+        for row in Church.objects.values('status', 'is_active').annotate(count=Count('id')).order_by():
+            churches_by_status[row['status']] = churches_by_status.get(row['status'], 0) + row['count']
+            if row['is_active']:
+                active_churches += row['count']
+                if row['status'] == 'verified':
+                    verified_churches += row['count']
+        
+        users = User.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True))
+        )
+        
+        month_givings = GivingDailyRollup.objects.filter(date__gte=month_start, date__lte=today)
+        givings = month_givings.aggregate(total=Sum('total_amount'), count=Sum('transaction_count'))
+        top_churches = month_givings.values('church__name').annotate(
+            total=Sum('total_amount'),
+            count=Sum('transaction_count')
+        ).order_by('-total')[:10]
+        
+        month_expenses = Expense.objects.filter(
+            status='approved',
+            date__gte=month_start,
+            date__lte=today
+        ).aggregate(total=Sum('amount'))['total']
+        
+        transactions = GivingTransaction.objects.aggregate(
+            total=Count('id'),
+            recent=Count('id', filter=Q(created_at__gte=recent_since))
+        )
+        payments = Payment.objects.aggregate(
+            total=Sum('amount'),
+            recent=Sum('amount', filter=Q(created_at__gte=recent_since))
+        )
+        
+        snapshot = PlatformKPISnapshot.objects.create(
+            taken_at=now,
+            church_count=sum(churches_by_status.values()),
+            active_church_count=active_churches,
+            verified_church_count=verified_churches,
+            pending_church_count=churches_by_status.get('pending', 0),
+            churches_by_status=churches_by_status,
+            user_count=users['total'],
+            active_user_count=users['active'],
+            member_count=Member.objects.count(),
+            month=month_start,
+            month_givings_total=givings['total'] or Decimal('0.00'),
+            month_givings_count=givings['count'] or 0,
+            month_expenses_total=month_expenses or Decimal('0.00'),
+            top_churches=[{**row, 'total': float(row['total'])} for row in top_churches],
+            transaction_count=transactions['total'],
+            recent_transaction_count=transactions['recent'],
+            payment_volume=payments['total'] or Decimal('0.00'),
+            recent_payment_volume=payments['recent'] or Decimal('0.00'),
+            high_water_marks=high_water_marks
+        )
+        
+        logger.info(f"Took platform KPI snapshot {snapshot.id}")
+        return snapshot
+    
+    @staticmethod
+    def latest():
+        """The most recent snapshot, taking the first one if none exists yet"""
+        return PlatformKPISnapshot.objects.first() or PlatformKPIService.take_snapshot()
+    
+    @staticmethod
+    def delta(snapshot):
+        """Rows added since the snapshot was taken, counted by primary key range"""
+        marks = snapshot.high_water_marks
+        
+        def added(name):
+            return PlatformKPIService.TRACKED_MODELS[name].objects.filter(id__gt=marks.get(name, 0))
+        
+        givings = added('giving_transaction').aggregate(
+            count=Count('id'),
+            completed_total=Sum('amount', filter=Q(status='completed'))
+        )
+        payments = added('payment').aggregate(count=Count('id'), total=Sum('amount'))
+        
+        return {
+            'since': snapshot.taken_at,
+            'churches': added('church').count(),
+            'users': added('user').count(),
+            'members': added('member').count(),
+            'transactions': givings['count'],
+            'completed_givings_total': float(givings['completed_total'] or 0),
+            'payments': payments['count'],
+            'payment_volume': float(payments['total'] or 0)
+        }
+    
+    @staticmethod
+    def history(days=30):
+        """The last snapshot of each day, oldest first, for platform trend charts"""
+        snapshots = PlatformKPISnapshot.objects.filter(
+            taken_at__gte=timezone.now() - timedelta(days=days)
+        ).order_by('taken_at').values('taken_at', *PlatformKPIService.HISTORY_FIELDS)
+        
+        daily = {}
+        for snapshot in snapshots:
+            daily[timezone.localtime(snapshot['taken_at']).date()] = snapshot
+        
+        return [
+            {'date': day, **{field: snapshot[field] for field in PlatformKPIService.HISTORY_FIELDS}}
+            for day, snapshot in daily.items()
+        ]
@@ -0,0 +1,20 @@
+from celery import shared_task
+
+
+@shared_task
+def run_report_job(job_id):
+    """Build a queued report; routed to the low-priority report queue"""
+    from .services import ReportJobService
+    
+    job = ReportJobService.run(job_id)
+    if job is None:
+        return None
+    return job.status
+
+
+@shared_task
+def take_platform_kpi_snapshot():
+    """Capture platform-wide KPIs for the system overview dashboards"""
+    from .services import PlatformKPIService
+    
+    return PlatformKPIService.take_snapshot().id
@@ -0,0 +1,603 @@
+import re
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from churches.models import Denomination
+from common.services import OutboxService
+from expenses.models import Expense, ExpenseCategory
+from giving.models import GivingCategory, GivingDailyRollup, RecurringGiving
+from giving.tests import GivingTestCase
+from .analytics import CashFlowProjectionService, GivingAnalyticsService, GivingCohortService
+from .models import PlatformKPISnapshot
+from .services import DenominationReportService, PlatformKPIService, ReportJobService
+
+
+class QueryPlanTests(GivingTestCase):
+    """Guard the hottest report and dashboard queries against full table scans.
+
+    Each test requests a report or dashboard endpoint, asks the database for
+    the plan of every SELECT it ran and fails if any table in them would be
+    read in full, sequentially or by walking a whole index, instead of being
+    searched through an index.
+    """
+    
+    # Any SCAN that is not a SEARCH reads the whole table or index
+    SQLITE_FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)')
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.pastor = self.create_user(self.church, 'pastor')
+        self.member = self.create_member(self.church)
+        self.category = self.create_category(self.church)
+        self.complete()
+        self.year = timezone.localdate().year
+    
+    def full_scans(self, sql):
+        """Return the plan lines of a query that read a whole table."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return [row[3] for row in cursor.fetchall() if self.SQLITE_FULL_SCAN.search(row[3])]
+            if connection.vendor == 'postgresql':
+                # Empty test tables are always cheapest to read sequentially, so
+                # ask whether an index path exists at all
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+                return [row[0].strip() for row in cursor.fetchall() if 'Seq Scan' in row[0]]
+        self.skipTest(f'No query plan check for {connection.vendor}')
+    
+    def assertUsesIndexes(self, user, url, params=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        self.assertEqual(response.status_code, 200, url)
+        
+        for query in queries.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                scans = self.full_scans(query['sql'])
+                self.assertEqual(scans, [], f"Full table scan in plan for {url}:\n{query['sql']}")
+    
+    def test_financial_summary(self):
+        self.assertUsesIndexes(self.pastor, '/api/reports/financial-summary/')
+    
+    def test_church_giving_trends(self):
+        self.assertUsesIndexes(self.pastor, '/api/reports/giving-trends/')
+    
+    def test_member_giving_trends(self):
+        self.assertUsesIndexes(self.member.user, '/api/reports/giving-trends/')
+    
+    def test_church_performance(self):
+        self.assertUsesIndexes(self.pastor, '/api/reports/church-performance/')
+    
+    def test_dashboard_financial_summary(self):
+        self.assertUsesIndexes(self.pastor, '/api/dashboard/financial-summary/')
+    
+    def test_dashboard_monthly_trend(self):
+        self.assertUsesIndexes(self.pastor, '/api/dashboard/monthly-trend/')
+    
+    def test_dashboard_breakdowns(self):
+        self.assertUsesIndexes(self.pastor, '/api/dashboard/income-breakdown/')
+        self.assertUsesIndexes(self.pastor, '/api/dashboard/expense-breakdown/')
+    
+    def test_church_giving_history_page(self):
+        self.assertUsesIndexes(self.pastor, '/api/giving/transactions-list/')
+    
+    def test_member_giving_history(self):
+        self.assertUsesIndexes(self.member.user, '/api/giving/transactions-list/history/')
+    
+    def test_approved_expenses_in_range(self):
+        self.assertUsesIndexes(self.pastor, '/api/expenses/', {
+            'status': 'approved',
+            'dateFrom': timezone.localdate().replace(day=1).isoformat()
+        })
+    
+    def test_church_budgets_for_year(self):
+        self.assertUsesIndexes(self.pastor, '/api/budgets/', {'year': self.year})
+
+
+class MemberStatisticsTests(GivingTestCase):
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.client = APIClient()
+        self.client.force_authenticate(self.create_user(self.church, 'pastor'))
+    
+    def test_growth_trend_ends_at_the_member_total(self):
+        today = timezone.localdate()
+        for membership_date in (None, today - timedelta(days=800), today):
+            self.create_member(self.church, membership_date=membership_date)
+        
+        response = self.client.get('/api/reports/member-statistics/', {'months': 6})
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        self.assertEqual(data['total_members'], 3)
+        self.assertEqual(len(data['growth_trend']), 6)
+        self.assertEqual(data['growth_trend'][0]['total_members'], 2)
+        self.assertEqual(data['growth_trend'][-1]['total_members'], data['total_members'])
+
+
+class DenominationPartialsCacheTests(GivingTestCase):
+    """Cached per-church partials must follow member changes."""
+    
+    def setUp(self):
+        cache.clear()
+        self.church = self.create_church()
+        self.today = timezone.localdate()
+    
+    def members(self):
+        partials, _missing = DenominationReportService.collect_partials([self.church.id], self.today, self.today)
+        return partials[self.church.id]['members']
+    
+    def test_member_changes_invalidate_cached_partials(self):
+        self.assertEqual(self.members(), 0)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            member = self.create_member(self.church)
+        self.assertEqual(self.members(), 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            member.delete()
+        self.assertEqual(self.members(), 0)
+
+
+@override_settings(DENOMINATION_REPORT_WORKERS=1, DENOMINATION_REPORT_CHUNK_SIZE=2)
+class DenominationReportTests(GivingTestCase):
+    """Consolidated figures add up the completed giving of every church in the denomination."""
+    
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.denomination = Denomination.objects.create(name='Test Denomination')
+        self.churches = [self.create_church(denomination=self.denomination) for _ in range(3)]
+        self.members = [self.create_member(church) for church in self.churches]
+        
+        first, second, _third = self.members
+        self.give(first, 'Tithe', '100.00')
+        self.give(first, 'Offering', '30.00')
+        self.give(second, 'Tithe', '200.00')
+        refunded = self.give(second, 'Tithe', '50.00')
+        
+        # A church of another denomination is left out
+        outsider = self.create_member(self.create_church())
+        self.give(outsider, 'Tithe', '500.00')
+        
+        category = ExpenseCategory.objects.create(name='Utilities')
+        for status, amount in (('approved', '40.00'), ('pending', '999.00')):
+            Expense.objects.create(
+                user=self.create_user(self.churches[1], 'treasurer'),
+                title='Electricity',
+                amount=Decimal(amount),
+                category=category,
+                date=self.today,
+                status=status
+            )
+        
+        self.drain()
+        refunded.refund(Decimal('50.00'), 'Duplicate payment')
+        self.drain()
+    
+    def drain(self):
+        with self.captureOnCommitCallbacks():
+            OutboxService.drain()
+    
+    def give(self, member, category_name, amount):
+        category, _created = GivingCategory.objects.get_or_create(church=member.church, name=category_name)
+        giving = self.create_giving(member, category, amount)
+        giving.mark_completed()
+        return giving
+    
+    def test_consolidates_churches_across_chunks(self):
+        report = DenominationReportService.build(self.denomination, self.today, self.today)
+        
+        self.assertEqual(report['totals'], {
+            'churches': 3,
+            'income': 330.0,
+            'expenses': 40.0,
+            'net': 290.0,
+            'members': 3
+        })
+        self.assertEqual(report['income_by_category'], [
+            {'category': 'Tithe', 'total': 300.0, 'count': 2},
+            {'category': 'Offering', 'total': 30.0, 'count': 1},
+        ])
+        self.assertEqual(
+            [(row['church_id'], row['income'], row['transactions'], row['expenses'], row['net'], row['members'])
+             for row in report['churches']],
+            [
+                (self.churches[1].id, 200.0, 1, 40.0, 160.0, 1),
+                (self.churches[0].id, 130.0, 2, 0.0, 130.0, 1),
+                (self.churches[2].id, 0.0, 0, 0.0, 0.0, 1),
+            ]
+        )
+    
+    def test_cached_partials_give_the_same_report(self):
+        first = DenominationReportService.build(self.denomination, self.today, self.today)
+        with mock.patch.object(DenominationReportService, 'church_partials', side_effect=AssertionError):
+            second = DenominationReportService.build(self.denomination, self.today, self.today)
+        self.assertEqual(second, first)
+
+
+class ReportJobTests(GivingTestCase):
+    """Background report jobs are shared within their data scope only."""
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.pastor = self.create_user(self.church, 'pastor')
+        self.treasurer = self.create_user(self.church, 'treasurer')
+        self.member = self.create_member(self.church)
+        self.other_pastor = self.create_user(self.create_church(), 'pastor')
+        self.admin = self.create_user(None, 'system_admin')
+    
+    def submit(self, user, **parameters):
+        return ReportJobService.submit(user, 'financial_summary', parameters)
+    
+    def test_scope_follows_whose_data_the_report_contains(self):
+        self.assertEqual(ReportJobService.scope_for(self.pastor), f'church:{self.church.id}')
+        self.assertEqual(ReportJobService.scope_for(self.treasurer), f'church:{self.church.id}')
+        self.assertEqual(ReportJobService.scope_for(self.member.user), f'user:{self.member.user.id}')
+        self.assertEqual(ReportJobService.scope_for(self.admin), 'platform')
+        self.assertEqual(ReportJobService.scope_for(self.admin, self.church.id), f'church:{self.church.id}')
+    
+    def test_identical_requests_share_one_job(self):
+        job, reused = self.submit(self.pastor, start_date='2026-01-01', end_date='')
+        
+        # Same report for the same church, with the empty parameter left out
+        same, same_reused = self.submit(self.treasurer, start_date='2026-01-01')
+        other_dates, other_dates_reused = self.submit(self.pastor, start_date='2026-02-01')
+        other_church, other_church_reused = self.submit(self.other_pastor, start_date='2026-01-01')
+        
+        self.assertFalse(reused)
+        self.assertEqual(job.parameters, {'start_date': '2026-01-01'})
+        self.assertEqual((same, same_reused), (job, True))
+        self.assertFalse(other_dates_reused)
+        self.assertFalse(other_church_reused)
+        self.assertNotEqual(other_church.parameters_hash, job.parameters_hash)
+    
+    def test_member_reports_are_never_shared(self):
+        job, _reused = self.submit(self.member.user, start_date='2026-01-01')
+        other, reused = self.submit(self.create_member(self.church).user, start_date='2026-01-01')
+        
+        self.assertFalse(reused)
+        self.assertNotEqual(other, job)
+    
+    def test_can_view_within_the_scope(self):
+        church_job, _reused = self.submit(self.pastor)
+        member_job, _reused = self.submit(self.member.user)
+        admin_job, _reused = self.submit(self.admin, church_id=self.church.id)
+        
+        self.assertTrue(ReportJobService.can_view(self.treasurer, church_job))
+        self.assertTrue(ReportJobService.can_view(self.pastor, admin_job))
+        self.assertFalse(ReportJobService.can_view(self.other_pastor, church_job))
+        self.assertFalse(ReportJobService.can_view(self.member.user, church_job))
+        
+        self.assertTrue(ReportJobService.can_view(self.member.user, member_job))
+        self.assertFalse(ReportJobService.can_view(self.pastor, member_job))
+        self.assertFalse(ReportJobService.can_view(self.create_member(self.church).user, member_job))
+    
+    def test_run_stores_the_result_once(self):
+        job, _reused = self.submit(self.pastor, start_date='2026-01-01')
+        
+        ReportJobService.run(job.id)
+        job.refresh_from_db()
+        
+        self.assertEqual(job.status, 'completed')
+        self.assertIsNotNone(job.completed_at)
+        self.assertIn('total_income', job.result)
+        self.assertIsNone(ReportJobService.run(job.id))
+    
+    def test_failed_job_records_the_error_and_is_not_reused(self):
+        job, _reused = self.submit(self.pastor, start_date='not-a-date')
+        
+        ReportJobService.run(job.id)
+        job.refresh_from_db()
+        retried, reused = self.submit(self.pastor, start_date='not-a-date')
+        
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('not-a-date', job.error)
+        self.assertIsNone(job.result)
+        self.assertIsNotNone(job.completed_at)
+        self.assertFalse(reused)
+        self.assertNotEqual(retried, job)
+
+
+class PlatformKPITests(GivingTestCase):
+    """Platform dashboards serve the latest snapshot plus the rows added since."""
+    
+    def setUp(self):
+        self.church = self.create_church()
+        self.member = self.create_member(self.church)
+        self.category = self.create_category(self.church)
+    
+    def test_delta_counts_only_rows_after_the_latest_snapshot(self):
+        self.complete('100.00')
+        first = PlatformKPIService.take_snapshot()
+        
+        self.complete('40.00')
+        self.create_giving(self.member, self.category, '25.00')
+        delta = PlatformKPIService.delta(first)
+        self.assertEqual(delta['transactions'], 2)
+        self.assertEqual(delta['completed_givings_total'], 40.0)
+        
+        second = PlatformKPIService.take_snapshot()
+        self.assertEqual(second.transaction_count, 3)
+        self.assertEqual(PlatformKPIService.delta(second)['transactions'], 0)
+        
+        self.complete('10.00')
+        self.assertEqual(PlatformKPIService.latest(), second)
+        self.assertEqual(PlatformKPIService.delta(second)['transactions'], 1)
+        self.assertEqual(PlatformKPIService.delta(second)['completed_givings_total'], 10.0)
+    
+    def test_admin_dashboard_reads_the_snapshot(self):
+        snapshot = PlatformKPIService.take_snapshot()
+        # Figures that could only have come from the snapshot row
+        PlatformKPISnapshot.objects.filter(pk=snapshot.pk).update(church_count=99, transaction_count=42)
+        self.complete()
+        
+        client = APIClient()
+        client.force_authenticate(self.create_user(None, 'system_admin', is_staff=True))
+        response = client.get('/api/admin/dashboard/stats/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_churches'], 99)
+        self.assertEqual(response.data['total_transactions'], 42)
+        self.assertEqual(response.data['delta']['transactions'], 1)
+    
+    def test_history_covers_at_least_one_day(self):
+        PlatformKPIService.take_snapshot()
+        client = APIClient()
+        client.force_authenticate(self.create_user(None, 'system_admin', is_staff=True))
+        
+        for days in ('0', '-5'):
+            response = client.get('/api/reports/system-overview/history/', {'days': days})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['data']), 1, days)
+
+
+class GivingAnalyticsTests(GivingTestCase):
+    """The array arithmetic behind the giving analytics report."""
+    
+    def test_daily_totals_fill_days_without_giving_with_zero(self):
+        church = self.create_church()
+        tithe = self.create_category(church)
+        offering = self.create_category(church, 'Offering')
+        for category, day, amount in ((tithe, 2, 100), (offering, 2, 50), (tithe, 5, 30)):
+            GivingDailyRollup.objects.create(
+                church=church,
+                category=category,
+                payment_method='mpesa',
+                date=date(2026, 3, day),
+                total_amount=Decimal(amount),
+                transaction_count=1
+            )
+        
+        amounts = GivingAnalyticsService.load_daily(church.id, date(2026, 3, 1), date(2026, 3, 6))
+        
+        self.assertEqual(amounts.tolist(), [0, 150, 0, 0, 30, 0])
+    
+    def test_rolling_mean_waits_for_a_full_window(self):
+        means = GivingAnalyticsService.rolling_mean(np.array([1.0, 2.0, 3.0, 4.0]), 2)
+        
+        self.assertTrue(np.isnan(means[0]))
+        self.assertEqual(means[1:].tolist(), [1.5, 2.5, 3.5])
+    
+    def test_rolling_mean_of_a_series_shorter_than_the_window(self):
+        means = GivingAnalyticsService.rolling_mean(np.array([1.0, 2.0]), 4)
+        
+        self.assertEqual(len(means), 2)
+        self.assertTrue(np.isnan(means).all())
+    
+    def test_seasonal_indices_recover_a_repeating_pattern(self):
+        pattern = np.array([8, 8, 9, 10, 10, 10, 11, 11, 10, 10, 11, 12], dtype=float)
+        months = np.arange(np.datetime64('2023-01'), np.datetime64('2026-01'))
+        
+        indices = GivingAnalyticsService.seasonal_indices(months, np.tile(pattern, 3) * 100)
+        
+        np.testing.assert_allclose(indices, pattern / pattern.mean())
+    
+    def test_seasonal_indices_need_two_years(self):
+        months = np.arange(np.datetime64('2024-03'), np.datetime64('2026-01'))
+        
+        self.assertIsNone(GivingAnalyticsService.seasonal_indices(months, np.ones(len(months))))
+    
+    def test_linear_forecast_continues_the_trend(self):
+        months = np.arange(np.datetime64('2025-01'), np.datetime64('2026-01'))
+        
+        future, projected = GivingAnalyticsService.forecast(months, 100 + 10 * np.arange(12.0), 3)
+        
+        self.assertEqual(future.astype(str).tolist(), ['2026-01', '2026-02', '2026-03'])
+        np.testing.assert_allclose(projected, [220, 230, 240])
+    
+    def test_forecast_reapplies_the_seasonal_indices(self):
+        indices = np.array([0.5, 1.5] * 6)
+        months = np.arange(np.datetime64('2024-01'), np.datetime64('2026-01'))
+        totals = 100 * indices[months.astype(int) % 12]
+        
+        _future, linear = GivingAnalyticsService.forecast(months, totals, 2, 'linear', indices)
+        _future, smoothed = GivingAnalyticsService.forecast(months, totals, 2, 'exponential', indices)
+        
+        np.testing.assert_allclose(linear, [50, 150])
+        np.testing.assert_allclose(smoothed, [50, 150])
+    
+    def test_forecast_does_not_go_below_zero(self):
+        months = np.arange(np.datetime64('2025-07'), np.datetime64('2026-01'))
+        
+        _future, projected = GivingAnalyticsService.forecast(months, 550 - 100 * np.arange(6.0), 3)
+        
+        self.assertEqual(projected.tolist(), [0, 0, 0])
+    
+    def test_forecast_of_an_empty_series(self):
+        future, projected = GivingAnalyticsService.forecast(np.array([np.datetime64('2025-12')]), np.array([]), 2)
+        
+        self.assertEqual(future.astype(str).tolist(), ['2026-01', '2026-02'])
+        self.assertEqual(projected.tolist(), [0, 0])
+
+
+class CashFlowProjectionTests(GivingTestCase):
+    """Expanded schedules must land on the dates and amounts the models charge."""
+    
+    def expand(self, frequency, first, anchor, end, amount, cap=np.inf, start_date=date(2026, 1, 1),
+               end_date=date(2026, 12, 31)):
+        dates, values = CashFlowProjectionService.expand(
+            np.array([frequency]),
+            np.array([first], dtype='datetime64[D]'),
+            np.array([anchor]),
+            np.array([end], dtype='datetime64[D]'),
+            np.array([amount], dtype=float),
+            np.array([cap], dtype=float),
+            start_date,
+            end_date
+        )
+        return dates.astype(object).tolist(), values.tolist()
+    
+    def test_month_end_anchor_falls_back_in_short_months(self):
+        dates, _values = self.expand('monthly', date(2026, 1, 31), 31, date(2026, 5, 31), 50)
+        
+        self.assertEqual(dates, [
+            date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30), date(2026, 5, 31)
+        ])
+    
+    def test_nothing_is_due_before_the_next_payment_date(self):
+        # Started on the 5th but already charged for March
+        dates, _values = self.expand('monthly', date(2026, 3, 20), 5, date(2026, 6, 30), 50)
+        
+        self.assertEqual(dates, [date(2026, 4, 5), date(2026, 5, 5), date(2026, 6, 5)])
+    
+    def test_payments_stop_at_the_cap(self):
+        _dates, values = self.expand('weekly', date(2026, 1, 5), 5, date(2026, 12, 31), 100, cap=250)
+        
+        self.assertEqual(values, [100, 100, 50])
+    
+    def test_payments_stop_at_the_end_date(self):
+        dates, _values = self.expand('bi_weekly', date(2026, 1, 5), 5, date(2026, 2, 10), 100)
+        
+        self.assertEqual(dates, [date(2026, 1, 5), date(2026, 1, 19), date(2026, 2, 2)])
+    
+    def test_pledge_installments_cover_the_unpaid_balance(self):
+        self.church = self.create_church()
+        self.member = self.create_member(self.church)
+        self.category = self.create_category(self.church)
+        self.create_pledge(
+            '1000.00',
+            paid_amount=Decimal('700.00'),
+            status='partially_paid',
+            start_date=date(2026, 1, 10),
+            end_date=date(2026, 12, 31),
+            installment_amount=Decimal('120.00')
+        )
+        
+        dates, values, count = CashFlowProjectionService.pledge_payments(
+            self.church.id, date(2026, 6, 1), date(2026, 12, 31)
+        )
+        
+        self.assertEqual(count, 1)
+        self.assertEqual(dates.astype(object).tolist(), [date(2026, 6, 10), date(2026, 7, 10), date(2026, 8, 10)])
+        self.assertEqual(values.tolist(), [120, 120, 60])
+
+
+    def test_overdue_schedule_is_charged_once_at_the_start(self):
+        self.church = self.create_church()
+        self.member = self.create_member(self.church)
+        self.category = self.create_category(self.church)
+        for next_payment_date in (date(2026, 2, 5), date(2026, 4, 20)):
+            RecurringGiving.objects.create(
+                member=self.member,
+                church=self.church,
+                category=self.category,
+                frequency='monthly',
+                amount=Decimal('100.00') if next_payment_date.month == 2 else Decimal('30.00'),
+                start_date=date(2026, 1, next_payment_date.day),
+                next_payment_date=next_payment_date,
+                payment_method='mpesa',
+                created_by=self.member.user,
+                updated_by=self.member.user,
+            )
+        
+        dates, values, count, overdue = CashFlowProjectionService.recurring_payments(
+            self.church.id, date(2026, 4, 5), date(2026, 5, 31)
+        )
+        
+        self.assertEqual((count, overdue), (2, 1))
+        # Missed February and March are one charge today, and today's own date is not charged again
+        self.assertEqual(
+            sorted(zip(dates.astype(object).tolist(), values.tolist())),
+            [(date(2026, 4, 5), 100), (date(2026, 4, 20), 30), (date(2026, 5, 5), 100), (date(2026, 5, 20), 30)]
+        )
+
+
+class GivingCohortTests(GivingTestCase):
+    """Cohort sizes and retention, built at once or month by month."""
+    
+    # January 2026 as months since January 1970
+    JANUARY = (2026 - 1970) * 12
+    
+    def setUp(self):
+        cache.clear()
+    
+    def giving(self, *rows):
+        members, months, totals = zip(*rows)
+        return np.array(members), self.JANUARY + np.array(months), np.array(totals, dtype=float)
+    
+    def test_update_counts_each_cohort_by_months_since_its_first_gift(self):
+        # Member 3 first gives in the last closed month
+        state = GivingCohortService.update(
+            GivingCohortService.empty_state(),
+            *self.giving((1, 0, 100), (1, 1, 50), (2, 1, 20), (2, 2, 20), (1, 3, 10), (3, 3, 70)),
+            self.JANUARY + 3
+        )
+        
+        self.assertEqual(state['origin'], self.JANUARY)
+        self.assertEqual(state['members'].tolist(), [1, 2, 3])
+        self.assertEqual((state['first_months'] - self.JANUARY).tolist(), [0, 1, 3])
+        self.assertEqual(state['active'].tolist(), [
+            [1, 1, 0, 1],
+            [1, 1, 0, 0],
+            [0, 0, 0, 0],
+            [1, 0, 0, 0],
+        ])
+        self.assertEqual(state['amounts'][0].tolist(), [100, 50, 0, 10])
+    
+    def test_incremental_updates_match_a_full_rebuild(self):
+        earlier = [(1, 0, 100), (2, 1, 20), (3, 3, 70)]
+        later = [(2, 4, 20), (1, 4, 10), (4, 4, 30)]
+        
+        state = GivingCohortService.update(
+            GivingCohortService.empty_state(), *self.giving(*earlier), self.JANUARY + 3
+        )
+        state = GivingCohortService.update(state, *self.giving(*later), self.JANUARY + 4)
+        rebuilt = GivingCohortService.update(
+            GivingCohortService.empty_state(), *self.giving(*earlier, *later), self.JANUARY + 4
+        )
+        
+        self.assertEqual(state['members'].tolist(), [1, 2, 3, 4])
+        self.assertEqual(state['active'].tolist(), rebuilt['active'].tolist())
+        self.assertEqual(state['amounts'].tolist(), rebuilt['amounts'].tolist())
+        self.assertEqual(state['active'][:, 0].tolist(), [1, 1, 0, 1, 1])
+    
+    def test_refresh_adds_only_the_months_closed_since(self):
+        church = self.create_church()
+        category = self.create_category(church)
+        early, late = self.create_member(church), self.create_member(church)
+        self.create_giving(early, category, status='completed', when=self.local(2026, 1, 10, 12))
+        self.create_giving(late, category, status='completed', when=self.local(2026, 4, 30, 12))
+        # The open month is left out until it closes
+        self.create_giving(early, category, status='completed', when=self.local(2026, 5, 2, 12))
+        
+        state = GivingCohortService.refresh(church.id, date(2026, 5, 15))
+        self.assertEqual(state['through'], self.JANUARY + 3)
+        self.assertEqual(state['active'].tolist(), [[1, 0, 0, 0], [0] * 4, [0] * 4, [1, 0, 0, 0]])
+        
+        state = GivingCohortService.refresh(church.id, date(2026, 6, 1))
+        self.assertEqual(state['through'], self.JANUARY + 4)
+        self.assertEqual(state['active'][0].tolist(), [1, 0, 0, 0, 1])
+        self.assertEqual(state['active'][3].tolist(), [1, 0, 0, 0, 0])
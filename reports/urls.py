@@ -2,9 +2,17 @@ from django.urls import path
 from .views import (
     financial_summary,
     giving_trends,
+    giving_analytics,
+    cash_flow_projection,
+    giving_cohorts,
     member_statistics,
     church_performance,
-    system_overview
+    system_overview,
+    system_overview_history,
+    denomination_report,
+    submit_report_job,
+    report_job_detail,
+    report_job_result
 )
 
 app_name = 'altarfunds_reports'
@@ -12,7 +20,15 @@ app_name = 'altarfunds_reports'
 urlpatterns = [
     path('financial-summary/', financial_summary, name='financial_summary'),
     path('giving-trends/', giving_trends, name='giving_trends'),
+    path('analytics/', giving_analytics, name='giving_analytics'),
+    path('analytics/cash-flow/', cash_flow_projection, name='cash_flow_projection'),
+    path('analytics/cohorts/', giving_cohorts, name='giving_cohorts'),
     path('member-statistics/', member_statistics, name='member_statistics'),
     path('church-performance/', church_performance, name='church_performance'),
     path('system-overview/', system_overview, name='system_overview'),
+    path('system-overview/history/', system_overview_history, name='system_overview_history'),
+    path('denominations/<int:denomination_id>/', denomination_report, name='denomination_report'),
+    path('jobs/', submit_report_job, name='submit_report_job'),
+    path('jobs/<int:job_id>/', report_job_detail, name='report_job_detail'),
+    path('jobs/<int:job_id>/result.<str:file_format>', report_job_result, name='report_job_result'),
 ]
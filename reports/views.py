@@ -1,18 +1,24 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.db.models import Sum, Count, Avg, Q
+from django.db.models import Sum, Count, Q
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
-from giving.models import GivingTransaction
+from giving.models import GivingTransaction, GivingDailyRollup
 from expenses.models import Expense
 from budgets.models import Budget
-from churches.models import Church
+from churches.models import Church, Denomination
 from accounts.models import Member
 from common.permissions import IsChurchAdmin, IsSystemAdmin
+from common.services import TrendService
+from .analytics import GivingAnalyticsService, CashFlowProjectionService, GivingCohortService
+from .models import ReportJob
+from .services import ReportService, ReportJobService, DenominationReportService, PlatformKPIService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,95 +29,16 @@ logger = logging.getLogger(__name__)
 def financial_summary(request):
     """Get financial summary for dashboard"""
     try:
-        user = request.user
-        
-        # Get query parameters
-        church_id = request.query_params.get('church_id')
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        
-        # Determine church filter based on role
-        if user.role == 'system_admin':
-            # System admin can view any church or all churches
-            church_filter = Q(church_id=church_id) if church_id else Q()
-        elif user.role in ['pastor', 'treasurer', 'auditor']:
-            # Church admin can only view their church
-            church_filter = Q(church=user.church)
-        else:
-            # Members view their own data
-            church_filter = Q(church=user.church)
-        
-        # Date filter
-        date_filter = Q()
-        if start_date:
-            date_filter &= Q(transaction_date__gte=start_date)
-        if end_date:
-            date_filter &= Q(transaction_date__lte=end_date)
-        else:
-            # Default to current month
-            start_of_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            date_filter &= Q(transaction_date__gte=start_of_month)
-        
-        # Calculate income (givings)
-        givings = GivingTransaction.objects.filter(
-            church_filter,
-            date_filter,
-            status='completed'
-        )
-        total_income = givings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        # Calculate expenses
-        expenses = Expense.objects.filter(
-            date_filter,
-            status='approved'
-        )
-        
-        # Apply church filter for expenses through user's church
-        if user.role != 'system_admin':
-            expenses = expenses.filter(user__church=user.church)
-        total_expenses = expenses.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        # Calculate net income
-        net_income = total_income - total_expenses
-        
-        # Calculate budget utilization
-        budgets = Budget.objects.all()
-        
-        # Apply church filter for budgets through user's church
-        if user.role != 'system_admin':
-            budgets = budgets.filter(user__church=user.church)
-        total_budget = budgets.aggregate(total=Sum('allocated_amount'))['total'] or Decimal('0.00')
-        budget_spent = budgets.aggregate(total=Sum('spent_amount'))['total'] or Decimal('0.00')
-        budget_utilization = (float(budget_spent) / float(total_budget) * 100) if total_budget > 0 else 0
-        
-        # Income by category
-        income_by_category = givings.values('category__name').annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        )
-        
-        # Expenses by category
-        expenses_by_category = expenses.values('category__name').annotate(
-            total=Sum('amount'),
-            count=Count('id')
+        data = ReportService.financial_summary(
+            request.user,
+            church_id=request.query_params.get('church_id'),
+            start_date=request.query_params.get('start_date'),
+            end_date=request.query_params.get('end_date')
         )
         
         return Response({
             'success': True,
-            'data': {
-                'total_income': float(total_income),
-                'total_expenses': float(total_expenses),
-                'net_income': float(net_income),
-                'total_budget': float(total_budget),
-                'budget_spent': float(budget_spent),
-                'budget_utilization': round(budget_utilization, 2),
-                'income_by_category': list(income_by_category),
-                'expenses_by_category': list(expenses_by_category),
-                'period': {
-                    'start_date': start_date or start_of_month.isoformat(),
-                    'end_date': end_date or timezone.now().isoformat()
-                }
-            }
+            'data': data
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -127,159 +54,243 @@ def financial_summary(request):
 def giving_trends(request):
     """Get giving trends analysis"""
     try:
-        user = request.user
-        
-        # Get query parameters
-        church_id = request.query_params.get('church_id')
-        period = request.query_params.get('period', 'monthly')  # monthly, quarterly, yearly
-        
-        # Determine church filter
-        if user.role == 'system_admin':
-            church_filter = Q(church_id=church_id) if church_id else Q()
-        elif user.role in ['pastor', 'treasurer', 'auditor']:
-            church_filter = Q(church=user.church)
-        else:
-            church_filter = Q(member__user=user)
-        
-        # Get current year data
-        current_year = timezone.now().year
-        givings = GivingTransaction.objects.filter(
-            church_filter,
-            transaction_date__year=current_year,
-            status='completed'
+        data = ReportService.giving_trends(
+            request.user,
+            church_id=request.query_params.get('church_id'),
+            period=request.query_params.get('period', 'monthly')  # monthly, quarterly, yearly
         )
         
-        # Calculate trends based on period
-        trends = []
-        if period == 'monthly':
-            for month in range(1, 13):
-                month_givings = givings.filter(transaction_date__month=month)
-                total = month_givings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-                trends.append({
-                    'period': f"{current_year}-{month:02d}",
-                    'total': float(total),
-                    'count': month_givings.count()
-                })
-        elif period == 'quarterly':
-            for quarter in range(1, 5):
-                start_month = (quarter - 1) * 3 + 1
-                end_month = quarter * 3
-                quarter_givings = givings.filter(
-                    transaction_date__month__gte=start_month,
-                    transaction_date__month__lte=end_month
-                )
-                total = quarter_givings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-                trends.append({
-                    'period': f"{current_year}-Q{quarter}",
-                    'total': float(total),
-                    'count': quarter_givings.count()
-                })
+        return Response({
+            'success': True,
+            'data': data
+        }, status=status.HTTP_200_OK)
         
-        # Giving by type
-        by_type = givings.values('category__name').annotate(
-            total=Sum('amount'),
-            count=Count('id'),
-            avg=Avg('amount')
+    except Exception as e:
+        logger.error(f"Error fetching giving trends: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to fetch giving trends'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def giving_analytics(request):
+    """Get moving averages, year-over-year figures, seasonality and a forecast of giving"""
+    params = request.query_params
+    try:
+        data = GivingAnalyticsService.report(
+            request.user,
+            church_id=params.get('church_id'),
+            years=params.get('years', 3),
+            horizon=params.get('horizon', 6),
+            method=params.get('method', 'linear'),
+            alpha=params.get('alpha')
         )
         
-        # Top givers (for church admins only)
-        top_givers = []
-        if user.role in ['pastor', 'treasurer', 'auditor', 'system_admin']:
-            top_givers_data = givings.values('member__user__first_name', 'member__user__last_name').annotate(
-                total=Sum('amount'),
-                count=Count('id')
-            ).order_by('-total')[:10]
-            
-            for giver in top_givers_data:
-                top_givers.append({
-                    'name': f"{giver['member__user__first_name']} {giver['member__user__last_name']}",
-                    'total': float(giver['total']),
-                    'count': giver['count']
-                })
+        return Response({
+            'success': True,
+            'data': data
+        }, status=status.HTTP_200_OK)
+    
+    except PermissionDenied as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_403_FORBIDDEN)
+    except Church.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Church not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error fetching giving analytics: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to fetch giving analytics'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cash_flow_projection(request):
+    """Get expected income from recurring giving and pledges next to recent giving"""
+    params = request.query_params
+    try:
+        data = CashFlowProjectionService.report(
+            request.user,
+            church_id=params.get('church_id'),
+            months=params.get('months', 6),
+            history_months=params.get('history_months', 12),
+            granularity=params.get('granularity', 'month')
+        )
         
         return Response({
             'success': True,
-            'data': {
-                'trends': trends,
-                'by_type': list(by_type),
-                'top_givers': top_givers,
-                'period': period,
-                'year': current_year
-            }
+            'data': data
         }, status=status.HTTP_200_OK)
+    
+    except PermissionDenied as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_403_FORBIDDEN)
+    except Church.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Church not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error projecting cash flow: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to project cash flow'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def giving_cohorts(request):
+    """Get how many givers of each first-gift month kept giving in the months after"""
+    try:
+        data = GivingCohortService.report(
+            request.user,
+            church_id=request.query_params.get('church_id'),
+            cohorts=request.query_params.get('cohorts', 12)
+        )
         
+        return Response({
+            'success': True,
+            'data': data
+        }, status=status.HTTP_200_OK)
+    
+    except PermissionDenied as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_403_FORBIDDEN)
+    except Church.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Church not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
-        logger.error(f"Error fetching giving trends: {str(e)}")
+        logger.error(f"Error fetching giving cohorts: {str(e)}")
         return Response({
             'success': False,
-            'message': 'Failed to fetch giving trends'
+            'message': 'Failed to fetch giving cohorts'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _member_counts(members, month_start, window_start):
+    """Headline member counts, per-status counts and the pre-window baseline in one query"""
+    statuses = [value for value, _ in Member.MEMBERSHIP_STATUS_CHOICES]
+    counts = members.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(membership_status='member')),
+        new_this_month=Count('id', filter=Q(membership_date__gte=month_start)),
+        tithe_payers=Count('id', filter=Q(is_tithe_payer=True)),
+        joined_before_window=Count('id', filter=Q(membership_date__lt=window_start)),
+        undated=Count('id', filter=Q(membership_date__isnull=True)),
+        **{
+            f'status_{value}': Count('id', filter=Q(membership_status=value))
+            for value in statuses
+        }
+    )
+    
+    by_status = []
+    for value in statuses:
+        count = counts.pop(f'status_{value}')
+        if count:
+            by_status.append({'membership_status': value, 'count': count})
+    counts['by_status'] = by_status
+    counts['tithe_payer_percentage'] = round(
+        (counts['tithe_payers'] / counts['total'] * 100) if counts['total'] > 0 else 0, 2
+    )
+    return counts
+
+
 @api_view(['GET'])
 @permission_classes([IsChurchAdmin])
 def member_statistics(request):
     """Get member statistics (Church Admin only)"""
+    try:
+        months = min(max(int(request.query_params.get('months', 12)), 1), 120)
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'months must be a number'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
     try:
         user = request.user
         
         # Get query parameters
         church_id = request.query_params.get('church_id')
         
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        window_start = TrendService.shift(month_start, 'month', -(months - 1))
+        
         # Determine church filter
         if user.role == 'system_admin':
             if church_id:
                 church = Church.objects.get(id=church_id)
             else:
                 # System-wide statistics
-                total_members = Member.objects.count()
-                active_members = Member.objects.filter(membership_status='member').count()
-                new_members_this_month = Member.objects.filter(
-                    membership_date__month=timezone.now().month,
-                    membership_date__year=timezone.now().year
-                ).count()
-                tithe_payers = Member.objects.filter(is_tithe_payer=True).count()
+                counts = _member_counts(Member.objects.all(), month_start, window_start)
                 
                 return Response({
                     'success': True,
                     'data': {
-                        'total_members': total_members,
-                        'active_members': active_members,
-                        'new_members_this_month': new_members_this_month,
-                        'tithe_payers': tithe_payers,
-                        'tithe_payer_percentage': round((tithe_payers / total_members * 100) if total_members > 0 else 0, 2)
+                        'total_members': counts['total'],
+                        'active_members': counts['active'],
+                        'new_members_this_month': counts['new_this_month'],
+                        'tithe_payers': counts['tithe_payers'],
+                        'tithe_payer_percentage': counts['tithe_payer_percentage']
                     }
                 }, status=status.HTTP_200_OK)
         else:
             church = user.church
         
-        # Get church members
+        # Headline counts in one conditional aggregate
         members = Member.objects.filter(church=church)
-        total_members = members.count()
-        
-        # Active members
-        active_members = members.filter(membership_status='member').count()
-        
-        # New members this month
-        new_members_this_month = members.filter(
-            membership_date__month=timezone.now().month,
-            membership_date__year=timezone.now().year
-        ).count()
+        counts = _member_counts(members, month_start, window_start)
         
-        # Tithe payers
-        tithe_payers = members.filter(is_tithe_payer=True).count()
-        
-        # Members by status
-        by_status = members.values('membership_status').annotate(count=Count('id'))
-        
-        # Growth trend (last 12 months)
+        # Growth trend: members joined per calendar month in one grouped query,
+        # accumulated on top of everyone who joined before the window. Members
+        # without a membership date are in total_members, so they are counted
+        # from the start too and the last point matches it.
         growth_trend = []
-        for i in range(11, -1, -1):
-            date = timezone.now() - timedelta(days=i*30)
-            count = members.filter(membership_date__lte=date).count()
+        running_total = counts['joined_before_window'] + counts['undated']
+        for bucket in TrendService.series(
+            members,
+            'membership_date',
+            'month',
+            start_date=window_start,
+            end_date=today,
+            aggregates={'joined': Count('id')}
+        ):
+            running_total += bucket['joined']
             growth_trend.append({
-                'month': date.strftime('%Y-%m'),
-                'total_members': count
+                'month': bucket['period'],
+                'new_members': bucket['joined'],
+                'total_members': running_total
             })
         
         return Response({
@@ -289,12 +300,12 @@ def member_statistics(request):
                     'id': church.id,
                     'name': church.name
                 },
-                'total_members': total_members,
-                'active_members': active_members,
-                'new_members_this_month': new_members_this_month,
-                'tithe_payers': tithe_payers,
-                'tithe_payer_percentage': round((tithe_payers / total_members * 100) if total_members > 0 else 0, 2),
-                'by_status': list(by_status),
+                'total_members': counts['total'],
+                'active_members': counts['active'],
+                'new_members_this_month': counts['new_this_month'],
+                'tithe_payers': counts['tithe_payers'],
+                'tithe_payer_percentage': counts['tithe_payer_percentage'],
+                'by_status': counts['by_status'],
                 'growth_trend': growth_trend
             }
         }, status=status.HTTP_200_OK)
@@ -333,24 +344,22 @@ def church_performance(request):
         current_year = timezone.now().year
         
         # This month's givings
-        this_month_givings = GivingTransaction.objects.filter(
+        this_month_givings = GivingDailyRollup.objects.filter(
             church=church,
-            transaction_date__month=current_month,
-            transaction_date__year=current_year,
-            status='completed'
+            date__month=current_month,
+            date__year=current_year
         )
-        this_month_total = this_month_givings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        this_month_total = this_month_givings.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
         
         # Last month's givings
         last_month = current_month - 1 if current_month > 1 else 12
         last_month_year = current_year if current_month > 1 else current_year - 1
-        last_month_givings = GivingTransaction.objects.filter(
+        last_month_givings = GivingDailyRollup.objects.filter(
             church=church,
-            transaction_date__month=last_month,
-            transaction_date__year=last_month_year,
-            status='completed'
+            date__month=last_month,
+            date__year=last_month_year
         )
-        last_month_total = last_month_givings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        last_month_total = last_month_givings.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
         
         # Calculate growth
         growth_percentage = 0
@@ -361,17 +370,20 @@ def church_performance(request):
         total_members = Member.objects.filter(church=church).count()
         avg_giving_per_member = (this_month_total / total_members) if total_members > 0 else Decimal('0.00')
         
-        # Budget performance
-        budgets = Budget.objects.filter(church=church, isActive=True)
-        total_budget = budgets.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        budget_spent = budgets.aggregate(total=Sum('spent'))['total'] or Decimal('0.00')
+        # Budget performance for this year's budgets
+        budget_totals = Budget.objects.filter(church=church, year=current_year).aggregate(
+            total=Sum('allocated_amount'),
+            spent=Sum('spent_amount')
+        )
+        total_budget = budget_totals['total'] or Decimal('0.00')
+        budget_spent = budget_totals['spent'] or Decimal('0.00')
         budget_remaining = total_budget - budget_spent
         
         # Expenses this month
         this_month_expenses = Expense.objects.filter(
             church=church,
-            expense_date__month=current_month,
-            expense_date__year=current_year,
+            date__month=current_month,
+            date__year=current_year,
             status='approved'
         )
         expenses_total = this_month_expenses.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
@@ -422,46 +434,13 @@ def church_performance(request):
 def system_overview(request):
     """Get system-wide overview (Super Admin only)"""
     try:
-        # Total churches
-        total_churches = Church.objects.count()
-        active_churches = Church.objects.filter(status='verified', is_active=True).count()
-        pending_churches = Church.objects.filter(status='pending').count()
-        
-        # Total members
-        total_members = Member.objects.count()
-        
-        # Total givings (this month)
-        current_month = timezone.now().month
-        current_year = timezone.now().year
-        this_month_givings = GivingTransaction.objects.filter(
-            transaction_date__month=current_month,
-            transaction_date__year=current_year,
-            status='completed'
-        )
-        total_givings = this_month_givings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        # Total expenses (this month)
-        this_month_expenses = Expense.objects.filter(
-            expense_date__month=current_month,
-            expense_date__year=current_year,
-            status='approved'
-        )
-        total_expenses = this_month_expenses.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        # Top performing churches
-        top_churches = GivingTransaction.objects.filter(
-            transaction_date__month=current_month,
-            transaction_date__year=current_year,
-            status='completed'
-        ).values('church__name').annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        ).order_by('-total')[:10]
+        # Platform figures come from the latest KPI snapshot plus rows added since
+        snapshot = PlatformKPIService.latest()
         
         # Recent activities
         recent_givings = GivingTransaction.objects.filter(
             status='completed'
-        ).order_by('-transaction_date')[:5]
+        ).select_related('church').order_by('-transaction_date')[:5]
         
         recent_activities = []
         for giving in recent_givings:
@@ -476,20 +455,25 @@ def system_overview(request):
             'success': True,
             'data': {
                 'churches': {
-                    'total': total_churches,
-                    'active': active_churches,
-                    'pending': pending_churches
+                    'total': snapshot.church_count,
+                    'active': snapshot.verified_church_count,
+                    'pending': snapshot.pending_church_count
                 },
                 'members': {
-                    'total': total_members
+                    'total': snapshot.member_count
                 },
                 'financials': {
-                    'total_givings_this_month': float(total_givings),
-                    'total_expenses_this_month': float(total_expenses),
-                    'net_income': float(total_givings - total_expenses)
+                    'month': snapshot.month.strftime('%Y-%m'),
+                    'total_givings_this_month': float(snapshot.month_givings_total),
+                    'total_expenses_this_month': float(snapshot.month_expenses_total),
+                    'net_income': float(snapshot.month_givings_total - snapshot.month_expenses_total)
                 },
-                'top_churches': list(top_churches),
-                'recent_activities': recent_activities
+                'top_churches': snapshot.top_churches,
+                'recent_activities': recent_activities,
+                'snapshot': {
+                    'taken_at': snapshot.taken_at,
+                    'delta': PlatformKPIService.delta(snapshot)
+                }
             }
         }, status=status.HTTP_200_OK)
         
@@ -499,3 +483,170 @@ def system_overview(request):
             'success': False,
             'message': 'Failed to fetch system overview'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsSystemAdmin])
+def system_overview_history(request):
+    """Get daily platform KPI history for trend charts (Super Admin only)"""
+    try:
+        days = max(1, min(int(request.query_params.get('days', 30)), 366))
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'days must be a number'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'data': PlatformKPIService.history(days)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def denomination_report(request, denomination_id):
+    """Get the consolidated finances of a denomination (Denomination or System Admin only)"""
+    try:
+        data = ReportService.denomination_consolidated(
+            request.user,
+            denomination_id,
+            start_date=request.query_params.get('start_date'),
+            end_date=request.query_params.get('end_date')
+        )
+        
+        return Response({
+            'success': True,
+            'data': data
+        }, status=status.HTTP_200_OK)
+    
+    except (Denomination.DoesNotExist, PermissionDenied):
+        return Response({
+            'success': False,
+            'message': 'Denomination not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error fetching denomination report: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to fetch denomination report'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _report_job_data(job):
+    return {
+        'id': job.id,
+        'report_type': job.report_type,
+        'parameters': job.parameters,
+        'status': job.status,
+        'error': job.error,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'completed_at': job.completed_at,
+    }
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_report_job(request):
+    """Queue a report to be built in the background
+
+    An identical request whose result is still fresh, or which is still
+    running, returns that job instead of starting another one.
+    """
+    report_type = request.data.get('report_type')
+    if report_type not in ReportJobService.REPORTS:
+        return Response({
+            'success': False,
+            'message': f"report_type must be one of: {', '.join(ReportJobService.REPORTS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    parameters = request.data.get('parameters') or {}
+    if not isinstance(parameters, dict):
+        return Response({
+            'success': False,
+            'message': 'parameters must be an object'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    church_id = parameters.get('church_id')
+    if church_id and request.user.role == 'system_admin':
+        if not str(church_id).isdigit() or not Church.objects.filter(id=church_id).exists():
+            return Response({
+                'success': False,
+                'message': 'Church not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+    
+    if report_type == 'denomination_consolidated':
+        denomination_id = str(parameters.get('denomination_id', ''))
+        denomination = Denomination.objects.filter(id=denomination_id).first() if denomination_id.isdigit() else None
+        if denomination is None or not DenominationReportService.can_view(request.user, denomination):
+            return Response({
+                'success': False,
+                'message': 'Denomination not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+    
+    job, reused = ReportJobService.submit(request.user, report_type, parameters)
+    
+    return Response({
+        'success': True,
+        'reused': reused,
+        'data': _report_job_data(job)
+    }, status=status.HTTP_200_OK if reused else status.HTTP_202_ACCEPTED)
+
+
+def _get_report_job(request, job_id):
+    job = ReportJob.objects.filter(id=job_id).first()
+    if job is None or not ReportJobService.can_view(request.user, job):
+        return None
+    return job
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def report_job_detail(request, job_id):
+    """Poll the status of a report job"""
+    job = _get_report_job(request, job_id)
+    if job is None:
+        return Response({
+            'success': False,
+            'message': 'Report job not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'success': True,
+        'data': _report_job_data(job)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def report_job_result(request, job_id, file_format):
+    """Download the stored result of a completed report job as JSON or CSV"""
+    job = _get_report_job(request, job_id)
+    if job is None or file_format not in ('json', 'csv'):
+        return Response({
+            'success': False,
+            'message': 'Report job not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if job.status != 'completed':
+        return Response({
+            'success': False,
+            'message': f'Report job is {job.status}',
+            'data': _report_job_data(job)
+        }, status=status.HTTP_409_CONFLICT)
+    
+    if file_format == 'csv':
+        response = HttpResponse(ReportJobService.to_csv(job.result), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{job.report_type}-{job.id}.csv"'
+        return response
+    
+    return Response({
+        'success': True,
+        'data': job.result
+    }, status=status.HTTP_200_OK)